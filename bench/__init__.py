@@ -0,0 +1,4 @@
+""" standalone benchmarks for tree operations -
+run each module directly, eg
+python -m tree.bench.memory
+"""
@@ -0,0 +1,41 @@
+""" repeated saves of a large tree with a few changes between each,
+as an autosave does - full streamed dumps against incremental ones """
+
+import gc, io, random, sys, time
+
+from tree.bench.dump import buildTree
+
+
+def timed(fn):
+	start = time.perf_counter()
+	fn()
+	return time.perf_counter() - start
+
+
+def main(nBranches=500000, nChanges=3, nSaves=5):
+	gc.disable()
+	tree = buildTree(nBranches)
+	branches = tree.allBranches(includeSelf=False)
+	rng = random.Random(0)
+
+	def save(incremental):
+		buffer = io.StringIO()
+		tree.dump(buffer, incremental=incremental)
+		return buffer.getvalue()
+
+	print("{} branches, {} changes per save".format(nBranches, nChanges))
+	first = timed(lambda: save(True))
+	full, incremental = 0.0, 0.0
+	for i in range(nSaves):
+		for branch in rng.sample(branches, nChanges):
+			branch.value = rng.random()
+		full += timed(lambda: save(False))
+		incremental += timed(lambda: save(True))
+	assert save(True) == save(False)
+	print("{:>20} : {:6.3f} s".format("first incremental", first))
+	print("{:>20} : {:6.3f} s".format("full", full / nSaves))
+	print("{:>20} : {:6.3f} s".format("incremental", incremental / nSaves))
+
+
+if __name__ == '__main__':
+	main(*[int(i) for i in sys.argv[1:]])
@@ -0,0 +1,56 @@
+""" cost of resolving saved branch classes when loading a tree
+where many branches differ in class from their parent
+
+compares the registry in lib.loadObjectClass() against importing
+and logging through safeLoadModule() for every branch, as before
+"""
+
+import gc, io, sys, time
+from contextlib import redirect_stdout
+
+from tree.main import Tree
+from tree.lib import loadObjectClass, safeLoadModule, uniqueSign
+from tree.bench.dump import buildTree
+
+
+class SubTree(Tree):
+	__slots__ = ()
+
+
+def importPerBranch(objData):
+	""" previous loadObjectClass() for string objData """
+	className, path = objData.split(uniqueSign)
+	return getattr(safeLoadModule(path), className)
+
+
+def main(nBranches=200000):
+	tree = buildTree(nBranches)
+	# alternate classes down the tree, so half the branches save objData
+	for branch in tree.allBranches(includeSelf=False):
+		if branch.depth % 2:
+			branch.__class__ = SubTree
+	data = tree.serialise()
+	del tree
+	gc.collect()
+	gc.disable()
+
+	objData = uniqueSign.join([SubTree.__name__, SubTree.__module__])
+	nSaved = str(data).count(objData)
+	print("{} branches, {} with saved classes".format(nBranches, nSaved))
+	for name, fn in (("import per branch", importPerBranch),
+	                 ("registry", loadObjectClass)):
+		log = io.StringIO()
+		start = time.perf_counter()
+		with redirect_stdout(log):
+			for i in range(nSaved):
+				fn(objData)
+		print("{:>20} : {:6.3f} s, {} lines logged".format(
+			name, time.perf_counter() - start, log.getvalue().count("\n")))
+
+	start = time.perf_counter()
+	Tree.fromDict(data)
+	print("{:>20} : {:6.3f} s".format("fromDict", time.perf_counter() - start))
+
+
+if __name__ == '__main__':
+	main(*[int(i) for i in sys.argv[1:]])
@@ -0,0 +1,39 @@
+""" size and round trip speed of the binary codec against json """
+
+import gc, json, sys, time
+
+from tree.main import Tree
+from tree.codec import encode, decode
+from tree.bench.dump import buildTree
+
+
+def timed(fn, *args):
+	start = time.perf_counter()
+	result = fn(*args)
+	return result, time.perf_counter() - start
+
+
+def jsonEncode(tree):
+	return json.dumps(tree.serialise()).encode("utf-8")
+
+
+def jsonDecode(data):
+	return Tree.fromDict(json.loads(data))
+
+
+def main(nBranches=500000):
+	gc.disable()
+	tree = buildTree(nBranches)
+	print("{} branches".format(nBranches))
+	print("         {:>10} {:>9} {:>9}".format("MB", "encode", "decode"))
+	for name, enc, dec in (("json", jsonEncode, jsonDecode),
+	                       ("binary", encode, decode)):
+		data, encodeTime = timed(enc, tree)
+		loaded, decodeTime = timed(dec, data)
+		assert loaded == tree
+		print("{:8} {:10.2f} {:8.2f}s {:8.2f}s".format(
+			name, len(data) / 1e6, encodeTime, decodeTime))
+
+
+if __name__ == '__main__':
+	main(*[int(i) for i in sys.argv[1:]])
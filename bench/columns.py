@@ -0,0 +1,45 @@
+""" columnar export and rebuild of large trees, against
+serialise() / fromDict(), and vectorised queries over the columns """
+
+import gc, sys, time
+
+import numpy as np
+
+from tree.main import Tree
+from tree.bench.dump import buildTree
+from tree.columns import subtreeSizes
+
+
+def timed(fn, *args):
+	start = time.perf_counter()
+	result = fn(*args)
+	return result, time.perf_counter() - start
+
+
+def main(nBranches=1000000):
+	gc.disable()
+	tree = buildTree(nBranches)
+	for branch in tree.iterAllBranches():
+		branch.value = len(branch.name)
+	print("{} branches".format(nBranches))
+
+	cols, toCols = timed(tree.toColumns)
+	rebuilt, fromCols = timed(Tree.fromColumns, cols)
+	serial, toDict = timed(tree.serialise)
+	loaded, fromDict = timed(Tree.fromDict, serial)
+	print("toColumns   : {:6.2f}s    fromColumns : {:6.2f}s".format(
+		toCols, fromCols))
+	print("serialise   : {:6.2f}s    fromDict    : {:6.2f}s".format(
+		toDict, fromDict))
+
+	sizes, t = timed(subtreeSizes, cols)
+	print("subtree sizes     : {:8.2f} ms".format(t * 1e3))
+	histogram, t = timed(np.bincount, cols["depth"])
+	print("depth histogram   : {:8.2f} ms  {}".format(
+		t * 1e3, histogram.tolist()))
+	mean, t = timed(np.mean, cols["value"])
+	print("mean value        : {:8.2f} ms  {:.3f}".format(t * 1e3, mean))
+
+
+if __name__ == '__main__':
+	main(*[int(i) for i in sys.argv[1:]])
@@ -0,0 +1,32 @@
+""" deep copy of a large tree - serialise / fromDict round trip
+against direct cloning
+
+note the round trip never copied values - the restored tree shares
+mutable values with the original
+"""
+
+import gc, sys, time
+
+from tree.bench.dump import buildTree
+
+
+def main(nBranches=200000):
+	tree = buildTree(nBranches)
+	for i, branch in enumerate(tree.iterAllBranches()):
+		if i % 2: # mix in immutable values
+			branch.value = tuple(branch.value or ())
+	gc.disable()
+	print("{} branches".format(nBranches))
+	for name, fn in (
+			("fromDict(serialise())", lambda: tree.fromDict(tree.serialise())),
+			("clone()", lambda: tree.clone()),
+			("clone(shareImmutable)", lambda: tree.clone(shareImmutable=True)),
+	):
+		start = time.perf_counter()
+		fn()
+		print("{:>22} : {:6.2f} s".format(name, time.perf_counter() - start))
+		gc.collect()
+
+
+if __name__ == '__main__':
+	main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
@@ -0,0 +1,71 @@
+""" throughput and peak memory of streamed output
+against json.dump(tree.serialise())
+
+peak memory is measured with tracemalloc, as the peak of
+python allocations above those held by the tree itself -
+timings are taken in a separate pass, without tracing
+"""
+
+import gc, json, os, sys, tempfile, time, tracemalloc
+
+from tree.main import Tree
+
+
+def buildTree(nBranches, fanOut=8):
+	root = Tree("root")
+	frontier = [root]
+	count = 1
+	while count < nBranches:
+		parent = frontier.pop(0)
+		for i in range(fanOut):
+			branch = parent("branch{}".format(i))
+			branch.value = [count, "value {}".format(count), count * 0.5]
+			frontier.append(branch)
+			count += 1
+			if count >= nBranches:
+				break
+	return root
+
+
+def serialiseDump(tree, fp):
+	json.dump(tree.serialise(), fp)
+
+
+def streamDump(tree, fp):
+	tree.dump(fp)
+
+
+def measure(fn, tree, path):
+	""" return seconds, peak bytes and file size for writing tree """
+	gc.collect()
+	start = time.perf_counter()
+	with open(path, "w") as fp:
+		fn(tree, fp)
+	duration = time.perf_counter() - start
+
+	gc.collect()
+	tracemalloc.start()
+	base = tracemalloc.get_traced_memory()[0]
+	with open(path, "w") as fp:
+		fn(tree, fp)
+	peak = tracemalloc.get_traced_memory()[1] - base
+	tracemalloc.stop()
+	return duration, peak, os.path.getsize(path)
+
+
+def main(nBranches=200000):
+	tree = buildTree(nBranches)
+	path = os.path.join(tempfile.gettempdir(), "treeBenchDump.json")
+	print("{} branches".format(nBranches))
+	print("{:>22}{:>10}{:>12}{:>14}".format(
+		"", "seconds", "MB/s", "peak MB"))
+	for name, fn in (("json.dump(serialise())", serialiseDump),
+	                 ("tree.dump()", streamDump)):
+		duration, peak, size = measure(fn, tree, path)
+		print("{:>22}{:>10.2f}{:>12.1f}{:>14.1f}".format(
+			name, duration, size / duration / 1e6, peak / 1e6))
+	os.remove(path)
+
+
+if __name__ == '__main__':
+	main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
@@ -0,0 +1,61 @@
+""" scaling of child operations on a single parent with huge fan-out
+
+each operation is timed as mean cost per call at increasing numbers
+of children - flat columns mean the cost does not grow with fan-out
+"""
+
+import gc, sys, time
+
+from tree.main import Tree
+
+
+def timePerCall(fn, calls):
+	start = time.perf_counter()
+	for i in range(calls):
+		fn(i)
+	return (time.perf_counter() - start) / calls * 1e6
+
+
+def run(nChildren, calls=2000):
+	""" return dict of microseconds per call for each operation """
+	parent = Tree("root")
+	start = time.perf_counter()
+	for i in range(nChildren):
+		parent.addChild(Tree("c{}".format(i)), force=True)
+	result = {"append": (time.perf_counter() - start) / nChildren * 1e6}
+
+	names = ["c{}".format(i * (nChildren // calls or 1) % nChildren)
+	         for i in range(calls)]
+	result["index"] = timePerCall(lambda i: parent.index(names[i]), calls)
+	result["contains"] = timePerCall(
+		lambda i: parent(names[i]) in parent, calls)
+	result["insert0"] = timePerCall(
+		lambda i: parent.addChild(Tree("new{}".format(i)), index=0), calls)
+	result["setIndex"] = timePerCall(
+		lambda i: parent(names[i]).setIndex(i % nChildren), calls)
+	result["rename"] = timePerCall(
+		lambda i: parent(names[i])._setName("renamed{}".format(i)), calls)
+	return result
+
+
+def main(maxChildren=1000000):
+	sizes = []
+	n = 1000
+	while n <= maxChildren:
+		sizes.append(n)
+		n *= 10
+	ops = ("append", "index", "contains", "insert0", "setIndex", "rename")
+	print("microseconds per call")
+	print("{:>10}".format("children") + "".join(
+		"{:>10}".format(i) for i in ops))
+	# as with timeit, keep the cyclic collector out of the timings
+	gc.disable()
+	for size in sizes:
+		result = run(size)
+		gc.collect()
+		print("{:>10}".format(size) + "".join(
+			"{:>10.2f}".format(result[i]) for i in ops))
+
+
+if __name__ == '__main__':
+	main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
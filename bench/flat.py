@@ -0,0 +1,60 @@
+""" memory and read speed of FlatTree against live trees,
+both loaded from the same serialised data
+
+memory is measured with tracemalloc, excluding the serialised dict
+"""
+
+import gc, sys, time, tracemalloc
+
+from tree.main import Tree
+from tree.flat import FlatTree
+from tree.bench.dump import buildTree
+
+
+def measureLoad(load, serial):
+	""" return loaded tree, bytes allocated and seconds """
+	gc.collect()
+	tracemalloc.start()
+	start = tracemalloc.get_traced_memory()[0]
+	loaded = load(serial)
+	end = tracemalloc.get_traced_memory()[0]
+	tracemalloc.stop()
+	startTime = time.perf_counter()
+	load(serial)
+	return loaded, end - start, time.perf_counter() - startTime
+
+
+def timeLookups(root, addresses):
+	start = time.perf_counter()
+	for address in addresses:
+		root(address).value
+	return (time.perf_counter() - start) / len(addresses) * 1e6
+
+
+def timed(fn, *args):
+	start = time.perf_counter()
+	fn(*args)
+	return time.perf_counter() - start
+
+
+def main(nBranches=500000):
+	gc.disable()
+	serial = buildTree(nBranches).serialise()
+	tree, treeBytes, treeLoad = measureLoad(Tree.fromDict, serial)
+	flat, flatBytes, flatLoad = measureLoad(FlatTree.fromDict, serial)
+	print("{} branches".format(nBranches))
+	print("           {:>14} {:>10} {:>12} {:>10}".format(
+		"bytes/branch", "load", "serialise", "lookup"))
+	addresses = [i.stringAddress() for i in tree.allBranches()[::97]]
+	Tree.lookupCacheSize = 0 # compare uncached lookups
+	tree._lookupCache = None
+	for name, root, nBytes, load in (
+			("Tree", tree, treeBytes, treeLoad),
+			("FlatTree", flat.root, flatBytes, flatLoad)):
+		print("{:10} {:14.1f} {:9.2f}s {:11.2f}s {:8.2f}us".format(
+			name, nBytes / nBranches, load, timed(root.serialise),
+			timeLookups(root, addresses)))
+
+
+if __name__ == '__main__':
+	main(*[int(i) for i in sys.argv[1:]])
@@ -0,0 +1,30 @@
+""" json file size and load speed of serialised format versions """
+
+import gc, json, sys, time
+
+from tree.main import Tree
+from tree.bench.dump import buildTree
+
+
+def timed(fn, *args):
+	start = time.perf_counter()
+	result = fn(*args)
+	return result, time.perf_counter() - start
+
+
+def main(nBranches=500000):
+	gc.disable()
+	tree = buildTree(nBranches)
+	print("{} branches".format(nBranches))
+	print("version  {:>10} {:>9} {:>9}".format("MB", "save", "load"))
+	for version in (0, 1):
+		text, saveTime = timed(
+			lambda: json.dumps(tree.serialise(version=version)))
+		loaded, loadTime = timed(lambda: Tree.fromDict(json.loads(text)))
+		assert loaded == tree
+		print("{:<8} {:10.2f} {:8.2f}s {:8.2f}s".format(
+			version, len(text) / 1e6, saveTime, loadTime))
+
+
+if __name__ == '__main__':
+	main(*[int(i) for i in sys.argv[1:]])
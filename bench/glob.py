@@ -0,0 +1,44 @@
+""" wildcard address matching, filtering allBranches() with fnmatch
+against compiled patterns """
+
+import gc, sys, time
+from fnmatch import fnmatchcase
+
+from tree.main import Tree
+
+
+def buildTree(nAssets):
+	root = Tree("root")
+	for i in range(nAssets):
+		asset = root("assets", "asset{}".format(i))
+		for lod in range(3):
+			asset("lod{}".format(lod), "mesh")
+		asset("rig.arm.hand.ctrl_wrist")
+		asset("rig.spine.ctrl_chest")
+	return root
+
+
+def fnmatchFilter(root, pattern):
+	return [i for i in root.allBranches()
+	        if fnmatchcase(i.stringAddress(), pattern)]
+
+
+def globMatch(root, pattern):
+	return list(root.glob(pattern))
+
+
+def main(nAssets=20000):
+	gc.disable()
+	root = buildTree(nAssets)
+	print("{} branches".format(len(root.allBranches())))
+	for pattern in ("assets.*.lod0", "assets.asset1*.rig.**.ctrl_*"):
+		for fn in (fnmatchFilter, globMatch):
+			start = time.perf_counter()
+			found = fn(root, pattern)
+			print("  {:32} {:14} : {:8.2f} ms, {} results".format(
+				pattern, fn.__name__,
+				(time.perf_counter() - start) * 1e3, len(found)))
+
+
+if __name__ == '__main__':
+	main(*[int(i) for i in sys.argv[1:]])
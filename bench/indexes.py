@@ -0,0 +1,43 @@
+""" attribute queries on large trees, scanning against secondary indexes """
+
+import gc, sys, time
+
+from tree.bench.search import buildTree
+
+
+def timeQueries(root, queries, nRepeats=1):
+	start = time.perf_counter()
+	for i in range(nRepeats):
+		for key, value in queries:
+			root.branchesWhere(key, value)
+	return (time.perf_counter() - start) / (nRepeats * len(queries)) * 1e3
+
+
+def main(nBranches=200000):
+	gc.disable()
+	root = buildTree(nBranches)
+	for i, branch in enumerate(root.allBranches()):
+		branch.value = i % 100
+		if not i % 500:
+			branch.extras["readOnly"] = True
+		if not i % 700:
+			branch.active = False
+	queries = [("extras.readOnly", True), ("active", False), ("value", 42)]
+
+	scan = timeQueries(root, queries)
+	start = time.perf_counter()
+	for key, value in queries:
+		root.createIndex(key)
+	build = time.perf_counter() - start
+	indexed = timeQueries(root, queries, 100)
+
+	for key, value in queries:
+		print("  {:16} == {:5} : {} results".format(
+			key, str(value), len(root.branchesWhere(key, value))))
+	print("scan    : {:8.3f} ms per query".format(scan))
+	print("indexed : {:8.3f} ms per query, built in {:.2f}s".format(
+		indexed, build))
+
+
+if __name__ == '__main__':
+	main(*[int(i) for i in sys.argv[1:]])
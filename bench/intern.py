@@ -0,0 +1,61 @@
+""" memory saved by interning names and values when loading a tree
+with few distinct names and values, as most rigs and scenes have
+
+each load is measured with tracemalloc from fresh json text, after
+the parsed dict is released - so only memory held by the tree counts
+"""
+
+import gc, json, sys, tracemalloc
+
+from tree.main import Tree
+
+names = ["translate", "rotate", "scale", "lod0", "lod1", "ctrl", "joint",
+         "mesh", "shape", "offset"]
+values = ["visible", "hidden", 0, 1, 2, 0.5, 1.5, "default", "locked"]
+
+
+def buildTree(nBranches, fanOut=10):
+	root = Tree("root")
+	frontier = [root]
+	count = 1
+	while count < nBranches:
+		parent = frontier.pop(0)
+		for i in range(fanOut):
+			branch = parent(names[i % len(names)])
+			branch.value = values[count % len(values)]
+			frontier.append(branch)
+			count += 1
+			if count >= nBranches:
+				break
+	return root
+
+
+def measureLoad(text, pool):
+	gc.collect()
+	tracemalloc.start()
+	start = tracemalloc.get_traced_memory()[0]
+	data = json.loads(text)
+	tree = Tree.fromDict(data, pool=pool)
+	del data
+	gc.collect()
+	end = tracemalloc.get_traced_memory()[0]
+	tracemalloc.stop()
+	return tree, end - start
+
+
+def main(nBranches=200000):
+	gc.disable()
+	text = json.dumps(buildTree(nBranches).serialise())
+	plain, plainBytes = measureLoad(text, None)
+	del plain
+	interned, internBytes = measureLoad(text, True)
+	print("{} branches, {} names and values pooled".format(
+		nBranches, len(interned.internPool)))
+	print("plain    : {:7.1f} bytes per branch".format(plainBytes / nBranches))
+	print("interned : {:7.1f} bytes per branch".format(
+		internBytes / nBranches))
+	print("saved    : {:7.1f}MB".format((plainBytes - internBytes) / 1e6))
+
+
+if __name__ == '__main__':
+	main(*[int(i) for i in sys.argv[1:]])
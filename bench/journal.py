@@ -0,0 +1,51 @@
+""" cost of saving each change to a large tree - rewriting the whole
+file against appending to a journal, then loading it back """
+
+import gc, json, os, random, shutil, sys, tempfile, time
+
+from tree.journal import TreeJournal, loadTree
+from tree.bench.dump import buildTree
+
+
+def main(nBranches=200000, nChanges=200):
+	gc.disable()
+	tree = buildTree(nBranches)
+	branches = tree.allBranches(includeSelf=False)
+	rng = random.Random(0)
+	folder = tempfile.mkdtemp()
+	try:
+		path = os.path.join(folder, "bench.tree")
+		fullPath = os.path.join(folder, "full.json")
+		start = time.perf_counter()
+		for branch in rng.sample(branches, 5):
+			branch.value = rng.random()
+			with open(fullPath, "w") as f:
+				json.dump(tree.serialise(), f)
+		fullTime = (time.perf_counter() - start) / 5
+
+		journal = TreeJournal(tree, path)
+		start = time.perf_counter()
+		for branch in rng.sample(branches, nChanges):
+			branch.value = rng.random()
+		journalTime = (time.perf_counter() - start) / nChanges
+		journal.close()
+
+		start = time.perf_counter()
+		loaded = loadTree(path)
+		loadTime = time.perf_counter() - start
+		assert loaded == tree
+		journalBytes = os.path.getsize(journal.journalPath)
+
+		print("{} branches, {} changes".format(nBranches, nChanges))
+		print("{:>22} : {:8.3f} ms".format("full rewrite per change",
+		                                   fullTime * 1000))
+		print("{:>22} : {:8.3f} ms, {:.0f} bytes".format(
+			"journal per change", journalTime * 1000,
+			journalBytes / nChanges))
+		print("{:>22} : {:8.3f} s".format("load and replay", loadTime))
+	finally:
+		shutil.rmtree(folder)
+
+
+if __name__ == '__main__':
+	main(*[int(i) for i in sys.argv[1:]])
@@ -0,0 +1,56 @@
+""" time to regenerate a large tree from serialised data
+
+compares TreeBase.fromDict() against the previous approach of
+recursing per child and attaching each branch with addChild()
+"""
+
+import gc, sys, time
+
+from tree.main import Tree
+from tree.lib import loadObjectClass
+from tree.bench.dump import buildTree
+
+
+class SubTree(Tree):
+	""" marks some branches as a different class, so their
+	serialised data carries objData """
+	__slots__ = ()
+
+
+def recursiveFromDict(cls, regenDict):
+	""" previous fromDict - one call and one addChild per branch """
+	objData = regenDict.get("objData") or {}
+	if objData:
+		cls = loadObjectClass(objData) or cls._defaultCls()
+	new = cls(name=regenDict.get("?NAME"), val=regenDict.get("?VALUE"))
+	new.extras = regenDict.get("?EXTRAS") or {}
+	for i in regenDict.get("?CHILDREN") or []:
+		new.addChild(recursiveFromDict(cls, i), force=True)
+	return new
+
+
+def main(nBranches=200000):
+	tree = buildTree(nBranches)
+	for i, branch in enumerate(tree.allBranches(includeSelf=False)):
+		if i % 50 == 0: # swap class of a few leaves
+			leaf = SubTree(branch.name, branch.value)
+			if not branch.branches:
+				parent = branch.parent
+				branch.remove()
+				parent.addChild(leaf)
+	data = tree.serialise()
+	del tree
+	gc.collect()
+	gc.disable()
+
+	print("{} branches".format(nBranches))
+	for name, fn in (("recursive addChild", lambda: recursiveFromDict(Tree, data)),
+	                 ("fromDict", lambda: Tree.fromDict(data))):
+		start = time.perf_counter()
+		fn()
+		print("{:>20} : {:6.2f} s".format(name, time.perf_counter() - start))
+		gc.collect()
+
+
+if __name__ == '__main__':
+	main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
@@ -0,0 +1,43 @@
+""" repeated address lookups, with and without the root lookup cache """
+
+import gc, sys, time
+
+from tree.main import Tree
+
+
+def buildTree(nAddresses, depth=6):
+	root = Tree("root")
+	addresses = []
+	for i in range(nAddresses):
+		tokens = ["n{}_{}".format(level, (i >> level) % 8)
+		          for level in range(depth - 1)] + ["leaf{}".format(i)]
+		address = root.sep.join(tokens)
+		root(address)
+		addresses.append(address)
+	return root, addresses
+
+
+def timeLookups(root, addresses, nCalls):
+	start = time.perf_counter()
+	n = len(addresses)
+	for i in range(nCalls):
+		root(addresses[i % n])
+	return (time.perf_counter() - start) / nCalls * 1e6
+
+
+def main(nAddresses=2000, nCalls=500000):
+	gc.disable()
+	root, addresses = buildTree(nAddresses)
+	cacheSize = Tree.lookupCacheSize
+	Tree.lookupCacheSize = 0
+	root._lookupCache = None
+	uncached = timeLookups(root, addresses, nCalls)
+	Tree.lookupCacheSize = cacheSize
+	cached = timeLookups(root, addresses, nCalls)
+	print("{} distinct addresses, {} lookups".format(nAddresses, nCalls))
+	print("uncached : {:6.2f} us per lookup".format(uncached))
+	print("cached   : {:6.2f} us per lookup".format(cached))
+
+
+if __name__ == '__main__':
+	main(*[int(i) for i in sys.argv[1:]])
@@ -0,0 +1,108 @@
+""" measure memory cost per tree branch
+
+the baseline is BaselineBranch below - a copy of the branch layout
+from before slots were added: no __slots__, and an eager __init__
+allocating a branch map, extras, overrides and three signals per
+branch, each connected to the root's signals on parenting. It is
+compared against the current, slotted and lazy Tree.
+Building the same tree with the baseline commit's own Tree gave the
+same figure as BaselineBranch, 6013 bytes per branch
+"""
+
+import gc, sys, tracemalloc
+from collections import OrderedDict
+
+from tree.main import Tree
+from tree.signal import Signal
+
+
+class BaselineBranch(object):
+	""" branch state as the baseline TreeBase.__init__ and
+	_setParent() built it, without the rest of the interface """
+
+	def __init__(self, name=None, val=None):
+		self._name = str(name) if name else None
+		self._uuid = None
+		self._parent = None
+		self._value = val
+
+		self._branchMap = OrderedDict()
+		self.extras = {}
+		self.overrides = {}
+
+		self._signalsActive = True
+		self.valueChanged = Signal()
+		self.nameChanged = Signal()
+		self.structureChanged = Signal()
+		self.signals = (self.valueChanged,
+		                self.nameChanged,
+		                self.structureChanged)
+
+		self.readOnly = False
+		self.active = True
+
+	def addChild(self, branch, root):
+		self._branchMap[branch._name] = branch
+		branch._parent = self
+		for i in branch.signals:
+			i.clear()
+		branch.valueChanged.connect(root.valueChanged)
+		branch.structureChanged.connect(root.structureChanged)
+		branch.nameChanged.connect(root.nameChanged)
+		return branch
+
+
+def buildTree(nBranches, fanOut=10):
+	""" build a tree of roughly nBranches, fanOut children per branch """
+	root = Tree("root")
+	frontier = [root]
+	count = 1
+	while count < nBranches:
+		parent = frontier.pop(0)
+		for i in range(fanOut):
+			frontier.append(parent("b{}".format(i)))
+			count += 1
+			if count >= nBranches:
+				break
+	return root
+
+
+def buildBaseline(nBranches, fanOut=10):
+	""" same shape as buildTree(), of BaselineBranch """
+	root = BaselineBranch("root")
+	frontier = [root]
+	count = 1
+	while count < nBranches:
+		parent = frontier.pop(0)
+		for i in range(fanOut):
+			frontier.append(
+				parent.addChild(BaselineBranch("b{}".format(i)), root))
+			count += 1
+			if count >= nBranches:
+				break
+	return root
+
+
+def measure(build, nBranches):
+	""" return bytes allocated per branch """
+	gc.collect()
+	tracemalloc.start()
+	start = tracemalloc.get_traced_memory()[0]
+	tree = build(nBranches)
+	end = tracemalloc.get_traced_memory()[0]
+	tracemalloc.stop()
+	del tree
+	return (end - start) / float(nBranches)
+
+
+def main(nBranches=100000):
+	baseline = measure(buildBaseline, nBranches)
+	lazy = measure(buildTree, nBranches)
+	print("branches: {}".format(nBranches))
+	print("baseline layout : {:8.1f} bytes per branch".format(baseline))
+	print("slotted layout  : {:8.1f} bytes per branch".format(lazy))
+	print("saving          : {:8.1f}x".format(baseline / lazy))
+
+
+if __name__ == '__main__':
+	main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,53 @@
+""" scaling of serialiseParallel() across worker processes,
+on a tree with many top-level branches """
+
+import gc, json, os, sys, time
+from concurrent.futures import ProcessPoolExecutor
+
+from tree.main import Tree
+
+
+def buildTree(nTop, perTop):
+	root = Tree("root")
+	for i in range(nTop):
+		top = root("top{}".format(i))
+		for j in range(perTop):
+			branch = top("group{}".format(j // 10))("branch{}".format(j))
+			branch.value = [j, "value {}".format(j), j * 0.5,
+			                {"weight" : j % 7, "tags" : ["a", "b"]}]
+	return root
+
+
+def timed(fn):
+	start = time.perf_counter()
+	result = fn()
+	return result, time.perf_counter() - start
+
+
+def main(nTop=200, perTop=2500):
+	tree = buildTree(nTop, perTop)
+	gc.collect()
+	gc.disable()
+	expected, serialTime = timed(lambda: json.dumps(tree.serialise()))
+	nBranches = len(tree.allBranches())
+	print("{} branches, {} at top level".format(nBranches, nTop))
+	print("{:>18} : {:6.2f} s".format("serialise + dumps", serialTime))
+	workers = 1
+	while workers <= (os.cpu_count() or 1):
+		with ProcessPoolExecutor(workers) as executor:
+			executor.submit(int).result() # start processes first
+			text, duration = timed(lambda: tree.serialiseParallel(
+				executor, workers=workers))
+		assert text == expected
+		print("{:>10} workers : {:6.2f} s  {:4.2f}x".format(
+			workers, duration, serialTime / duration))
+		workers *= 2
+	# pool made per call, forked with the tree - nothing packed
+	text, duration = timed(lambda: tree.serialiseParallel(fork=True))
+	assert text == expected
+	print("{:>10} forked  : {:6.2f} s  {:4.2f}x".format(
+		os.cpu_count(), duration, serialTime / duration))
+
+
+if __name__ == '__main__':
+	main(*[int(i) for i in sys.argv[1:]])
@@ -0,0 +1,59 @@
+""" speed of Tree.loadParallel() against json.load and fromDict,
+for one large saved tree, by number of worker processes """
+
+import gc, json, os, shutil, sys, tempfile, time
+from concurrent.futures import ProcessPoolExecutor
+
+from tree.main import Tree
+from tree.parallel import findTopBranches, _openMap
+from tree.bench.parallel import buildTree
+
+
+def timed(fn):
+	start = time.perf_counter()
+	result = fn()
+	return result, time.perf_counter() - start
+
+
+def main(nTop=200, perTop=2500):
+	folder = tempfile.mkdtemp()
+	try:
+		path = os.path.join(folder, "big.json")
+		tree = buildTree(nTop, perTop)
+		with open(path, "w") as f:
+			tree.dump(f)
+		expected = tree.serialise()
+		del tree
+		gc.collect()
+		gc.disable()
+
+		def sequential():
+			with open(path) as f:
+				return Tree.fromDict(json.load(f))
+		loaded, serialTime = timed(sequential)
+		del loaded
+		data = _openMap(path)
+		_, scanTime = timed(lambda: findTopBranches(data))
+		data.close()
+		print("{:.1f}MB, {} top level branches".format(
+			os.path.getsize(path) / 1e6, nTop))
+		print("{:>20} : {:6.2f} s".format("json.load + fromDict", serialTime))
+		print("{:>20} : {:6.2f} s".format("boundary scan", scanTime))
+		workers = 1
+		while workers <= (os.cpu_count() or 1):
+			with ProcessPoolExecutor(workers) as executor:
+				executor.submit(int).result() # start processes first
+				loaded, duration = timed(
+					lambda: Tree.loadParallel(path, executor, workers=workers))
+			assert loaded.serialise() == expected
+			del loaded
+			gc.collect()
+			print("{:>12} workers : {:6.2f} s  {:4.2f}x".format(
+				workers, duration, serialTime / duration))
+			workers *= 2
+	finally:
+		shutil.rmtree(folder)
+
+
+if __name__ == '__main__':
+	main(*[int(i) for i in sys.argv[1:]])
@@ -0,0 +1,75 @@
+""" pickling trees and sending them to worker processes,
+against sending serialise() dicts to be rebuilt with fromDict() """
+
+import gc, os, pickle, sys, time
+from concurrent.futures import ProcessPoolExecutor
+
+from tree.main import Tree
+from tree.bench.parallel import buildTree
+
+
+def timed(fn, repeat=3):
+	""" return result and best time of repeated calls """
+	best = None
+	for i in range(repeat):
+		start = time.perf_counter()
+		result = fn()
+		duration = time.perf_counter() - start
+		best = duration if best is None else min(best, duration)
+	return result, best
+
+
+def countTree(tree)->int:
+	return len(tree.allBranches())
+
+
+def countSerial(serial)->int:
+	return len(Tree.fromDict(serial).allBranches())
+
+
+def main(nTop=100, perTop=2000, bufferSize=1 << 24):
+	tree = buildTree(nTop, perTop)
+	nBranches = len(tree.allBranches())
+	gc.collect()
+	gc.disable()
+	protocol = pickle.HIGHEST_PROTOCOL
+	print("{} branches, pickle protocol {}".format(nBranches, protocol))
+
+	data, dumpTime = timed(lambda: pickle.dumps(tree, protocol))
+	_, loadTime = timed(lambda: pickle.loads(data))
+	serialData, serialDumpTime = timed(
+		lambda: pickle.dumps(tree.serialise(), protocol))
+	_, serialLoadTime = timed(
+		lambda: Tree.fromDict(pickle.loads(serialData)))
+	print("{:>24} : {:6.2f} s dump {:6.2f} s load {:7.1f} MB".format(
+		"pickle tree", dumpTime, loadTime, len(data) / 1e6))
+	print("{:>24} : {:6.2f} s dump {:6.2f} s load {:7.1f} MB".format(
+		"serialise + fromDict", serialDumpTime, serialLoadTime,
+		len(serialData) / 1e6))
+
+	with ProcessPoolExecutor(1) as executor:
+		executor.submit(int).result() # start process first
+		count, treeTime = timed(
+			lambda: executor.submit(countTree, tree).result())
+		assert count == nBranches
+		count, serialTime = timed(
+			lambda: executor.submit(countSerial, tree.serialise()).result())
+		assert count == nBranches
+	print("{:>24} : {:6.2f} s".format("send tree to worker", treeTime))
+	print("{:>24} : {:6.2f} s".format("send serialised", serialTime))
+
+	# one large buffer value, in band and out of band
+	tree = Tree("root")
+	tree("data").value = os.urandom(bufferSize)
+	data, inBandTime = timed(lambda: pickle.dumps(tree, protocol))
+	if protocol >= 5:
+		outData, outBandTime = timed(lambda: pickle.dumps(
+			tree, protocol, buffer_callback=lambda buffer : None))
+		print("{:>24} : {:6.4f} s {:7.1f} MB, out of band {:6.4f} s "
+		      "{:7.4f} MB".format(
+			"{}MB value".format(bufferSize >> 20), inBandTime,
+			len(data) / 1e6, outBandTime, len(outData) / 1e6))
+
+
+if __name__ == '__main__':
+	main(*[int(i) for i in sys.argv[1:]])
@@ -0,0 +1,82 @@
+""" name search on large trees, scanning against the name index
+
+the index is built by the first search - its build time is reported
+separately, along with the cost of keeping it in sync during edits
+"""
+
+import gc, sys, time
+from collections import deque
+
+from tree.main import Tree
+from tree.index import NameIndex
+
+
+def buildTree(nBranches, fanOut=8):
+	""" tree of uniquely named branches, with a few shared names """
+	root = Tree("root")
+	frontier = deque([root])
+	count = 1
+	while count < nBranches:
+		parent = frontier.popleft()
+		for i in range(fanOut):
+			name = "shared" if count % 1000 == 0 else "node{}".format(count)
+			frontier.append(parent(name))
+			count += 1
+			if count >= nBranches:
+				break
+	return root
+
+
+def timeSearches(root, queries, nRepeats=1):
+	start = time.perf_counter()
+	for i in range(nRepeats):
+		for path, mode in queries:
+			root.search(path, mode=mode)
+	return (time.perf_counter() - start) / (nRepeats * len(queries)) * 1e3
+
+
+def main(nBranches=1000000, nEdits=10000):
+	gc.disable()
+	start = time.perf_counter()
+	root = buildTree(nBranches)
+	print("{} branches built in {:.2f}s".format(
+		nBranches, time.perf_counter() - start))
+	queries = [("node12345", "exact"), ("shared", "exact"),
+	           ("node9999", "prefix"), ("77777", "substring")]
+
+	Tree.indexSearch = False
+	scan = timeSearches(root, queries)
+	Tree.indexSearch = True
+	start = time.perf_counter()
+	root.search("root", mode="exact")
+	build = time.perf_counter() - start
+	indexed = timeSearches(root, queries, 20)
+
+	for path, mode in queries:
+		print("  {:10} {:9} : {} results".format(
+			path, mode, len(root.search(path, mode=mode))))
+	print("scan      : {:9.3f} ms per search".format(scan))
+	print("index     : {:9.3f} ms per search, built in {:.2f}s".format(
+		indexed, build))
+	exact = timeSearches(root, queries[:2], 2000)
+	print("exact     : {:9.3f} ms per search".format(exact))
+
+	# renames keep index in sync - the first pass also clears
+	# cached locations, so is timed twice
+	branches = root.allBranches(includeSelf=False)[:nEdits]
+	root.removeObserver(root.observers()[0])
+	timings = []
+	for indexed in (False, False, True):
+		if indexed:
+			root.addObserver(NameIndex(root))
+		start = time.perf_counter()
+		for i, branch in enumerate(branches):
+			branch.name = "edited{}_{}".format(len(timings), i)
+		timings.append((time.perf_counter() - start) / nEdits * 1e6)
+	plain, edit = timings[1:]
+	print("rename    : {:9.2f} us indexed, {:.2f} us without".format(
+		edit, plain))
+
+
+if __name__ == '__main__':
+	main(*[int(i) for i in sys.argv[1:]])
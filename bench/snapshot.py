@@ -0,0 +1,35 @@
+""" cost of repeated snapshots after a few changes,
+against a full deep copy """
+
+import gc, random, sys, time
+
+from tree.bench.dump import buildTree
+
+
+def main(nBranches=200000, nChanges=10):
+	tree = buildTree(nBranches)
+	branches = tree.allBranches()
+	gc.disable()
+
+	start = time.perf_counter()
+	tree.clone()
+	print("{} branches".format(nBranches))
+	print("full clone           : {:8.4f} s".format(
+		time.perf_counter() - start))
+
+	start = time.perf_counter()
+	tree.snapshot()
+	print("first snapshot       : {:8.4f} s".format(
+		time.perf_counter() - start))
+
+	for i in range(3):
+		for branch in random.sample(branches, nChanges):
+			branch.value = i
+		start = time.perf_counter()
+		tree.snapshot()
+		print("snapshot, {} changes : {:8.4f} s".format(
+			nChanges, time.perf_counter() - start))
+
+
+if __name__ == '__main__':
+	main(*[int(i) for i in sys.argv[1:]])
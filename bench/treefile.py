@@ -0,0 +1,50 @@
+""" opening a large saved tree and reading one deep branch,
+binary tree file against json load and fromDict """
+
+import gc, json, os, sys, tempfile, time
+
+from tree.main import Tree
+from tree.treefile import writeTreeFile, openTree
+from tree.bench.dump import buildTree
+
+
+def timed(fn, *args):
+	start = time.perf_counter()
+	result = fn(*args)
+	return result, time.perf_counter() - start
+
+
+def main(nBranches=1000000):
+	gc.disable()
+	tree = buildTree(nBranches)
+	deepest = tree.allBranches()[-1]
+	address = deepest.stringAddress()
+	with tempfile.TemporaryDirectory() as folder:
+		jsonPath = os.path.join(folder, "tree.json")
+		binPath = os.path.join(folder, "tree.tree")
+		with open(jsonPath, "w") as f:
+			tree.dump(f)
+		_, write = timed(writeTreeFile, tree, binPath)
+		print("{} branches, json {:.1f}MB, tree file {:.1f}MB, "
+		      "written in {:.2f}s".format(
+			nBranches, os.path.getsize(jsonPath) / 1e6,
+			os.path.getsize(binPath) / 1e6, write))
+
+		def loadJson():
+			with open(jsonPath) as f:
+				return Tree.fromDict(json.load(f))
+		loaded, jsonOpen = timed(loadJson)
+		value, jsonRead = timed(lambda: loaded(address).value)
+
+		ref, binOpen = timed(openTree, binPath)
+		refValue, binRead = timed(lambda: ref(address).value)
+		assert refValue == value
+		print("json      : open {:9.3f} ms, deep read {:7.3f} ms".format(
+			jsonOpen * 1e3, jsonRead * 1e3))
+		print("tree file : open {:9.3f} ms, deep read {:7.3f} ms".format(
+			binOpen * 1e3, binRead * 1e3))
+		ref.close()
+
+
+if __name__ == '__main__':
+	main(*[int(i) for i in sys.argv[1:]])
@@ -0,0 +1,275 @@
+""" ordered map used to hold tree branches
+
+dict-like, keyed by branch name, but also supporting positional
+insertion, reordering, renaming in place and index lookup
+without rebuilding - needed for branches with huge numbers of children
+"""
+from __future__ import annotations
+
+from itertools import chain
+from collections.abc import Mapping, MutableMapping
+
+
+class BranchMap(MutableMapping):
+	"""ordered map of name : branch
+
+	values live in a plain dict, order is kept separately as a list
+	of blocks of names. Each block holds at most 2 * blockSize names,
+	so positional work inside a block is bounded.
+
+	Maps with a single block (most of them) need nothing else -
+	once a map splits, it also tracks which block each name lives in,
+	and a fenwick tree over block lengths, so that index lookup
+	and positional insert cost O(blockSize + log(nBlocks))
+	"""
+
+	# target number of names in each block
+	blockSize = 512
+
+	__slots__ = ("_map", "_blocks", "_blockOf", "_blockPos", "_fenwick")
+
+	def __init__(self, items=None):
+		self._map = {}
+		self._blocks = [[]]
+		# only built once map spans multiple blocks
+		self._blockOf = None # name : block list
+		self._blockPos = None # id(block) : block index
+		self._fenwick = None # fenwick tree of block lengths, 1-indexed
+		if items is not None:
+			if isinstance(items, Mapping):
+				items = items.items()
+			for k, v in items:
+				self[k] = v
+
+	def __getitem__(self, key):
+		return self._map[key]
+
+	def __setitem__(self, key, value):
+		""" existing keys keep their position """
+		if key in self._map:
+			self._map[key] = value
+			return
+		self.append(key, value)
+
+	def __delitem__(self, key):
+		self.pop(key)
+
+	def __contains__(self, key):
+		return key in self._map
+
+	def __len__(self):
+		return len(self._map)
+
+	def __iter__(self):
+		return chain.from_iterable(self._blocks)
+
+	def __reversed__(self):
+		for block in reversed(self._blocks):
+			for key in reversed(block):
+				yield key
+
+	def __eq__(self, other):
+		""" order-sensitive against other ordered maps, like OrderedDict """
+		if isinstance(other, BranchMap):
+			return len(self) == len(other) and \
+			       list(self.items()) == list(other.items())
+		return super(BranchMap, self).__eq__(other)
+
+	def __repr__(self):
+		return "{}({})".format(self.__class__.__name__, list(self.items()))
+
+	def get(self, key, default=None):
+		return self._map.get(key, default)
+
+	def pop(self, key, *default):
+		if key not in self._map:
+			if default:
+				return default[0]
+			raise KeyError(key)
+		block = self._blockFor(key)
+		block.remove(key)
+		if self._blockOf is not None:
+			del self._blockOf[key]
+			if block:
+				self._fenwickAdd(self._blockPos[id(block)], -1)
+			else:
+				del self._blocks[self._blockPos[id(block)]]
+				self._rebuildIndex()
+		return self._map.pop(key)
+
+	def clear(self):
+		self._map.clear()
+		self._blocks = [[]]
+		self._blockOf = self._blockPos = self._fenwick = None
+
+	def copy(self)->BranchMap:
+		new = self.__class__()
+		new._map = dict(self._map)
+		new._blocks = [list(i) for i in self._blocks]
+		if self._blockOf is not None:
+			new._rebuildIndex(rebuildBlockOf=True)
+		return new
+
+	def append(self, key, value):
+		""" add new key at end of map """
+		if key in self._map:
+			self.pop(key)
+		self._map[key] = value
+		block = self._blocks[-1]
+		if len(block) < self.blockSize or not block:
+			block.append(key)
+			if self._blockOf is not None:
+				self._blockOf[key] = block
+				self._fenwickAdd(len(self._blocks) - 1, 1)
+			return
+		# start new block
+		if self._blockOf is None:
+			self._blockOf = {}
+			for name in block:
+				self._blockOf[name] = block
+		block = [key]
+		self._blocks.append(block)
+		self._blockOf[key] = block
+		self._rebuildIndex()
+
+	def insert(self, index, key, value):
+		""" insert key at given position
+		indices past the end append, negative indices count from end """
+		if key in self._map:
+			self.pop(key)
+		length = len(self._map)
+		if index < 0:
+			index = max(0, length + index)
+		if index >= length:
+			self.append(key, value)
+			return
+		self._map[key] = value
+		blockIndex, offset = self._locate(index)
+		block = self._blocks[blockIndex]
+		block.insert(offset, key)
+		if self._blockOf is None:
+			if len(block) > 2 * self.blockSize:
+				self._blockOf = {}
+				for name in block:
+					self._blockOf[name] = block
+				self._split(blockIndex)
+			return
+		self._blockOf[key] = block
+		if len(block) > 2 * self.blockSize:
+			self._split(blockIndex)
+		else:
+			self._fenwickAdd(blockIndex, 1)
+
+	def index(self, key)->int:
+		""" return position of key in map """
+		if key not in self._map:
+			raise ValueError("{} is not in map".format(key))
+		if self._blockOf is None:
+			return self._blocks[0].index(key)
+		block = self._blockOf[key]
+		blockIndex = self._blockPos[id(block)]
+		return self._prefix(blockIndex) + block.index(key)
+
+	def keyAt(self, index):
+		""" return key at given position """
+		length = len(self._map)
+		if index < 0:
+			index += length
+		if not 0 <= index < length:
+			raise IndexError("map index {} out of range".format(index))
+		blockIndex, offset = self._locate(index)
+		return self._blocks[blockIndex][offset]
+
+	def valueAt(self, index):
+		return self._map[self.keyAt(index)]
+
+	def move(self, key, index):
+		""" move existing key to new position """
+		self.insert(index, key, self.pop(key))
+
+	def rename(self, oldKey, newKey):
+		""" replace oldKey with newKey, keeping its position and value """
+		if oldKey == newKey:
+			return
+		if newKey in self._map:
+			raise KeyError("key {} already in map".format(newKey))
+		block = self._blockFor(oldKey)
+		block[block.index(oldKey)] = newKey
+		self._map[newKey] = self._map.pop(oldKey)
+		if self._blockOf is not None:
+			self._blockOf[newKey] = self._blockOf.pop(oldKey)
+
+	def _blockFor(self, key)->list:
+		if self._blockOf is None:
+			return self._blocks[0]
+		return self._blockOf[key]
+
+	def _split(self, blockIndex):
+		""" split an oversized block in half """
+		block = self._blocks[blockIndex]
+		half = len(block) // 2
+		newBlock = block[half:]
+		del block[half:]
+		self._blocks.insert(blockIndex + 1, newBlock)
+		for name in newBlock:
+			self._blockOf[name] = newBlock
+		self._rebuildIndex()
+
+	def _rebuildIndex(self, rebuildBlockOf=False):
+		""" regenerate block positions and fenwick tree -
+		O(nBlocks), only needed when blocks are added or removed """
+		blocks = self._blocks
+		if not blocks:
+			blocks.append([])
+		if len(blocks) == 1 and not rebuildBlockOf:
+			# collapsed back to a single block
+			self._blockOf = self._blockPos = self._fenwick = None
+			return
+		if rebuildBlockOf:
+			self._blockOf = {}
+			for block in blocks:
+				for name in block:
+					self._blockOf[name] = block
+		self._blockPos = {id(block) : i for i, block in enumerate(blocks)}
+		n = len(blocks)
+		tree = [0] * (n + 1)
+		for i in range(1, n + 1):
+			tree[i] += len(blocks[i - 1])
+			parent = i + (i & -i)
+			if parent <= n:
+				tree[parent] += tree[i]
+		self._fenwick = tree
+
+	def _fenwickAdd(self, blockIndex, delta):
+		tree = self._fenwick
+		i = blockIndex + 1
+		n = len(tree)
+		while i < n:
+			tree[i] += delta
+			i += i & -i
+
+	def _prefix(self, blockIndex)->int:
+		""" number of keys in blocks before blockIndex """
+		tree = self._fenwick
+		total = 0
+		i = blockIndex
+		while i > 0:
+			total += tree[i]
+			i -= i & -i
+		return total
+
+	def _locate(self, index):
+		""" return (block index, offset in block) for key position """
+		if self._blockOf is None:
+			return 0, index
+		tree = self._fenwick
+		n = len(tree) - 1
+		pos = 0
+		step = 1 << (n.bit_length() - 1)
+		while step:
+			nextPos = pos + step
+			if nextPos <= n and tree[nextPos] <= index:
+				pos = nextPos
+				index -= tree[nextPos]
+			step >>= 1
+		return pos, index
@@ -0,0 +1,322 @@
+""" compact binary encoding of trees
+
+holds the same data as TreeBase.serialise(), without repeating
+string keys for every branch:
+	header - magic and codec version
+	string table - each distinct branch name, dict key and class name
+		once, referenced everywhere else by index
+	root data, then branches in pre-order - each as name reference,
+		flags, then any value, extras, class reference and child count
+
+integers are varints, values are tagged by type - None, bools, ints,
+floats, strings, bytes, lists, tuples and dicts are supported
+
+	data = encode(tree)
+	tree = decode(data)
+"""
+from __future__ import annotations
+
+import struct
+
+from tree.core import TreeBase
+from tree.lib import loadObjectClass, uniqueSign
+
+magic = b"TRB"
+codecVersion = 1
+
+# value type tags
+(NONE, FALSE, TRUE, INT, NEGINT, FLOAT, STR, BYTES,
+ LIST, TUPLE, DICT, STRDICT) = range(12)
+
+# branch flags
+HAS_VALUE, HAS_EXTRAS, HAS_CLASS = 1, 2, 4
+
+doubleStruct = struct.Struct("<d")
+
+
+def _varint(n:int, out:bytearray):
+	while n > 0x7F:
+		out.append((n & 0x7F) | 0x80)
+		n >>= 7
+	out.append(n)
+
+
+class BinaryEncoder(object):
+	""" encodes one tree - strings are numbered as they are first met,
+	and the table written ahead of the body once the tree is done """
+
+	def __init__(self):
+		self.strings = {}
+		self.body = bytearray()
+
+	def string(self, s:str)->int:
+		index = self.strings.get(s)
+		if index is None:
+			index = self.strings[s] = len(self.strings)
+		return index
+
+	def value(self, value):
+		out = self.body
+		t = type(value)
+		if value is None:
+			out.append(NONE)
+		elif t is bool:
+			out.append(TRUE if value else FALSE)
+		elif t is int:
+			if value >= 0:
+				out.append(INT)
+				_varint(value, out)
+			else:
+				out.append(NEGINT)
+				_varint(-value, out)
+		elif t is float:
+			out.append(FLOAT)
+			out += doubleStruct.pack(value)
+		elif t is str:
+			data = value.encode("utf-8")
+			out.append(STR)
+			_varint(len(data), out)
+			out += data
+		elif t is bytes:
+			out.append(BYTES)
+			_varint(len(value), out)
+			out += value
+		elif t is list or t is tuple:
+			out.append(LIST if t is list else TUPLE)
+			_varint(len(value), out)
+			for item in value:
+				self.value(item)
+		elif isinstance(value, dict):
+			if all(type(k) is str for k in value):
+				# keys go through the string table
+				out.append(STRDICT)
+				_varint(len(value), out)
+				for k, v in value.items():
+					_varint(self.string(k), out)
+					self.value(v)
+			else:
+				out.append(DICT)
+				_varint(len(value), out)
+				for k, v in value.items():
+					self.value(k)
+					self.value(v)
+		else:
+			# subclasses of supported types are saved as their base
+			for base in (int, float, str, bytes, list, tuple):
+				if isinstance(value, base):
+					self.value(base(value))
+					return
+			raise TypeError("cannot encode {} of type {}".format(
+				value, t.__name__))
+
+	def branch(self, branch:TreeBase, parentCls):
+		out = self.body
+		name = branch._name
+		_varint(0 if name is None else self.string(name) + 1, out)
+		value = branch.value
+		extras = branch._extras
+		cls = type(branch)
+		flags = (HAS_VALUE if value is not None else 0) | \
+		        (HAS_EXTRAS if extras else 0) | \
+		        (HAS_CLASS if cls is not parentCls else 0)
+		out.append(flags)
+		if value is not None:
+			self.value(value)
+		if extras:
+			self.value(dict(extras))
+		if cls is not parentCls:
+			# as lib.saveObjectClass()
+			_varint(self.string(uniqueSign.join(
+				[cls.__name__, cls.__module__])), out)
+		_varint(len(branch._readMap()), out)
+
+	def encode(self, tree:TreeBase)->bytes:
+		self.value(tree.rootData() or None)
+		# the root always records its class
+		self.branch(tree, None)
+		stack = [iter(tree._readMap().values())]
+		while stack:
+			branch = next(stack[-1], None)
+			if branch is None:
+				stack.pop()
+				continue
+			self.branch(branch, type(branch._parent))
+			if branch._childMap:
+				stack.append(iter(branch._childMap.values()))
+
+		head = bytearray(magic)
+		head.append(codecVersion)
+		_varint(len(self.strings), head)
+		for s in self.strings:
+			data = s.encode("utf-8")
+			_varint(len(data), head)
+			head += data
+		return bytes(head + self.body)
+
+
+def _readVarint(data:bytes, pos:int):
+	""" return (int, new position) """
+	byte = data[pos]
+	if byte < 0x80:
+		return byte, pos + 1
+	result, shift = byte & 0x7F, 7
+	pos += 1
+	while True:
+		byte = data[pos]
+		pos += 1
+		result |= (byte & 0x7F) << shift
+		if byte < 0x80:
+			return result, pos
+		shift += 7
+
+
+def _readValue(data:bytes, pos:int, strings:list):
+	""" return (value, new position)
+	single byte lengths are read inline - most are """
+	tag = data[pos]
+	pos += 1
+	if tag == STR:
+		length = data[pos]
+		if length < 0x80:
+			pos += 1
+		else:
+			length, pos = _readVarint(data, pos)
+		return data[pos:pos + length].decode("utf-8"), pos + length
+	if tag == INT:
+		n = data[pos]
+		if n < 0x80:
+			return n, pos + 1
+		return _readVarint(data, pos)
+	if tag == FLOAT:
+		return doubleStruct.unpack_from(data, pos)[0], pos + 8
+	if tag == LIST or tag == TUPLE:
+		length, pos = _readVarint(data, pos)
+		items = []
+		for i in range(length):
+			# short strings and small ints inline
+			itemTag = data[pos]
+			if itemTag == STR and data[pos + 1] < 0x80:
+				end = pos + 2 + data[pos + 1]
+				items.append(data[pos + 2:end].decode("utf-8"))
+				pos = end
+			elif itemTag == INT and data[pos + 1] < 0x80:
+				items.append(data[pos + 1])
+				pos += 2
+			else:
+				item, pos = _readValue(data, pos, strings)
+				items.append(item)
+		return (items if tag == LIST else tuple(items)), pos
+	if tag == NONE:
+		return None, pos
+	if tag == TRUE:
+		return True, pos
+	if tag == FALSE:
+		return False, pos
+	if tag == NEGINT:
+		n, pos = _readVarint(data, pos)
+		return -n, pos
+	if tag == STRDICT or tag == DICT:
+		length, pos = _readVarint(data, pos)
+		result = {}
+		for i in range(length):
+			if tag == STRDICT:
+				key, pos = _readVarint(data, pos)
+				key = strings[key]
+			else:
+				key, pos = _readValue(data, pos, strings)
+			result[key], pos = _readValue(data, pos, strings)
+		return result, pos
+	if tag == BYTES:
+		length, pos = _readVarint(data, pos)
+		return data[pos:pos + length], pos + length
+	raise ValueError("unknown value tag {} at {}".format(tag, pos - 1))
+
+
+class BinaryDecoder(object):
+	""" decodes one tree from bytes made by BinaryEncoder """
+
+	def __init__(self, data:bytes):
+		self.data = data if isinstance(data, bytes) else bytes(data)
+		self.classes = {}
+		self.strings = []
+
+	def _loadClass(self, objData, defaultCls)->type:
+		cls = self.classes.get(objData)
+		if cls is None:
+			cls = self.classes[objData] = \
+				loadObjectClass(objData) or defaultCls
+		return cls
+
+	def decode(self, defaultCls)->TreeBase:
+		data = self.data
+		if data[:len(magic)] != magic:
+			raise ValueError("data is not a binary tree")
+		version = data[len(magic)]
+		if version > codecVersion:
+			raise ValueError("binary tree version {} is newer than "
+			                 "supported {}".format(version, codecVersion))
+		pos = len(magic) + 1
+		strings = self.strings
+		nStrings, pos = _readVarint(data, pos)
+		for i in range(nStrings):
+			length, pos = _readVarint(data, pos)
+			strings.append(data[pos:pos + length].decode("utf-8"))
+			pos += length
+		rootData, pos = _readValue(data, pos, strings) # not used in loading
+
+		root = None
+		# stack of [parent, children left to read]
+		stack = []
+		while True:
+			if stack:
+				frame = stack[-1]
+				if not frame[1]:
+					stack.pop()
+					continue
+				frame[1] -= 1
+				parent = frame[0]
+				cls = type(parent)
+			elif root is None:
+				parent, cls = None, defaultCls
+			else:
+				return root
+			# read branch
+			nameRef, pos = _readVarint(data, pos)
+			flags = data[pos]
+			pos += 1
+			value = extras = None
+			if flags & HAS_VALUE:
+				value, pos = _readValue(data, pos, strings)
+			if flags & HAS_EXTRAS:
+				extras, pos = _readValue(data, pos, strings)
+			if flags & HAS_CLASS:
+				classRef, pos = _readVarint(data, pos)
+				cls = self._loadClass(strings[classRef], defaultCls)
+			nChildren, pos = _readVarint(data, pos)
+			branch = cls(name=strings[nameRef - 1] if nameRef else None,
+			             val=value)
+			branch._extras = extras
+
+			if parent is None:
+				root = branch
+			else:
+				# replace existing (default) branches declared in init
+				parent._writeMap()[branch._name] = branch
+				branch._parent = parent
+			if nChildren:
+				stack.append([branch, nChildren])
+
+
+def encode(tree:TreeBase)->bytes:
+	""" return compact binary encoding of tree """
+	return BinaryEncoder().encode(tree)
+
+
+def decode(data:bytes, cls=None)->TreeBase:
+	""" return new tree from encode() bytes
+	:param cls : default branch class, used only if saved
+	classes cannot be loaded """
+	if cls is None:
+		from tree.main import Tree
+		cls = Tree
+	return BinaryDecoder(data).decode(cls)
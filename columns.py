@@ -0,0 +1,150 @@
+""" columnar export of trees to numpy arrays, and back
+
+a tree becomes one row per branch, in pre-order - branches are
+described by the row index of their parent, so whole-tree questions
+become vectorised array operations:
+	cols = tree.toColumns()
+	numpy.bincount(cols["depth"]) # branches at each depth
+	subtreeSizes(cols) # branches below and including each row
+
+requires numpy, imported on first use
+"""
+from __future__ import annotations
+
+from tree.core import TreeBase
+
+# python types stored in a native value column,
+# if every value in the tree that is not None has the same one
+numericTypes = (bool, int, float)
+
+
+def toColumns(tree:TreeBase)->dict:
+	""" return dict of equal-length column arrays, one row per branch
+	in pre-order, built in one traversal:
+		parent : int64 row of parent, -1 for tree itself
+		depth : int32 depth below tree
+		name : int32 index into names, -1 for no name
+		names : object array of distinct names, in order of first use
+		value : native array if all values are numbers of one type,
+			masked where values are None - else object array
+		cls : int32 index into classes
+		classes : list of branch classes
+		extras : object array of extras dicts or None,
+			only present if any branch has extras
+	"""
+	import numpy as np
+	parents, depths, nameCodes, values, clsCodes, extras = (
+		[], [], [], [], [], [])
+	nameTable, clsTable = {}, {}
+	hasExtras = False
+	# stack of (branch iterator, parent row, depth)
+	stack = [(iter((tree,)), -1, 0)]
+	while stack:
+		branches, parentRow, depth = stack[-1]
+		branch = next(branches, None)
+		if branch is None:
+			stack.pop()
+			continue
+		row = len(parents)
+		parents.append(parentRow)
+		depths.append(depth)
+		name = branch._name
+		if name is None:
+			nameCodes.append(-1)
+		else:
+			nameCodes.append(nameTable.setdefault(name, len(nameTable)))
+		values.append(branch.value)
+		clsCodes.append(clsTable.setdefault(type(branch), len(clsTable)))
+		extras.append(branch._extras or None)
+		if branch._extras:
+			hasExtras = True
+		if branch._childMap:
+			stack.append((iter(branch._childMap.values()), row, depth + 1))
+
+	columns = {
+		"parent" : np.array(parents, dtype=np.int64),
+		"depth" : np.array(depths, dtype=np.int32),
+		"name" : np.array(nameCodes, dtype=np.int32),
+		"names" : _objectArray(list(nameTable)),
+		"value" : _valueArray(values),
+		"cls" : np.array(clsCodes, dtype=np.int32),
+		"classes" : list(clsTable),
+	}
+	if hasExtras:
+		columns["extras"] = _objectArray([dict(i) if i else None
+		                                  for i in extras])
+	return columns
+
+
+def _objectArray(items):
+	""" 1d object array, without numpy unpacking nested sequences """
+	import numpy as np
+	array = np.empty(len(items), dtype=object)
+	for i, item in enumerate(items):
+		array[i] = item
+	return array
+
+
+def _valueArray(values):
+	""" native array of values of one numeric type - None values are
+	masked, and read back as None by tolist() """
+	import numpy as np
+	types = set(map(type, values))
+	hasNone = type(None) in types
+	types.discard(type(None))
+	if len(types) == 1 and next(iter(types)) in numericTypes:
+		valueType = types.pop()
+		try:
+			if not hasNone:
+				return np.array(values)
+			return np.ma.masked_array(
+				[valueType() if i is None else i for i in values],
+				mask=[i is None for i in values])
+		except OverflowError: # ints too large for int64
+			pass
+	return _objectArray(values)
+
+
+def fromColumns(columns:dict, cls=None)->TreeBase:
+	""" rebuild tree from columns made by toColumns()
+	:param cls : branch class used if columns have no classes """
+	parents = columns["parent"].tolist()
+	nameCodes = columns["name"].tolist()
+	names = list(columns["names"])
+	values = columns["value"].tolist()
+	classes = columns.get("classes")
+	clsCodes = columns["cls"].tolist() if classes else None
+	extras = columns.get("extras")
+	if extras is not None:
+		extras = list(extras)
+	if not classes:
+		from tree.main import Tree
+		classes, clsCodes = [cls or Tree], None
+
+	branches = []
+	for row, parentRow in enumerate(parents):
+		branchCls = classes[clsCodes[row] if clsCodes else 0]
+		code = nameCodes[row]
+		branch = branchCls.__new__(branchCls)
+		TreeBase.__init__(branch, names[code] if code >= 0 else None,
+		                  values[row])
+		if extras is not None and extras[row]:
+			branch._extras = dict(extras[row])
+		if parentRow >= 0:
+			parent = branches[parentRow]
+			parent._writeMap()[branch._name] = branch
+			branch._parent = parent
+		branches.append(branch)
+	return branches[0] if branches else None
+
+
+def subtreeSizes(columns:dict):
+	""" return number of branches at and below each row,
+	one vectorised pass per tree level """
+	import numpy as np
+	parent, depth = columns["parent"], columns["depth"]
+	sizes = np.ones(len(parent), dtype=np.int64)
+	for level in range(int(depth.max(initial=0)), 0, -1):
+		rows = np.nonzero(depth == level)[0]
+		np.add.at(sizes, parent[rows], sizes[rows])
+	return sizes
@@ -2,15 +2,19 @@
 """ mutable tree data structure
  base functionality before any other modules """
 from __future__ import annotations
-from sys import version_info
 
 from tree.lib import incrementName, saveObjectClass, loadObjectClass, \
-	uniqueSign
+	isImmutable, instanceDict, InternPool
 
-import pprint, uuid
-from collections import OrderedDict
+import pickle, pprint, uuid
+from collections import OrderedDict, deque
+from copy import deepcopy
+from contextlib import contextmanager
 from enum import Enum
+from types import MappingProxyType
 from tree.signal import Signal
+from tree.branchmap import BranchMap
+from tree.dev.format import FormatManager
 from typing import List, Union
 from six import iteritems, string_types
 
@@ -33,6 +37,256 @@ from six import iteritems, string_types
 # parentToken = "^" # directs to the tree's parent
 # parentToken = .."
 
+# shared stand-in for branches with no children
+_emptyMap = MappingProxyType(OrderedDict())
+# passed to observers for extras keys that are not set
+_missing = object()
+
+# bytes and bytearray values at least this long are pickled as
+# out-of-band buffers under protocol 5 - see TreeBase.__reduce_ex__()
+pickleBufferSize = 1 << 16
+# flags of branch state in pickles
+(_pickleReadOnly, _pickleInactive, _pickleMuted,
+ _pickleBytes, _pickleByteArray) = 1, 2, 4, 8, 16
+
+
+def _treePositions(branches)->dict:
+	""" return { id(branch) : tuple of child indices from its root },
+	to sort branches into tree order - positions of shared
+	ancestors are found once """
+	positions = {}
+	for branch in branches:
+		chain = []
+		while branch is not None and id(branch) not in positions:
+			chain.append(branch)
+			branch = branch._parent
+		position = () if branch is None else positions[id(branch)]
+		for branch in reversed(chain):
+			parent = branch._parent
+			if parent is not None:
+				position = position + (
+					parent._readMap().index(branch._name),)
+			positions[id(branch)] = position
+	return positions
+
+
+def _customFormat(cls)->bool:
+	""" does branch class redefine serialise() or fromDict() """
+	return (cls.serialise is not TreeBase.serialise or
+	        cls.fromDict.__func__ is not TreeBase.fromDict.__func__)
+
+
+def _newBranch(cls):
+	""" uninitialised branch for unpickling - see TreeBase.__setstate__() """
+	return cls.__new__(cls)
+
+
+def _restoreBuffer(value, cls):
+	""" value of a PickleBuffer as cls - buffers pickled in band
+	arrive as cls already, those out of band as whatever was passed
+	to pickle.loads() """
+	return value if type(value) is cls else cls(value)
+
+
+class TreeBatch(object):
+	""" collects signals fired in a tree during TreeBase.batch(),
+	to emit them once when the batch ends
+
+	consolidated signals receive lists in place of each of their
+	usual arguments - eg valueChanged(branches, oldValue=[...],
+	newValue=[...]) - in the order changes were first made.
+	Repeated value or name changes to one branch are merged,
+	keeping the first old and last new value
+	"""
+
+	# signals whose repeated changes to one branch can be merged
+	mergeKeys = ("_valueChanged", "_nameChanged")
+
+	def __init__(self, root):
+		self.root = root
+		self.depth = 0 # nesting level of batch() blocks
+		# signal key : { (emitter, branch) : [args, kwargs] } or list
+		self.events = {}
+
+	def record(self, emitter, key, args, kwargs):
+		if key in self.mergeKeys:
+			entries = self.events.setdefault(key, OrderedDict())
+			entryKey = (id(emitter), id(args[0]))
+			if entryKey in entries:
+				# keep first old value, take latest new value
+				oldArgs, oldKwargs = entries[entryKey][1:]
+				args = oldArgs[:-1] + args[-1:] if len(args) > 2 else args
+				if "newValue" in kwargs:
+					oldKwargs = dict(oldKwargs, newValue=kwargs["newValue"])
+				kwargs = oldKwargs
+			entries[entryKey] = (emitter, args, kwargs)
+		else:
+			self.events.setdefault(key, []).append((emitter, args, kwargs))
+
+	@staticmethod
+	def _consolidate(entries):
+		""" turn list of (args, kwargs) into single args, kwargs of lists """
+		args = [list(i) for i in zip(*[i[0] for i in entries])]
+		kwargs = {}
+		for entryArgs, entryKwargs in entries:
+			for k, v in entryKwargs.items():
+				kwargs.setdefault(k, []).append(v)
+		return args, kwargs
+
+	def emit(self):
+		""" fire one consolidated signal per emitting branch,
+		then one on the root """
+		for key, entries in self.events.items():
+			if isinstance(entries, OrderedDict):
+				entries = list(entries.values())
+			byEmitter = OrderedDict()
+			for emitter, args, kwargs in entries:
+				byEmitter.setdefault(id(emitter), (emitter, []))[1].append(
+					(args, kwargs))
+			for emitter, emitterEntries in byEmitter.values():
+				signal = getattr(emitter, key)
+				if signal is not None and emitter is not self.root:
+					args, kwargs = self._consolidate(emitterEntries)
+					signal(*args, **kwargs)
+			signal = getattr(self.root, key)
+			if signal is not None:
+				args, kwargs = self._consolidate(
+					[(args, kwargs) for emitter, args, kwargs in entries])
+				signal(*args, **kwargs)
+		self.events = {}
+
+
+def _matchName(path, name, mode):
+	if mode == "substring":
+		return path in name
+	if mode == "prefix":
+		return name.startswith(path)
+	if mode == "exact":
+		return name == path
+	raise ValueError("unknown search mode {}".format(mode))
+
+
+class TreeObserver(object):
+	""" base for objects kept in sync with a whole tree -
+	indexes, journals etc
+
+	observers are held on the root, and told of every change directly
+	from the method making it - unlike signals they are never muted,
+	batched or deferred, so derived state is never stale.
+	Methods are no-ops here, override the ones needed
+	"""
+
+	def branchAdded(self, branch):
+		""" branch and everything below it were added to the tree """
+		pass
+
+	def branchRemoved(self, branch, parent):
+		""" branch and everything below it were removed from parent """
+		pass
+
+	def branchRenamed(self, branch, oldName, newName):
+		pass
+
+	def branchReordered(self, branch, oldIndex, newIndex):
+		""" branch moved to newIndex among its parent's branches """
+		pass
+
+	def checkValue(self, branch, value):
+		""" called before branch's value is changed - raise to refuse
+		the value, leaving the branch as it was """
+		pass
+
+	def valueChanged(self, branch, oldValue, newValue):
+		pass
+
+	def valueRetyped(self, branch, oldValue, newValue):
+		""" value replaced by an equal value of another type,
+		as 1 by True - valueChanged is not sent for these """
+		pass
+
+	def extrasChanged(self, branch, key, oldValue, newValue):
+		""" values for keys not set are passed as core._missing """
+		pass
+
+	def attributeChanged(self, branch, attr, oldValue, newValue):
+		""" branch's readOnly or active attribute changed """
+		pass
+
+	def detach(self):
+		""" called when the observed root is parented under another
+		tree - the observer is dropped and gets no further events """
+		pass
+
+
+class TreeExtras(dict):
+	""" dict held as a branch's extras, reporting each change
+	to the branch - plain dicts are converted on first access
+	through TreeBase.extras
+
+	copies and pickles are plain dicts
+	"""
+
+	__slots__ = ("_branch",)
+
+	def __init__(self, branch, *args, **kwargs):
+		super(TreeExtras, self).__init__(*args, **kwargs)
+		self._branch = branch
+
+	def _changed(self, key, oldValue, newValue):
+		if oldValue is newValue:
+			return
+		branch = self._branch
+		branch._markDirty()
+		branch._notify("extrasChanged", branch, key, oldValue, newValue)
+
+	def __setitem__(self, key, value):
+		oldValue = self.get(key, _missing)
+		super(TreeExtras, self).__setitem__(key, value)
+		self._changed(key, oldValue, value)
+
+	def __delitem__(self, key):
+		oldValue = self[key]
+		super(TreeExtras, self).__delitem__(key)
+		self._changed(key, oldValue, _missing)
+
+	def pop(self, key, *default):
+		if key not in self:
+			return super(TreeExtras, self).pop(key, *default)
+		oldValue = super(TreeExtras, self).pop(key)
+		self._changed(key, oldValue, _missing)
+		return oldValue
+
+	def popitem(self):
+		key, oldValue = super(TreeExtras, self).popitem()
+		self._changed(key, oldValue, _missing)
+		return key, oldValue
+
+	def setdefault(self, key, default=None):
+		if key not in self:
+			self[key] = default
+		return self[key]
+
+	def update(self, *args, **kwargs):
+		for key, value in dict(*args, **kwargs).items():
+			self[key] = value
+
+	def clear(self):
+		while self:
+			self.popitem()
+
+	def copy(self)->dict:
+		return dict(self)
+
+	def __copy__(self)->dict:
+		return dict(self)
+
+	def __deepcopy__(self, memo)->dict:
+		return deepcopy(dict(self), memo)
+
+	def __reduce__(self):
+		return dict, (dict(self),)
+
+
 class TreeBase(object):
 	"""fractal tree-like data structure
 	each branch having both name and value
@@ -61,6 +315,20 @@ class TreeBase(object):
 	# keys in extras that play important roles
 	extraKeys = ("default", "readOnly", "active", "breakpoint")
 
+	# max number of resolved addresses cached on each root,
+	# 0 disables caching
+	lookupCacheSize = 4096
+
+	# build a name index on the root at first search() -
+	# see tree.index.NameIndex
+	indexSearch = True
+
+	# serialised formats by version - serialise() writes version 0
+	# unless asked, fromDict() loads any version
+	formatManager = FormatManager(
+		versionReadKey=lambda data: data.get("?FORMAT_VERSION", 0),
+		versionWriteKey="?FORMAT_VERSION")
+
 	# kwargs that may be passed with lookup
 	lookupKwargs = {
 		"create" : True, # should branch be created if not found
@@ -68,6 +336,20 @@ class TreeBase(object):
 		"case": True,  # should lookup respect casing
 	}
 
+	# slots keep per-branch overhead down on very large trees -
+	# branch map, extras, overrides and signals are only allocated
+	# on first use.
+	# __dict__ is kept so instances and subclasses may still
+	# set arbitrary attributes - it too is only created when used
+	__slots__ = ("_name", "_uuid", "_parent", "_value",
+	             "_childMap", "_extras", "_overrides",
+	             "_location", "_lookupCache", "_batch", "_frozen", "_encoded",
+	             "_observers", "_internPool",
+	             "_signalsActive",
+	             "_valueChanged", "_nameChanged", "_structureChanged",
+	             "_readOnly", "_active",
+	             "__dict__", "__weakref__")
+
 	def __init__(self, name=None, val=None,
 	             branches=None, # will be added in future
 	             ):
@@ -76,27 +358,39 @@ class TreeBase(object):
 		self._parent = None
 		self._value = val
 
-		self._branchMap = OrderedDict()
-		self.extras = {}
-		self.overrides = {}
-
-		# signals - on branch changing, all parent branch signals
-		# will be activated
+		# created on demand - see _writeMap(), extras, overrides
+		self._childMap = None
+		self._extras = None
+		self._overrides = None
+
+		# cached (root, depth, address tuple) - see _getLocation()
+		self._location = None
+		# address : branch LRU cache, only used on roots
+		self._lookupCache = None
+		# active TreeBatch, only used on roots
+		self._batch = None
+		# list of TreeObservers, only used on roots
+		self._observers = None
+		# InternPool for names and values, only used on roots
+		self._internPool = None
+		# FrozenTree of this branch from the last snapshot(),
+		# cleared by _markDirty()
+		self._frozen = None
+		# text of this branch from the last incremental save,
+		# cleared by _markDirty() - see stream.IncrementalJsonWriter
+		self._encoded = None
+
+		# signals - on branch changing, this branch's signals
+		# and those of its root will be activated
+		# signal objects are created on first access
 		self._signalsActive = True
-		# valueChanged signature: branch, oldValue, newValue
-		self.valueChanged = Signal()
-		# nameChanged signature: branch, oldName, newName
-		self.nameChanged = Signal()
-		# structureChanged signature: branch, parent, event code
-		self.structureChanged = Signal()
-
-		self.signals = (self.valueChanged,
-		                self.nameChanged,
-		                self.structureChanged)
+		self._valueChanged = None
+		self._nameChanged = None
+		self._structureChanged = None
 
 		# read-only attr
-		self.readOnly = False
-		self.active = True
+		self._readOnly = False
+		self._active = True
 
 	@classmethod
 	def _defaultCls(cls):
@@ -119,6 +413,87 @@ class TreeBase(object):
 			self._uuid = uuid.uuid4()
 		return self._uuid
 
+	@property
+	def extras(self)->TreeExtras:
+		"""unordered dict of auxiliary information"""
+		if self._extras is None:
+			self._extras = TreeExtras(self)
+		elif type(self._extras) is not TreeExtras \
+				or self._extras._branch is not self:
+			# plain dict from loading or copying
+			self._extras = TreeExtras(self, self._extras)
+		return self._extras
+	@extras.setter
+	def extras(self, val):
+		""" contents of val are copied """
+		val = val or {}
+		extras = self.extras
+		for key in [i for i in extras if i not in val]:
+			del extras[key]
+		extras.update(val)
+
+	@property
+	def readOnly(self)->bool:
+		return self._readOnly
+	@readOnly.setter
+	def readOnly(self, val):
+		oldVal = self._readOnly
+		self._readOnly = val
+		if oldVal != val:
+			self._notify("attributeChanged", self, "readOnly", oldVal, val)
+
+	@property
+	def active(self)->bool:
+		return self._active
+	@active.setter
+	def active(self, val):
+		oldVal = self._active
+		self._active = val
+		if oldVal != val:
+			self._notify("attributeChanged", self, "active", oldVal, val)
+
+	@property
+	def overrides(self)->dict:
+		if self._overrides is None:
+			self._overrides = {}
+		return self._overrides
+	@overrides.setter
+	def overrides(self, val):
+		self._overrides = val
+
+	# valueChanged signature: branch, oldValue, newValue
+	@property
+	def valueChanged(self)->Signal:
+		if self._valueChanged is None:
+			self._valueChanged = Signal()
+			if not self._signalsActive:
+				self._valueChanged.mute()
+		return self._valueChanged
+
+	# nameChanged signature: branch, oldName, newName
+	@property
+	def nameChanged(self)->Signal:
+		if self._nameChanged is None:
+			self._nameChanged = Signal()
+			if not self._signalsActive:
+				self._nameChanged.mute()
+		return self._nameChanged
+
+	# structureChanged signature: branch, parent, event code
+	@property
+	def structureChanged(self)->Signal:
+		if self._structureChanged is None:
+			self._structureChanged = Signal()
+			if not self._signalsActive:
+				self._structureChanged.mute()
+		return self._structureChanged
+
+	@property
+	def signals(self):
+		return (self.valueChanged,
+		        self.nameChanged,
+		        self.structureChanged)
+
 	@property
 	def parent(self)->TreeBase:
 		""":rtype AbstractTree"""
@@ -139,42 +514,170 @@ class TreeBase(object):
 		"""returns root tree object
 		consider possibly denoting arbitrary points in tree as breakpoints,
 		roots only to branches under them """
-		return self.parent.root if self.parent else self
+		return self._getLocation()[0]
+
+	@property
+	def depth(self)->int:
+		"""number of parents above this branch - root has depth 0"""
+		return self._getLocation()[1]
 
 	@property
 	def leaves(self)->List[TreeBase]:
 		"""returns branches under this branch
 		which do not have branches of their own"""
-		return [i for i in self.allBranches(False) if not i.branches]
+		return [i for i in self.iterAllBranches(False) if not i._readMap()]
 
 	@property
-	def address(self)->str:
-		return self._address()
+	def address(self)->List[str]:
+		return list(self._getLocation()[2])
 
 	@property
 	def default(self):
-		return self.extras.get("default")
+		if self._extras is None:
+			return None
+		return self._extras.get("default")
 	@default.setter
 	def default(self, val):
 		self.extras["default"] = val
 
 	@property
 	def value(self):
-		if self._value is None and "default" in self.extras:
-			self._value = self.extras["default"]
+		if self._value is None and self._extras \
+				and "default" in self._extras:
+			self._value = self._extras["default"]
 		return self._value
 	@value.setter
 	def value(self, val):
 		oldVal = self._value
+		if oldVal is val:
+			return
+		changed = oldVal != val
+		if changed or type(oldVal) is not type(val):
+			self._notify("checkValue", self, val)
 		self._value = val
-		if oldVal != val:
-			self.valueChanged(self, oldValue=oldVal, newValue=val)
+		if changed:
+			self._markDirty()
+			self._notify("valueChanged", self, oldVal, val)
+			self._emitSignal("_valueChanged",
+			                 self, oldValue=oldVal, newValue=val)
+		elif type(oldVal) is not type(val):
+			# 1, True and 1.0 are equal, but save, snapshot and
+			# journal differently - no signal, caches still go stale
+			self._markDirty()
+			self._notify("valueRetyped", self, oldVal, val)
 
 	@property
 	def branches(self)->List[TreeBase]:
 		"""more explicit that it returns the child tree objects
 		:rtype list( AbstractTree )"""
-		return list(self._branchMap.values())
+		return list(self._readMap().values())
+
+	def _readMap(self):
+		""" return child map for lookups - never allocates,
+		empty branches share a single immutable map """
+		if self._childMap is None:
+			return _emptyMap
+		return self._childMap
+
+	def _writeMap(self)->BranchMap:
+		""" return child map for modification,
+		creating it if necessary """
+		if self._childMap is None:
+			self._childMap = BranchMap()
+		return self._childMap
+
+	@property
+	def _branchMap(self)->BranchMap:
+		""" retained for compatibility - prefer _readMap()
+		and _writeMap() internally """
+		return self._writeMap()
+	@_branchMap.setter
+	def _branchMap(self, val):
+		self._childMap = val
+
+	def _emitSignal(self, key, *args, **kwargs):
+		""" fire the given signal slot on this branch, then on its root
+		signals that have never been accessed have no listeners,
+		and are skipped
+		:param key : slot name of signal, eg "_valueChanged" """
+		if not self._signalsActive:
+			return
+		root = self.root
+		if root._batch is not None:
+			root._batch.record(self, key, args, kwargs)
+			return
+		signal = getattr(self, key)
+		if signal is not None:
+			signal(*args, **kwargs)
+		if root is not self:
+			signal = getattr(root, key)
+			if signal is not None:
+				signal(*args, **kwargs)
+
+	@contextmanager
+	def batch(self):
+		""" context manager to coalesce signals across many edits
+		with tree.batch():
+			for branch in tree.allBranches():
+				branch.value = 0
+		listeners run once when the outermost block exits,
+		see TreeBatch for the consolidated signal arguments
+		"""
+		root = self.root
+		batch = root._batch
+		if batch is None:
+			batch = root._batch = TreeBatch(root)
+		batch.depth += 1
+		try:
+			yield batch
+		finally:
+			batch.depth -= 1
+			if not batch.depth:
+				root._batch = None
+				batch.emit()
+
+	def addObserver(self, observer:TreeObserver):
+		""" keep observer in sync with this branch's whole tree """
+		root = self.root
+		if root._observers is None:
+			root._observers = []
+		root._observers.append(observer)
+		return observer
+
+	def removeObserver(self, observer:TreeObserver):
+		root = self.root
+		if root._observers and observer in root._observers:
+			root._observers.remove(observer)
+			if not root._observers:
+				root._observers = None
+
+	def observers(self)->List[TreeObserver]:
+		return list(self.root._observers or ())
+
+	@property
+	def internPool(self)->Union[InternPool, None]:
+		""" pool shared by this branch's whole tree, if any """
+		return self.root._internPool
+
+	def setInternPool(self, pool=True)->Union[InternPool, None]:
+		""" share single instances of equal names, and of equal
+		immutable values when loading, across this whole tree -
+		saves memory when the same few names and values repeat
+		across many branches
+		:param pool : InternPool, True to create one,
+		or None to stop interning """
+		if pool is True:
+			pool = InternPool()
+		self.root._internPool = pool
+		return pool
+
+	def _notify(self, event, *args):
+		""" call given TreeObserver method on all observers
+		of this branch's root """
+		observers = self.root._observers
+		if observers:
+			for observer in tuple(observers):
+				getattr(observer, event)(*args)
 
 	def debug(self, info):
 		if self.debugOn:
@@ -216,34 +719,101 @@ class TreeBase(object):
 		self.debug(("args", address))
 		if not address:
 			return self
-		address = self._parseAddressTokens(address)
-
-		# all input coerced to list
-		first = str(address.pop(0))
-		if first == self.parentToken: # aka unix ../
-			return self.parent(address)
-		if not first in self._branchMap: # add it if doesn't exist
-			if self.readOnly:
+		key = self._lookupKey(address[0] if len(address) == 1 else address)
+		branch = self._cachedLookup(key)
+		if branch is not None:
+			return branch
+		branch = self._resolve(self._parseAddressTokens(address),
+		                       create=True, **kwargs)
+		self._cacheLookup(key, branch)
+		return branch
+
+	def _resolve(self, tokens, create=True, **kwargs)->Union[TreeBase, None]:
+		""" walk address tokens from this branch, without recursion
+		if create, missing branches are added, and looking up the parent
+		of a root raises - otherwise None is returned for either
+		:type tokens : list """
+		branch = self
+		pool = None
+		for token in tokens:
+			token = str(token)
+			if token == branch.parentToken: # aka unix ../
+				if branch._parent is None:
+					if not create:
+						return None
+					raise RuntimeError("tree {} has no parent to "
+					                   "look up".format(branch))
+				branch = branch._parent
+				continue
+			found = branch._readMap().get(token)
+			if found is not None: # branch name might be altered
+				branch = found
+				self.debug(("found branch", branch))
+				continue
+			if not create:
+				return None
+			if pool is None: # False once root is known to have none
+				pool = branch.root._internPool
+				if pool is None:
+					pool = False
+			if pool is not False:
+				token = pool.name(token)
+			# add it if doesn't exist
+			if branch.readOnly:
 				raise RuntimeError( "readOnly tree {} accessed improperly - \n"
-									"no address {}".format(self, first))
+									"no address {}".format(branch, token))
 			# check if branch should inherit directly, or
 			# remain basic tree object
-			if self.branchesInherit:
-				obj = self.__class__(first, None)
+			if branch.branchesInherit:
+				obj = branch.__class__(token, None)
 			else:
-				obj = self._defaultCls()(first, None)
+				obj = branch._defaultCls()(token, None)
 			# set extras from given keys -
-			for key in self.extraKeys:
+			for key in branch.extraKeys:
 				if key in kwargs.get("extras", []):
 					obj.extras[key] = kwargs[key]
 			self.debug(("added obj", obj))
-			branch = self.addChild(obj)
+			branch = branch.addChild(obj)
+		return branch
 
-		else: # branch name might be altered
-			branch = self._branchMap[first]
-			self.debug(("found branch", branch))
+	@staticmethod
+	def _lookupKey(address):
+		""" return hashable cache key for raw address,
+		or None if it can't be cached """
+		if isinstance(address, list):
+			address = tuple(address)
+		try:
+			hash(address)
+		except TypeError:
+			return None
+		return address
 
-		return branch(*address, **kwargs)
+	def _cachedLookup(self, key)->Union[TreeBase, None]:
+		""" return branch previously resolved from this branch
+		by address key, or None """
+		if key is None:
+			return None
+		cache = self.root._lookupCache
+		if not cache:
+			return None
+		cacheKey = (id(self), key)
+		branch = cache.get(cacheKey)
+		if branch is not None:
+			cache.move_to_end(cacheKey)
+		return branch
+
+	def _cacheLookup(self, key, branch):
+		""" record resolved branch in root's lookup cache,
+		discarding least recently used entries past lookupCacheSize """
+		if key is None or branch is None or not self.lookupCacheSize:
+			return
+		root = self.root
+		cache = root._lookupCache
+		if cache is None:
+			cache = root._lookupCache = OrderedDict()
+		cache[(id(self), key)] = branch
+		if len(cache) > self.lookupCacheSize:
+			cache.popitem(last=False)
 
 	def __getitem__(self, address, **kwargs):
 		""" returns direct value of lookup branch
@@ -265,16 +835,159 @@ class TreeBase(object):
 		tree = self.__class__(self.name)
 		if self.value is not None:
 			tree.value = type(self.value)(self.value)
-		tree._branchMap = OrderedDict(self._branchMap)
+		if self._childMap:
+			tree._childMap = self._childMap.copy()
 		return tree
 
-	def __deepcopy__(self)->TreeBase:
+	def __deepcopy__(self, memo=None)->TreeBase:
 		""":returns Tree"""
-		return self.fromDict(self.serialise())
+		return self.clone(memo)
+
+	def clone(self, memo=None, shareImmutable=False)->TreeBase:
+		""" return deep copy of this branch and everything below it,
+		as a new root
+		branches are copied directly, without serialising, and keep
+		their class, order and any instance attributes - subclass
+		__init__ is not run again
+
+		:param memo : deepcopy memo dict, shared across values so that
+			objects referenced by several branches stay shared in the copy
+		:param shareImmutable : reuse immutable values (str, numbers,
+			tuples of them etc) rather than passing them to deepcopy
+		"""
+		memo = {} if memo is None else memo
+		if id(self) in memo:
+			return memo[id(self)]
+		new = self._cloneBranch(memo, shareImmutable)
+		stack = [(new, iter(self._readMap().values()))]
+		while stack:
+			parent, branches = stack[-1]
+			branch = next(branches, None)
+			if branch is None:
+				stack.pop()
+				continue
+			newBranch = branch._cloneBranch(memo, shareImmutable)
+			parent._writeMap().append(newBranch._name, newBranch)
+			newBranch._parent = parent
+			if branch._childMap:
+				stack.append((newBranch, iter(branch._childMap.values())))
+		return new
+
+	def _cloneBranch(self, memo, shareImmutable=False)->TreeBase:
+		""" copy this branch alone, unparented and without children """
+		cls = self.__class__
+		new = cls.__new__(cls)
+		memo[id(self)] = new
+		if shareImmutable and isImmutable(self._value):
+			value = self._value
+		else:
+			value = deepcopy(self._value, memo)
+		TreeBase.__init__(new, self._name, value)
+		if self._extras:
+			new._extras = deepcopy(self._extras, memo)
+		if self._overrides:
+			new._overrides = deepcopy(self._overrides, memo)
+		new._readOnly = self._readOnly
+		new._active = self._active
+		new._signalsActive = self._signalsActive
+		# instance attributes, found without allocating a __dict__
+		# on branches that have none
+		attrs = instanceDict(self)
+		if attrs:
+			new.__dict__.update(deepcopy(attrs, memo))
+		return new
+
+	def __reduce_ex__(self, protocol):
+		""" pickle this branch and everything below it as flat lists,
+		so deep trees need no recursion - see __setstate__()
+		values come first, so keys and strings they share are
+		referenced by short memo indices
+		as with clone(), the unpickled branch is a new root, and signals,
+		observers and intern pools are not kept.
+		under protocol 5, large bytes values are given as PickleBuffers,
+		to be passed out of band """
+		names, values, counts = [], [], []
+		# branch index : (class index, extras, overrides, flags, attrs)
+		extended = {}
+		classes = {}
+		stack = [iter((self,))]
+		while stack:
+			branch = next(stack[-1], None)
+			if branch is None:
+				stack.pop()
+				continue
+			children = branch._readMap()
+			value = branch._value
+			flags = (_pickleReadOnly if branch._readOnly else 0) | \
+			        (_pickleInactive if not branch._active else 0) | \
+			        (_pickleMuted if not branch._signalsActive else 0)
+			if protocol >= 5 and type(value) in (bytes, bytearray) \
+					and len(value) >= pickleBufferSize:
+				flags |= _pickleBytes if type(value) is bytes \
+					else _pickleByteArray
+				value = pickle.PickleBuffer(value)
+			cls = type(branch)
+			if branch is self or cls is type(branch._parent):
+				classIndex = None
+			else:
+				classIndex = classes.setdefault(cls, len(classes))
+			attrs = instanceDict(branch)
+			if (classIndex is not None or flags or branch._extras
+					or branch._overrides or attrs):
+				extended[len(names)] = (
+					classIndex,
+					dict(branch._extras) if branch._extras else None,
+					branch._overrides or None, flags, attrs)
+			names.append(branch._name)
+			values.append(value)
+			counts.append(len(children))
+			if children:
+				stack.append(iter(children.values()))
+		return (_newBranch, (type(self),),
+		        (values, names, counts, extended, list(classes)))
+
+	def __setstate__(self, state):
+		""" rebuild branches from __reduce_ex__() state -
+		subclass __init__ is not run, as in clone() """
+		values, names, counts, extended, classes = state
+		# stack of [parent, children left to build]
+		stack = []
+		for i, name in enumerate(names):
+			data = extended.get(i)
+			if i:
+				while not stack[-1][1]:
+					stack.pop()
+				frame = stack[-1]
+				frame[1] -= 1
+				parent = frame[0]
+				cls = type(parent) if data is None or data[0] is None \
+					else classes[data[0]]
+				branch = cls.__new__(cls)
+			else:
+				parent, branch = None, self
+			TreeBase.__init__(branch, name, values[i])
+			if data is not None:
+				classIndex, extras, overrides, flags, attrs = data
+				branch._extras = extras
+				branch._overrides = overrides
+				branch._readOnly = bool(flags & _pickleReadOnly)
+				branch._active = not flags & _pickleInactive
+				branch._signalsActive = not flags & _pickleMuted
+				if flags & _pickleBytes:
+					branch._value = _restoreBuffer(branch._value, bytes)
+				elif flags & _pickleByteArray:
+					branch._value = _restoreBuffer(branch._value, bytearray)
+				if attrs:
+					branch.__dict__.update(attrs)
+			if parent is not None:
+				parent._writeMap().append(branch._name, branch)
+				branch._parent = parent
+			if counts[i]:
+				stack.append([branch, counts[i]])
 
 	def __iter__(self):
 		"""iterate over branches"""
-		return self._branchMap.values().__iter__()
+		return self._readMap().values().__iter__()
 
 	def __contains__(self, item):
 		""" I found strict 'is' check more often useful
@@ -288,7 +1001,7 @@ class TreeBase(object):
 		for exact comparison use 'is' """
 		if isinstance(other, TreeBase):
 			return self.isEquivalent(other)
-		return NotImplementedError
+		return NotImplemented
 
 	def __lt__(self, other):
 		if not isinstance(other, TreeBase):
@@ -300,77 +1013,89 @@ class TreeBase(object):
 	def __hash__(self):
 		""" hash is unique per object """
 		return hash(self.uuid)
-	
-	def __del__(self):
-		super(TreeBase, self).__del__()
 
+	def _existingSignals(self):
+		""" return only signal objects already created """
+		return [i for i in (self._valueChanged,
+		                    self._nameChanged,
+		                    self._structureChanged) if i is not None]
 
 	def activateSignals(self):
 		self._signalsActive = True
-		for i in self.signals:
+		for i in self._existingSignals():
 			i.activate()
 	def muteSignals(self):
 		self._signalsActive = False
-		for i in self.signals:
+		for i in self._existingSignals():
 			i.mute()
 
 	def _setParent(self, parent):
 		"""sets new abstractTree to be parent"""
+		"""signals are no longer connected from child to root here -
+		_emitSignal() looks up the current root when a signal fires,
+		so branches need no signal objects of their own, and stay
+		correct when moved between trees
+		"""
+		# any cached lookups through this branch are now stale
+		if self._parent is not None:
+			self._parent.root._lookupCache = None
+		self._lookupCache = None
+		# saved text depends on the parent's class
+		self._encoded = None
 		self._parent = parent
-		if parent: # setting to none can happen
-			"""EITHER we literally supplant the signal of the child 
-			branch with that of the parent,
-			OR connect signals to parents (current method)
-			
-			this is the most flexible, but every signal is a new frame,
-			so stack traces may get c r a z y
-			"""
-			for i in self.signals:
-				i.clear()
-			self.valueChanged.connect(parent.root.valueChanged)
-			self.structureChanged.connect(parent.root.structureChanged)
-			self.nameChanged.connect(parent.root.nameChanged)
+		self._invalidateLocation()
+		if parent is not None:
+			parent.root._lookupCache = None
+			# no longer a root - observers of this tree are dropped
+			if self._observers:
+				for observer in self._observers:
+					observer.detach()
+				self._observers = None
 
 	def addChild(self, branch, index=None, force=False):
 		if branch in self: # same object
 			print("cannot add existing branch, named " + branch.name)
 			return branch
+		if branch._parent is not None: # moving from elsewhere
+			branch.remove()
 		if not force: # increment name until valid name found
 			while branch.name in self.keys():
 				branch._setName(incrementName(
 					branch.name, self.keys()))
 
+		branchMap = self._writeMap()
+		replaced = branchMap.get(branch.name)
+		if replaced is not None: # forced over existing branch
+			replaced.remove()
 		if index is None:
-			self._branchMap[branch.name] = branch
-		else: # more complex ordered dict management
-			newMap = OrderedDict()
-			oldBranches = list(self._branchMap.values())
-			if index > len(oldBranches) - 1:
-				index = len(oldBranches)
-			oldBranches.insert(index, branch)
-			for newBranch in oldBranches:
-				newMap[newBranch.name] = newBranch
-			self._branchMap = newMap
+			branchMap[branch.name] = branch
+		else:
+			branchMap.insert(index, branch.name, branch)
 		branch._setParent(self)
+		self._markDirty()
+		self._notify("branchAdded", branch)
 
 		# emit signal
-		self.structureChanged(branch, self,
-		                      self.StructureEvents.branchAdded)
+		self._emitSignal("_structureChanged", branch, self,
+		                 self.StructureEvents.branchAdded)
 		return branch
 
 
 	def getBranch(self, lookup, default=None, **kwargs)->Union[TreeBase, None]:
 		""" returns branch object if it exists or default
-		only supports single level """
-		lookup = self._parseAddressTokens((lookup,))
-		if not lookup:
+		never creates branches """
+		key = self._lookupKey(lookup)
+		branch = self._cachedLookup(key)
+		if branch is not None:
+			return branch
+		tokens = self._parseAddressTokens((lookup,))
+		if not tokens:
 			return self
-		name = lookup.pop(0)
-		if name not in self._branchMap.keys():
+		branch = self._resolve(tokens, create=False)
+		if branch is None:
 			return default
-		if lookup:
-			return self._branchMap[name].getBranch(lookup)
-		return self._branchMap[name]
+		self._cacheLookup(key, branch)
+		return branch
 
 	def get(self, lookup, default=None):
 		""" same implementation as normal dict
@@ -394,8 +1119,9 @@ class TreeBase(object):
 	def index(self, lookup=None, *args, **kwargs):
 		if lookup is None: # get tree's own index
 			return self.ownIndex()
-		if lookup in self._branchMap.keys():
-			return list(self._branchMap.keys()).index(lookup, *args, **kwargs)
+		branchMap = self._readMap()
+		if lookup in branchMap:
+			return branchMap.index(lookup)
 		else:
 			return -1
 
@@ -412,33 +1138,93 @@ class TreeBase(object):
 		return index
 
 	def keys(self):
-		return self._branchMap.keys()
+		return self._readMap().keys()
 
 	def iterBranches(self):
 		# return self._branchMap.items()
-		return iteritems(self._branchMap)
+		return iteritems(self._readMap())
 
 	def allBranches(self, includeSelf=True, depthFirst=True)->List[TreeBase]:
 		""" returns list of all tree objects
 		depth first
 		:returns [Tree]"""
-		found = [ self ] if includeSelf else []
-		if depthFirst:
-			for i in self.branches:
-				found.extend(i.allBranches(
-					includeSelf=True, depthFirst=True))
-		else:
-			found.extend(self.branches)
-			for i in self.branches:
-				found.extend(i.allBranches(
-					includeSelf=False, depthFirst=False))
-		return found
-
-	def iterAllBranches(self):
-		""" not necessary yet, but will be for colossal trees
-		like file systems
+		return list(self.iterAllBranches(includeSelf, depthFirst))
+
+	def iterAllBranches(self, includeSelf=True, depthFirst=True,
+	                    topDown=True, prune=None, maxDepth=None):
+		""" lazily yield all branches under this one, without recursion
+		like os.walk(), stop early by breaking out of the loop
+
+		:param depthFirst : if False, yield level by level
+		:param topDown : yield parents before their branches (pre-order),
+			else after them (post-order) - depth first only
+		:param prune : function(branch) -> bool, if True, branch is
+			still yielded but nothing below it is visited
+		:param maxDepth : levels below this branch to visit,
+			0 visits only this branch
 		"""
-		pass
+		if not depthFirst:
+			return self._iterBreadthFirst(includeSelf, prune, maxDepth)
+		if not topDown:
+			return self._iterPostOrder(includeSelf, prune, maxDepth)
+		return self._iterPreOrder(includeSelf, prune, maxDepth)
+
+	def _shouldDescend(self, prune, maxDepth, depth)->bool:
+		""" check if walk should visit branches of this branch,
+		at given depth relative to start of walk """
+		if maxDepth is not None and depth >= maxDepth:
+			return False
+		if not self._readMap():
+			return False
+		return not (prune and prune(self))
+
+	def _iterPreOrder(self, includeSelf, prune, maxDepth):
+		if includeSelf:
+			yield self
+		if not self._shouldDescend(prune, maxDepth, 0):
+			return
+		# one iterator per level - memory scales with depth, not size
+		stack = [iter(self._readMap().values())]
+		while stack:
+			branch = next(stack[-1], None)
+			if branch is None:
+				stack.pop()
+				continue
+			yield branch
+			if branch._shouldDescend(prune, maxDepth, len(stack)):
+				stack.append(iter(branch._readMap().values()))
+
+	def _iterPostOrder(self, includeSelf, prune, maxDepth):
+		if not self._shouldDescend(prune, maxDepth, 0):
+			if includeSelf:
+				yield self
+			return
+		stack = [(self, iter(self._readMap().values()))]
+		while stack:
+			parent, branches = stack[-1]
+			branch = next(branches, None)
+			if branch is None:
+				stack.pop()
+				if stack or includeSelf:
+					yield parent
+				continue
+			if branch._shouldDescend(prune, maxDepth, len(stack)):
+				stack.append((branch, iter(branch._readMap().values())))
+			else:
+				yield branch
+
+	def _iterBreadthFirst(self, includeSelf, prune, maxDepth):
+		if includeSelf:
+			yield self
+		queue = deque()
+		if self._shouldDescend(prune, maxDepth, 0):
+			queue.append((self, 1))
+		while queue:
+			parent, depth = queue.popleft()
+			for branch in parent._readMap().values():
+				yield branch
+				if branch._shouldDescend(prune, maxDepth, depth):
+					queue.append((branch, depth + 1))
 
 	def isEquivalent(self, branch, includeBranches=True):
 		""" tests if this tree is equivalent to
@@ -446,7 +1232,7 @@ class TreeBase(object):
 		flags = [
 			self.name == branch.name,
 			self.value == branch.value,
-			self.extras == branch.extras
+			(self._extras or {}) == (branch._extras or {})
 		]
 		if includeBranches:
 			flags.append(all([i.isEquivalent(n)
@@ -459,8 +1245,8 @@ class TreeBase(object):
 		"""
 		if equivalent:
 			return any([branch.isEquivalent(i) for i in self.branches])
-		else:
-			return any([branch is i for i in self.branches])
+		else: # names are unique, so only one branch can match
+			return self._readMap().get(branch.name) is branch
 
 
 	def _address(self, prev=None):
@@ -468,17 +1254,67 @@ class TreeBase(object):
 		does not include root
 		return list of string addresses
 		"""
-		prev = prev or []
-		if self.root == self:
-			return prev
-		prev.insert(0, self.name)
-		return self.parent._address(prev=prev)
+		return list(self._getLocation()[2]) + (prev or [])
+
+	def _getLocation(self):
+		""" return (root, depth, address tuple) for this branch
+
+		computed once and cached on this branch and each of its
+		ancestors - a branch can only hold a location if its parent does,
+		so _invalidateLocation() can stop at any uncached branch
+		"""
+		location = self._location
+		if location is not None:
+			return location
+		# walk up to the nearest cached ancestor, without recursion
+		chain = []
+		branch = self
+		while branch is not None and branch._location is None:
+			chain.append(branch)
+			branch = branch._parent
+		if branch is None: # reached root
+			branch = chain.pop()
+			branch._location = (branch, 0, ())
+		root, depth, address = branch._location
+		for branch in reversed(chain):
+			depth += 1
+			address = address + (branch._name,)
+			branch._location = (root, depth, address)
+		return self._location
+
+	def _markDirty(self):
+		""" clear caches built from the content of this branch,
+		on it and each of its parents -
+		called whenever a branch's value, name or branches change
+
+		a clean branch never has a dirty branch below it, so the walk
+		stops at the first parent that is already dirty """
+		branch = self
+		while branch is not None and (
+				branch._frozen is not None or branch._encoded is not None):
+			branch._frozen = None
+			branch._encoded = None
+			branch = branch._parent
+
+	def _invalidateLocation(self):
+		""" clear cached locations of this branch and all below it
+		called whenever a branch is reparented or renamed """
+		if self._location is None:
+			return
+		stack = [self]
+		while stack:
+			branch = stack.pop()
+			if branch._location is None:
+				continue
+			branch._location = None
+			if branch._childMap:
+				stack.extend(branch._childMap.values())
 
 	def stringAddress(self)->str:
 		""" returns the address sequence joined by the tree separator """
 		return self.sep.join(self.address)
 
-	def search(self, path, onlyChildren=True):
+	def search(self, path, onlyChildren=True, mode="substring"):
 		""" searches branches for trees matching a partial path,
 		and returns ALL THAT MATCH
 		so for a tree
@@ -491,78 +1327,145 @@ class TreeBase(object):
 		right now would also return both for search( "lea" ) -
 		basic contains check is all I have
 
-		if onlyChildren, only searches through children -
-		else checks through all branches
-		"""
+		:param mode : "substring", "prefix" or "exact" name match
 
-		found = []
-		if path in self.name:
-			found.append(self)
-		toCheck = self.branches if onlyChildren else self.allBranches(True)
-		for i in toCheck:
-			found.extend( i.search(path) )
-		return found
+		if indexSearch is set, the first search builds a NameIndex on
+		the root, and later searches never walk the tree - hits are
+		sorted back into tree order.
+		onlyChildren is kept for compatibility - every branch under
+		this one is checked exactly once either way
+		"""
+		if not self.indexSearch:
+			return [i for i in self.iterAllBranches(True)
+			        if i._name and _matchName(path, i._name, mode)]
+		from tree.index import NameIndex
+		found = NameIndex.forTree(self).search(path, mode)
+		if self._parent is not None:
+			found = [i for i in found if self.isAncestorOf(i)]
+		positions = _treePositions(found)
+		return sorted(found, key=lambda i : positions[id(i)])
+
+	def glob(self, pattern):
+		""" lazily yield branches below this one matching
+		wildcard address pattern, eg "assets.*.lod0" or "rig.**.ctrl_*"
+		see tree.pattern """
+		from tree.pattern import glob
+		return glob(self, pattern)
+
+	def match(self, pattern, relativeTo=None)->bool:
+		""" check if this branch's address matches wildcard pattern
+		:param relativeTo : ancestor branch to take address from,
+		defaults to root """
+		from tree.pattern import compilePattern
+		compiled = compilePattern(pattern, self.sep, self.parentToken)
+		address = self._getLocation()[2]
+		if relativeTo is not None:
+			if not relativeTo.isAncestorOf(self):
+				return False
+			address = address[relativeTo.depth:]
+		return compiled.matchesTokens(address)
+
+	def createIndex(self, key):
+		""" index all branches in this tree by the given key -
+		"value", "active", "readOnly", or "extras.<extras key>"
+		the index is kept on the root, and returns the existing
+		index for key if there is one
+		see tree.index.AttributeIndex """
+		from tree.index import AttributeIndex
+		return AttributeIndex.forTree(self, key)
+
+	def getIndex(self, key):
+		""" return root's index for key, or None """
+		from tree.index import AttributeIndex
+		return AttributeIndex.forTree(self, key, create=False)
+
+	def dropIndex(self, key):
+		index = self.getIndex(key)
+		if index is not None:
+			self.removeObserver(index)
+
+	def branchesWhere(self, key, value)->List[TreeBase]:
+		""" return all branches under this one whose key equals value,
+		and is of the same type - key as for createIndex()
+		without an index for key, every branch is checked """
+		from tree.index import AttributeIndex
+		index = self.getIndex(key)
+		if index is None:
+			getter = AttributeIndex.getterFor(key)
+			return [i for i in self.iterAllBranches(True)
+			        if AttributeIndex.matches(getter(i), value)]
+		found = index.find(value)
+		if self._parent is None:
+			return found
+		return [i for i in found if self.isAncestorOf(i)]
+
+	def isAncestorOf(self, branch)->bool:
+		""" True if branch is this branch or anywhere below it """
+		while branch is not None:
+			if branch is self:
+				return True
+			branch = branch._parent
+		return False
 
 
 	def _setName(self, name):
-		"""renames and syncs parent's map
-		currently destroys orderedDict order - oh well"""
+		"""renames and syncs parent's map, keeping position"""
 		if name == self._name: # we aint even mad
 			return name
 
 		oldName = self._name
 
-		# we need to preserve order across renaming
+		self._markDirty()
+		pool = self.root._internPool
+		if pool is not None:
+			name = pool.name(name)
 		if self.parent:
-			newDict = OrderedDict()
-			oldName = self._name
 			name = incrementName(name, self.parent.keys())
-			for k, v in self.parent.iterBranches():
-				if k == oldName:
-					newDict[name] = self
-					continue
-				newDict[k] = v
-			self.parent._branchMap = newDict
+			self.parent._writeMap().rename(oldName, name)
+			self._name = name
+			self._invalidateLocation()
+			self.root._lookupCache = None
 		self._name = name
-		self.nameChanged(self, oldName, name)
+		self._notify("branchRenamed", self, oldName, name)
+		self._emitSignal("_nameChanged", self, oldName, name)
 		return name
 
 	def remove(self, address=None):
-		"""removes address, or just removes the tree if no address is given"""
-		if not address:
-			if self.parent:
-				self.parent._branchMap.pop(self.name)
-
-				self.parent.structureChanged(self, self.parent,
-				                             self.StructureEvents.branchRemoved)
-				return self
-		branch = self(address)
-		branch.remove()
-		branch.parent.structureChanged(branch, branch.parent,
-		                               self.StructureEvents.branchRemoved)
-		return branch
+		"""removes address, or just removes the tree if no address is given
+		removed branch is left as the root of its own tree"""
+		if address:
+			return self(address).remove()
+		parent = self.parent
+		if parent:
+			parent._writeMap().pop(self.name)
+			self._setParent(None)
+			parent._markDirty()
+			parent._notify("branchRemoved", self, parent)
+			parent._emitSignal("_structureChanged",
+			                   self, parent,
+			                   self.StructureEvents.branchRemoved)
+		return self
 
 
 	def setIndex(self, index):
 		""" reorders tree branch to given index
-		negative indices not yet supported """
+		negative indices count from the end, as with lists """
 		if not self.parent:
 			return
-		if index < 0: # ?
-			index = len(self.siblings) + index
-		newMap = OrderedDict()
-		oldKeys = list(self.parent._branchMap.keys())
-		oldKeys.remove(self.name)
-		oldKeys.insert(index, self.name)
-		for key in oldKeys:
-			newMap[key] = self.parent._branchMap[key]
-		self.parent._branchMap = newMap
+		parentMap = self.parent._writeMap()
+		if index < 0:
+			index = len(parentMap) + index
+		oldIndex = parentMap.index(self.name)
+		parentMap.move(self.name, index)
+		self.parent._markDirty()
+		if oldIndex != index:
+			self._notify("branchReordered", self, oldIndex, index)
 
 
 	def searchReplace(self, searchFor=None, replaceWith=None,
 	                  names=True, values=True, recurse=True):
 		"""checks over raw string names and values and replaces"""
-		branches = self.allBranches(True) if recurse else [self]
+		branches = self.iterAllBranches(True) if recurse else [self]
 		for branch in branches:
 			if names:
 				branch.name = str(branch.name).replace(searchFor, replaceWith)
@@ -573,18 +1476,127 @@ class TreeBase(object):
 	def matches(self, other):
 		""" check if name, value and extras match
 		another given branch """
-		return all([getattr(self, i) == getattr(other, i)
-		            for i in ("_branchMap", "_value", "_name", "extras")])
+		return all([self._readMap() == other._readMap(),
+		            self._value == other._value,
+		            self._name == other._name,
+		            (self._extras or {}) == (other._extras or {})])
 
 
 	@classmethod
-	def fromDict(cls, regenDict)->TreeBase:
+	def fromDict(cls, regenDict, pool=None)->TreeBase:
+		"""regenerate tree from serialise() output of any format version -
+		the version is read from the ?FORMAT_VERSION key, and data without
+		one is taken as version 0, as are the dicts of single branches
+			:param regenDict : Dict
+			:param pool : InternPool, or True to create one -
+			names and immutable values are shared through it,
+			and it is kept on the new tree, see setInternPool()
+		"""
+		if pool is True:
+			pool = InternPool()
+		return cls.formatManager.deserialiserFor(regenDict)(
+			cls, regenDict, pool)
+
+	@classmethod
+	@formatManager.deserialiser(0)
+	def _fromDictV0(cls, regenDict, pool=None)->TreeBase:
 		"""expects dict of format
 		name : eyy
 		value : whatever
 		children : [{
 			etc}, {etc}]
-			:param regenDict : Dict """
+
+		branches are built iteratively and wired directly into their
+		parent's map - no per-branch addChild() checks or signals.
+		objData classes are resolved through lib.classRegistry
+		"""
+		new, children = cls._branchFromDict(regenDict, pool)
+		if new is None:
+			return None
+		new._internPool = pool
+		stack = [(new, iter(children))]
+		while stack:
+			parent, childData = stack[-1]
+			data = next(childData, None)
+			if data is None:
+				stack.pop()
+				continue
+			# branches default to the class of their parent
+			parentCls = type(parent)
+			loadCls = parentCls
+			objData = data.get("objData")
+			if objData:
+				loadCls = loadObjectClass(objData) or parentCls
+				if loadCls.fromDict.__func__ is TreeBase.fromDict.__func__:
+					loadCls = parentCls
+			if loadCls.fromDict.__func__ is not TreeBase.fromDict.__func__:
+				# respect subclasses overriding fromDict
+				branch, children = loadCls.fromDict(data), None
+			else:
+				branch, children = parentCls._branchFromDict(data, pool)
+			if branch is None:
+				continue
+			# replace existing (default) branches declared in init
+			parent._writeMap()[branch._name] = branch
+			branch._parent = parent
+			if children:
+				stack.append((branch, iter(children)))
+		return new
+
+	@classmethod
+	@formatManager.deserialiser(1)
+	def _fromDictV1(cls, regenDict, pool=None)->TreeBase:
+		""" load version 1 data, see _serialiseV1() """
+		# classes that cannot be loaded fall back to the parent's default
+		classes = [loadObjectClass(i) for i in regenDict.get("?CLASSES", ())]
+		root = None
+		stack = [(None, iter((regenDict["?TREE"],)))]
+		while stack:
+			parent, nodes = stack[-1]
+			node = next(nodes, None)
+			if node is None:
+				stack.pop()
+				continue
+			parentCls = cls if parent is None else type(parent)
+			if type(node) is dict:
+				# branch saved through its class's own serialise()
+				objData = node.get("objData")
+				branchCls = parentCls
+				if objData:
+					branchCls = loadObjectClass(objData) or \
+					            parentCls._defaultCls()
+				branch = branchCls.fromDict(node)
+				if branch is not None:
+					parent._writeMap()[branch._name] = branch
+					branch._parent = parent
+				continue
+			size = len(node)
+			name = node[0] or None
+			val = node[1] if size > 1 else None
+			branchCls = parentCls
+			if size > 4 and node[4] is not None:
+				branchCls = classes[node[4]] or parentCls._defaultCls()
+			if pool is not None:
+				name, val = pool.name(name), pool.value(val)
+			branch = branchCls(name=name, val=val)
+			if size > 3 and node[3]:
+				branch._extras = node[3]
+			if parent is None:
+				root = branch
+				root._internPool = pool
+			else:
+				parent._writeMap()[branch._name] = branch
+				branch._parent = parent
+			if size > 2 and node[2]:
+				stack.append((branch, iter(node[2])))
+		return root
+
+	@classmethod
+	def _branchFromDict(cls, regenDict, pool=None):
+		""" create single unparented branch from serialised dict
+		returns (branch, list of child dicts), or (None, None)
+		if dict has nothing to regenerate
+		:param pool : InternPool for name and value """
 
 		# support subclass serialisation and regen -
 		# check first for a saved class or module name
@@ -595,24 +1607,18 @@ class TreeBase(object):
 		# if branch is same type as parent, no info needed
 		# a tree of one type will mark all branches as same type
 		# until a new type is flagged
-		val = regenDict.get("?VALUE") or None
+		val = regenDict.get("?VALUE")
 		name = regenDict.get("?NAME") or None
 		children = regenDict.get("?CHILDREN") or []
-		if not (val or name or children): # skip branch
+		if not (val is not None or name or children): # skip branch
 			print("regenDict {}".format(regenDict))
 			print("no name, val or children found")
-			return None
+			return None, None
+		if pool is not None:
+			name, val = pool.name(name), pool.value(val)
 		new = cls(name=name, val=val)
-		new.extras = regenDict.get("?EXTRAS") or {}
-
-		# regnerate children
-		for i in children:
-			branch = cls.fromDict(i)
-			if branch is None:
-				continue
-			# replace existing (default) branches declared in init
-			new.addChild(branch, force=True)
-		return new
+		new._extras = regenDict.get("?EXTRAS") or None
+		return new, children
 
 
 	def rootData(self):
@@ -622,7 +1628,27 @@ class TreeBase(object):
 		return {
 		}
 
-	def serialise(self, includeAddress=False)->dict:
+	def serialise(self, includeAddress=False, version=0)->dict:
+		""" return dict of this branch and all below it, to regenerate
+		with fromDict()
+		:param version : format version, see formatManager -
+		0 keys every branch's data, 1 stores each as a positional list
+		and is smaller and faster to load """
+		if not version and self._parent is not None:
+			# only the root carries the format version
+			return self._serialiseBranchV0(includeAddress)
+		return self.formatManager.serialiserFor(version)(
+			self, includeAddress=includeAddress)
+
+	@formatManager.serialiser(0)
+	def _serialiseV0(self, includeAddress=False)->dict:
+		""" version 0 - a dict per branch, children under ?CHILDREN """
+		serial = self._serialiseBranchV0(includeAddress)
+		if self.rootData():
+			serial["?ROOT_DATA"] = self.rootData()
+		return serial
+
+	def _serialiseBranchV0(self, includeAddress=False)->dict:
 		serial = {
 			"?NAME" : self.name,
 		}
@@ -632,33 +1658,124 @@ class TreeBase(object):
 			# can be dicey with complex types
 			serial["?VALUE"] = self.value
 		if self.branches:
-			serial["?CHILDREN"] = [i.serialise() for i in self._branchMap.values()]
-		if self.extras:
-			serial["?EXTRAS"] = self.extras
+			serial["?CHILDREN"] = [i.serialise() for i in self._childMap.values()]
+		if self._extras:
+			serial["?EXTRAS"] = dict(self._extras)
 
 		"""If tree has a parent, and its class does not match
 		this branch, serialise ref to class of this branch
 		alongside it
 		"""
-		if self.parent:
-
-			if self.parent.__class__ != self.__class__:
+		if self._parent is not None:
+			if self._parent.__class__ != self.__class__:
 				objData = saveObjectClass(self)
 				serial["objData"] = objData
 				# it now costs exactly one extra line to define the child class
 				# it's worth it to avoid the pain of adaptive definition
-		else:
-			""" If tree does not have a parent, insert a data format
-			version number at root of dictionary
-			In future this will be handled by the FormatManager
-			"""
-			if self.rootData():
-				serial["?ROOT_DATA"] = self.rootData()
-			serial["?FORMAT_VERSION"] = 0
 
 		# always returns dict
 		return serial
 
+	@formatManager.serialiser(1)
+	def _serialiseV1(self, includeAddress=False)->dict:
+		""" version 1 - the tree is a nested list under ?TREE, each branch
+		being [name, value, children, extras, class],
+		with trailing empty entries dropped.
+		class is an index into ?CLASSES, given only where a branch's class
+		differs from its parent's, as objData in version 0.
+		branches of classes redefining serialise() or fromDict() are
+		stored as their own serialise() dict, and loaded with their
+		fromDict().
+		includeAddress is not supported, addresses follow from nesting """
+		classes = {}
+		custom = {}
+		def node(branch, parentCls):
+			cls = type(branch)
+			isCustom = custom.get(cls)
+			if isCustom is None:
+				isCustom = custom[cls] = _customFormat(cls)
+			# the root is the branch being serialised
+			if isCustom and branch is not self:
+				return branch.serialise()
+			if cls is parentCls:
+				classIndex = None
+			else:
+				objData = saveObjectClass(branch)
+				classIndex = classes.setdefault(objData, len(classes))
+			return [branch._name, branch.value, None,
+			        dict(branch._extras) if branch._extras else None,
+			        classIndex]
+		def trim(data):
+			while len(data) > 1 and data[-1] is None:
+				data.pop()
+
+		root = node(self, type(self))
+		stack = [(self, root)]
+		while stack:
+			branch, data = stack.pop()
+			children = branch._readMap()
+			if children:
+				branchCls = type(branch)
+				childData = data[2] = []
+				for child in children.values():
+					childNode = node(child, branchCls)
+					childData.append(childNode)
+					if type(childNode) is list:
+						stack.append((child, childNode))
+			trim(data)
+
+		serial = {"?TREE" : root}
+		if classes:
+			serial["?CLASSES"] = list(classes)
+		if self.rootData():
+			serial["?ROOT_DATA"] = self.rootData()
+		return serial
+
+	def snapshot(self):
+		""" return immutable FrozenTree of this branch and everything
+		below it, as it is now
+		unchanged branches are shared with previous snapshots, so only
+		branches changed since the last call, and their parents,
+		are copied - see tree.snapshot """
+		from tree.snapshot import freeze
+		return freeze(self)
+
+	def dump(self, fp, format="json", **kwargs):
+		""" stream serialised tree directly to file object,
+		without building the whole serialised dict first
+		pass incremental=True to reuse text of branches unchanged
+		since the last incremental dump
+		see tree.stream for formats and options """
+		from tree.stream import dump
+		dump(self, fp, format=format, **kwargs)
+
+	def serialiseParallel(self, executor=None, splitDepth=1, workers=None,
+	                      fork=False)->str:
+		""" return json text of serialise(), with branches at splitDepth
+		encoded in worker processes - see tree.parallel """
+		from tree.parallel import serialiseParallel
+		return serialiseParallel(self, executor, splitDepth, workers, fork)
+
+	@classmethod
+	def loadParallel(cls, path:str, executor=None, pool=None,
+	                 workers=None)->TreeBase:
+		""" return tree from json file of serialise() output, decoding
+		the root's branches in worker processes - see tree.parallel """
+		from tree.parallel import loadParallel
+		return loadParallel(path, cls, executor, pool, workers)
+
+	def toColumns(self)->dict:
+		""" return numpy arrays describing this branch and all below it,
+		one row per branch - see tree.columns """
+		from tree.columns import toColumns
+		return toColumns(self)
+
+	@classmethod
+	def fromColumns(cls, columns:dict)->TreeBase:
+		""" rebuild tree from toColumns() arrays """
+		from tree.columns import fromColumns
+		return fromColumns(columns, cls=cls)
+
 	def display(self):
 		seq = pprint.pformat( self.serialise() )
 		return seq
@@ -89,7 +89,7 @@ class FormatManager(object):
 				# add format verion tag to data
 				if isinstance(self.writeKey, (str, int)):
 					result[self.writeKey] = version
-				elif isinstance(self.writeKey, (function, LambdaType)):
+				elif isinstance(self.writeKey, (FunctionType, LambdaType)):
 					self.writeKey(result, version)
 				return result
 
@@ -107,7 +107,7 @@ class FormatManager(object):
 			@wraps(fn)
 			def fnCallWrapper(*args, **kwargs):
 				result = fn(*args, **kwargs)
-				return result,
+				return result
 			# add wrapped function to deserialisers
 			self.deserialiserFns[version] = fnCallWrapper
 			return fnCallWrapper
@@ -126,9 +126,29 @@ class FormatManager(object):
 		""" retrieve the int version used in a block of data """
 		if isinstance(self.readKey, (str, int)):
 			return data[self.readKey]
-		elif isinstance(self.readKey, (function, LambdaType)):
+		elif isinstance(self.readKey, (FunctionType, LambdaType)):
 			return self.readKey(data)
 
+	def serialiserFor(self, version:int):
+		""" return serialiser function for exact format version """
+		try:
+			return self.serialiserFns[version]
+		except KeyError:
+			raise ValueError("no serialiser for format version {}, "
+			                 "known versions {}".format(
+				version, sorted(self.serialiserFns)))
+
+	def deserialiserFor(self, data):
+		""" return deserialiser function matching the version
+		recorded in data """
+		version = self.getDataVersion(data)
+		try:
+			return self.deserialiserFns[version]
+		except KeyError:
+			raise ValueError("no deserialiser for format version {}, "
+			                 "known versions {}".format(
+				version, sorted(self.deserialiserFns)))
+
 
 	# def serialise(self): # too opaque
 	# 	"""Storing functions is simple for now,
@@ -1,4 +1,18 @@
-from main import Tree
+from tree.core import TreeBase
+from tree.main import Tree
+from tree.lib import saveObjectClass
+
+# storage of the base slots that RefTree reads lazily
+_childMapSlot = TreeBase.__dict__["_childMap"]
+_valueSlot = TreeBase.__dict__["_value"]
+_extrasSlot = TreeBase.__dict__["_extras"]
+
+# flags of parts already read from file
+_loadedChildren, _loadedValue, _loadedExtras = 1, 2, 4
+
+# held in base slots until they are read from file
+_unread = object()
+
 
 class RefTree(Tree):
 	"""
@@ -7,4 +21,156 @@ class RefTree(Tree):
 
 	I don't know how this would overlap with the proxy tree
 
+	branches are made from a treefile.TreeFile - each branch's
+	children, value and extras are only read from the file when first
+	accessed. Lookups never create branches, values may still be
+	set but are only changed in memory.
+	close the file when done, or use the root as a context manager
+
+		with openTree("big.tree") as tree:
+			tree("deep.branch").value
 	"""
+
+	__slots__ = ("_refFile", "_refNode")
+
+	def __init__(self, name=None, val=None, treeFile=None, index=0):
+		super(RefTree, self).__init__(name, val)
+		self._refFile = treeFile
+		self._refNode = index
+		if treeFile is not None:
+			self._readOnly = True
+			_childMapSlot.__set__(self, _unread)
+			_valueSlot.__set__(self, _unread)
+			_extrasSlot.__set__(self, _unread)
+
+	@classmethod
+	def fromFile(cls, treeFile, index=0, name=None)->"RefTree":
+		""" return branch for node index of TreeFile """
+		if name is None:
+			name = treeFile.node(index)[0]
+		return cls(name, treeFile=treeFile, index=index)
+
+	@property
+	def _refLoaded(self)->int:
+		""" flags of parts already read from file """
+		flags = 0
+		for flag, slot in ((_loadedChildren, _childMapSlot),
+		                   (_loadedValue, _valueSlot),
+		                   (_loadedExtras, _extrasSlot)):
+			if slot.__get__(self) is not _unread:
+				flags |= flag
+		return flags
+
+	@property
+	def _childMap(self):
+		if _childMapSlot.__get__(self) is _unread:
+			_childMapSlot.__set__(self, None)
+			children = self._refFile.children(self._refNode)
+			if children:
+				branchMap = self._writeMap()
+				for index, name in children:
+					branch = self.fromFile(self._refFile, index, name)
+					branchMap.append(name, branch)
+					branch._parent = self
+		return _childMapSlot.__get__(self)
+	@_childMap.setter
+	def _childMap(self, val):
+		_childMapSlot.__set__(self, val)
+
+	@property
+	def _value(self):
+		value = _valueSlot.__get__(self)
+		if value is _unread:
+			value = self._refFile.value(self._refNode)
+			_valueSlot.__set__(self, value)
+		return value
+	@_value.setter
+	def _value(self, val):
+		_valueSlot.__set__(self, val)
+
+	@property
+	def _extras(self):
+		extras = _extrasSlot.__get__(self)
+		if extras is _unread:
+			extras = self._refFile.extras(self._refNode)
+			_extrasSlot.__set__(self, extras)
+		return extras
+	@_extras.setter
+	def _extras(self, val):
+		_extrasSlot.__set__(self, val)
+
+	def _writeMap(self):
+		self._childMap # read any children first
+		return super(RefTree, self)._writeMap()
+
+	def rootData(self):
+		if self._parent is None and self._refNode == 0 \
+				and self._refFile is not None:
+			return self._refFile.rootData
+		return super(RefTree, self).rootData()
+
+	def close(self):
+		""" close the file read from - parts of branches not yet read
+		can no longer be """
+		if self._refFile is not None:
+			self._refFile.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *args):
+		self.close()
+
+	def _savedClassName(self)->str:
+		""" objData of the class this branch was saved from """
+		if self._refFile is None:
+			return saveObjectClass(self)
+		return self._refFile.classNames[self._refFile.node(self._refNode)[7]]
+
+	def serialise(self, includeAddress=False, version=0)->dict:
+		""" as Tree.serialise(), with branches given the classes they
+		were saved from, rather than RefTree """
+		serial = super(RefTree, self).serialise(includeAddress, version)
+		parent = self._parent
+		if not version and parent is not None:
+			objData = self._savedClassName()
+			if isinstance(parent, RefTree):
+				parentData = parent._savedClassName()
+			else:
+				parentData = saveObjectClass(parent)
+			serial.pop("objData", None)
+			if objData != parentData:
+				serial["objData"] = objData
+		return serial
+
+	def __reduce_ex__(self, protocol):
+		""" pickled as the normal tree it reads into, the file
+		itself is not sent """
+		return self.toTree().__reduce_ex__(protocol)
+
+	def toTree(self)->Tree:
+		""" read everything below this branch into a normal tree,
+		with the classes it was saved from """
+		root = self._copyBranch()
+		stack = [(root, iter(self.branches))]
+		while stack:
+			parent, branches = stack[-1]
+			ref = next(branches, None)
+			if ref is None:
+				stack.pop()
+				continue
+			branch = ref._copyBranch()
+			parent._writeMap().append(branch._name, branch)
+			branch._parent = parent
+			stack.append((branch, iter(ref.branches)))
+		return root
+
+	def _copyBranch(self)->TreeBase:
+		cls = Tree
+		if self._refFile is not None:
+			cls = self._refFile.nodeClass(self._refNode) or Tree
+		branch = cls.__new__(cls)
+		TreeBase.__init__(branch, self.name, self.value)
+		if self._extras:
+			branch._extras = dict(self._extras)
+		return branch
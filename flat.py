@@ -0,0 +1,549 @@
+""" array-backed tree storage, for large trees that are mostly read
+
+a FlatTree keeps its whole structure in parallel arrays, one row per
+branch - parent, first child, last child and next sibling rows,
+and an index into a shared table of names. Values are a plain list,
+extras and branch classes are only stored for rows that have them -
+classes for any row not of the default Tree class.
+
+There is no python object per branch - FlatBranch views are made
+when a branch is accessed, and held weakly, so the same view is
+returned while anything still uses it. Views support the reading
+interface of TreeBase, setting values, and adding or removing
+branches, but have no signals.
+
+Lookups, traversal and serialisation all run on the arrays:
+	flat = FlatTree.fromDict(json.load(f))
+	flat.root("branchA.leaf").value
+	flat.serialise()
+"""
+from __future__ import annotations
+
+from array import array
+from typing import Iterator, List, Union
+from weakref import WeakValueDictionary
+
+from tree.core import TreeBase
+from tree.lib import incrementName, loadObjectClass, uniqueSign
+
+# row value for no parent, child or sibling
+NONE = -1
+# parent row of removed branches
+REMOVED = -2
+
+
+class FlatTree(object):
+	""" storage for a whole tree - branches are reached through
+	FlatBranch views, starting from root """
+
+	sep = TreeBase.sep
+	parentToken = TreeBase.parentToken
+
+	# rows with more children than this get a name : row dict,
+	# rather than searching their sibling chain
+	childIndexSize = 32
+
+	def __init__(self, name=None, value=None):
+		self.parents = array("q")
+		self.firstChildren = array("q")
+		self.lastChildren = array("q")
+		self.nextSiblings = array("q")
+		self.nameIds = array("q")
+		self.values = []
+		# name table
+		self.names = []
+		self.nameToId = {}
+		# sparse row data
+		self.extras = {} # row : extras dict
+		self.classes = {} # row : branch class, if not the default
+		self._childIndex = {} # row : {name : child row}
+		self._views = WeakValueDictionary() # row : FlatBranch
+		self._addRow(NONE, name, value)
+
+	def __len__(self):
+		""" number of rows, including removed branches """
+		return len(self.parents)
+
+	@property
+	def root(self)->FlatBranch:
+		return self.view(0)
+
+	def view(self, row)->FlatBranch:
+		""" return view of given row, reusing any live one """
+		branch = self._views.get(row)
+		if branch is None:
+			branch = FlatBranch(self, row)
+			self._views[row] = branch
+		return branch
+
+	# building
+	def _nameId(self, name)->int:
+		if name is None:
+			return NONE
+		name = str(name)
+		nameId = self.nameToId.get(name)
+		if nameId is None:
+			nameId = self.nameToId[name] = len(self.names)
+			self.names.append(name)
+		return nameId
+
+	def _addRow(self, parentRow, name, value)->int:
+		""" append new row as last child of parentRow """
+		row = len(self.parents)
+		self.parents.append(parentRow)
+		self.firstChildren.append(NONE)
+		self.lastChildren.append(NONE)
+		self.nextSiblings.append(NONE)
+		self.nameIds.append(self._nameId(name))
+		self.values.append(value)
+		if parentRow != NONE:
+			last = self.lastChildren[parentRow]
+			if last == NONE:
+				self.firstChildren[parentRow] = row
+			else:
+				self.nextSiblings[last] = row
+			self.lastChildren[parentRow] = row
+			index = self._childIndex.get(parentRow)
+			if index is not None and name is not None:
+				index[str(name)] = row
+		return row
+
+	@classmethod
+	def fromDict(flatCls, regenDict, cls=None)->FlatTree:
+		""" load serialised tree straight into arrays,
+		as TreeBase.fromDict()
+		:param cls : class of the root branch, as the class
+		TreeBase.fromDict() is called on - a saved objData
+		still takes precedence """
+		flat = flatCls(regenDict.get("?NAME") or None,
+		               regenDict.get("?VALUE"))
+		if cls is not None and cls is not flat.defaultCls():
+			flat.classes[0] = cls
+		flat._loadRowData(0, regenDict, None)
+		stack = [(0, iter(regenDict.get("?CHILDREN") or ()))]
+		while stack:
+			parentRow, children = stack[-1]
+			data = next(children, None)
+			if data is None:
+				stack.pop()
+				continue
+			name = data.get("?NAME") or None
+			row = flat._addRow(parentRow, name, data.get("?VALUE"))
+			flat._loadRowData(row, data, parentRow)
+			if data.get("?CHILDREN"):
+				stack.append((row, iter(data["?CHILDREN"])))
+		return flat
+
+	def _loadRowData(self, row, data, parentRow):
+		if data.get("?EXTRAS"):
+			self.extras[row] = dict(data["?EXTRAS"])
+		if data.get("objData"):
+			self.classes[row] = loadObjectClass(data["objData"])
+		elif parentRow is not None and parentRow in self.classes:
+			# branches default to the class of their parent
+			self.classes[row] = self.classes[parentRow]
+
+	@classmethod
+	def fromTree(cls, tree:TreeBase)->FlatTree:
+		""" copy live tree into arrays - values are shared """
+		flat = cls(tree._name, tree.value)
+		flat._copyBranchData(0, tree, None)
+		stack = [(0, iter(tree._readMap().values()))]
+		while stack:
+			parentRow, branches = stack[-1]
+			branch = next(branches, None)
+			if branch is None:
+				stack.pop()
+				continue
+			row = flat._addRow(parentRow, branch._name, branch.value)
+			flat._copyBranchData(row, branch, parentRow)
+			if branch._childMap:
+				stack.append((row, iter(branch._childMap.values())))
+		return flat
+
+	def _copyBranchData(self, row, branch, parentRow):
+		if branch._extras:
+			self.extras[row] = dict(branch._extras)
+		if type(branch) is not self.defaultCls():
+			self.classes[row] = type(branch)
+
+	@staticmethod
+	def defaultCls():
+		from tree.main import Tree
+		return Tree
+
+	def childClass(self, row)->type:
+		""" class of branches created under row by lookups,
+		as TreeBase._resolve() """
+		cls = self.classes.get(row) or self.defaultCls()
+		return cls if cls.branchesInherit else cls._defaultCls()
+
+	# reading
+	def name(self, row)->Union[str, None]:
+		nameId = self.nameIds[row]
+		return None if nameId == NONE else self.names[nameId]
+
+	def childRows(self, row)->Iterator[int]:
+		child = self.firstChildren[row]
+		nextSiblings = self.nextSiblings
+		while child != NONE:
+			yield child
+			child = nextSiblings[child]
+
+	def findChild(self, row, name)->int:
+		""" return row of named child, or NONE """
+		index = self._childIndex.get(row)
+		if index is not None:
+			return index.get(name, NONE)
+		nameId = self.nameToId.get(name)
+		if nameId is None: # name used nowhere in tree
+			return NONE
+		nameIds, nextSiblings = self.nameIds, self.nextSiblings
+		child = self.firstChildren[row]
+		count = 0
+		while child != NONE:
+			if nameIds[child] == nameId:
+				return child
+			child = nextSiblings[child]
+			count += 1
+			if count > self.childIndexSize:
+				index = self._childIndex[row] = {
+					self.name(i) : i for i in self.childRows(row)}
+				return index.get(name, NONE)
+		return NONE
+
+	def iterRows(self, row=0, includeSelf=True)->Iterator[int]:
+		""" yield rows below given row in pre-order """
+		if includeSelf:
+			yield row
+		firstChildren, nextSiblings = self.firstChildren, self.nextSiblings
+		stack = []
+		child = firstChildren[row]
+		while child != NONE or stack:
+			if child == NONE:
+				child = nextSiblings[stack.pop()]
+				continue
+			yield child
+			if firstChildren[child] != NONE:
+				stack.append(child)
+				child = firstChildren[child]
+			else:
+				child = nextSiblings[child]
+
+	def depth(self, row)->int:
+		depth = 0
+		parents = self.parents
+		while parents[row] >= 0:
+			row = parents[row]
+			depth += 1
+		return depth
+
+	def address(self, row)->List[str]:
+		address = []
+		parents = self.parents
+		while parents[row] >= 0:
+			address.append(self.name(row))
+			row = parents[row]
+		return address[::-1]
+
+	# editing
+	def removeRow(self, row):
+		""" unlink row and everything below it """
+		parentRow = self.parents[row]
+		if parentRow < 0:
+			raise RuntimeError("cannot remove root of flat tree")
+		prev = NONE
+		for child in self.childRows(parentRow):
+			if child == row:
+				break
+			prev = child
+		nextRow = self.nextSiblings[row]
+		if prev == NONE:
+			self.firstChildren[parentRow] = nextRow
+		else:
+			self.nextSiblings[prev] = nextRow
+		if self.lastChildren[parentRow] == row:
+			self.lastChildren[parentRow] = prev
+		index = self._childIndex.get(parentRow)
+		if index is not None:
+			index.pop(self.name(row), None)
+		# mark removed rows, so any live views of them know
+		for i in list(self.iterRows(row)):
+			self.parents[i] = REMOVED
+			self.values[i] = None
+			self.extras.pop(i, None)
+			self._childIndex.pop(i, None)
+
+	def renameRow(self, row, name)->str:
+		""" rename row, returning its new name - as TreeBase.name,
+		names taken by siblings are incremented """
+		if name == self.name(row):
+			return name
+		parentRow = self.parents[row]
+		if parentRow >= 0 and self.findChild(parentRow, name) != NONE:
+			name = incrementName(name, {self.name(i) for i in
+			                            self.childRows(parentRow)})
+		index = self._childIndex.get(parentRow)
+		if index is not None:
+			index.pop(self.name(row), None)
+			index[name] = row
+		self.nameIds[row] = self._nameId(name)
+		return name
+
+	# output
+	def serialise(self, row=0)->dict:
+		""" serialise row and all below it,
+		identical to TreeBase.serialise() on the equivalent tree """
+		defaultCls = self.defaultCls()
+		# stack of (row, child row iterator, serialised children)
+		stack = [(row, self.childRows(row), [])]
+		while True:
+			frameRow, children, serialChildren = stack[-1]
+			child = next(children, None)
+			if child is not None:
+				stack.append((child, self.childRows(child), []))
+				continue
+			stack.pop()
+			serial = self._serialiseRow(frameRow, serialChildren, defaultCls)
+			if not stack:
+				if self.parents[frameRow] < 0:
+					serial["?FORMAT_VERSION"] = 0
+				return serial
+			stack[-1][2].append(serial)
+
+	def _serialiseRow(self, row, children, defaultCls)->dict:
+		serial = {"?NAME" : self.name(row)}
+		value = self.values[row]
+		extras = self.extras.get(row)
+		if value is None and extras and "default" in extras:
+			value = extras["default"]
+		if value is not None:
+			serial["?VALUE"] = value
+		if children:
+			serial["?CHILDREN"] = children
+		if extras:
+			serial["?EXTRAS"] = dict(extras)
+		parentRow = self.parents[row]
+		if parentRow >= 0:
+			cls = self.classes.get(row, defaultCls)
+			if cls is not self.classes.get(parentRow, defaultCls):
+				# as lib.saveObjectClass()
+				serial["objData"] = uniqueSign.join(
+					[cls.__name__, cls.__module__])
+		return serial
+
+	def toTree(self, row=0)->TreeBase:
+		""" return new live tree from row and all below it """
+		cls = self.classes.get(row, self.defaultCls())
+		return cls.fromDict(self.serialise(row))
+
+
+def _extrasOf(branch)->dict:
+	""" extras of view or live branch, without creating any """
+	if isinstance(branch, FlatBranch):
+		return branch._flat.extras.get(branch._row) or {}
+	return branch._extras or {}
+
+
+class FlatBranch(object):
+	""" view of a single branch of a FlatTree, behaving as
+	a TreeBase branch for reading, values and structure """
+
+	__slots__ = ("_flat", "_row", "__weakref__")
+
+	def __init__(self, flat:FlatTree, row:int):
+		self._flat = flat
+		self._row = row
+
+	def __repr__(self):
+		return "<{} ({}) : {}>".format(self.__class__.__name__,
+		                               self.name, self.value)
+
+	def __eq__(self, other):
+		""" equivalence of names, values, extras and branches,
+		as TreeBase.__eq__ - against other views or live branches.
+		for exact comparison use 'is' """
+		if not isinstance(other, (FlatBranch, TreeBase)):
+			return NotImplemented
+		stack = [(self, other)]
+		while stack:
+			a, b = stack.pop()
+			if a.name != b.name or a.value != b.value \
+					or _extrasOf(a) != _extrasOf(b):
+				return False
+			aBranches, bBranches = a.branches, b.branches
+			if len(aBranches) != len(bBranches):
+				return False
+			stack.extend(zip(aBranches, bBranches))
+		return True
+
+	def __hash__(self):
+		return hash((id(self._flat), self._row))
+
+	def _checkRow(self):
+		if self._flat.parents[self._row] == REMOVED:
+			raise RuntimeError("flat branch {} was removed".format(
+				self._row))
+		return self._row
+
+	@property
+	def flatTree(self)->FlatTree:
+		return self._flat
+
+	@property
+	def name(self)->str:
+		return self._flat.name(self._row)
+	@name.setter
+	def name(self, val):
+		self._flat.renameRow(self._checkRow(), str(val))
+
+	@property
+	def value(self):
+		flat, row = self._flat, self._checkRow()
+		value = flat.values[row]
+		if value is None and "default" in flat.extras.get(row, ()):
+			value = flat.values[row] = flat.extras[row]["default"]
+		return value
+	@value.setter
+	def value(self, val):
+		self._flat.values[self._checkRow()] = val
+
+	@property
+	def extras(self)->dict:
+		return self._flat.extras.setdefault(self._checkRow(), {})
+
+	@property
+	def parent(self)->Union[FlatBranch, None]:
+		parentRow = self._flat.parents[self._row]
+		return self._flat.view(parentRow) if parentRow >= 0 else None
+
+	@property
+	def root(self)->FlatBranch:
+		return self._flat.root
+
+	@property
+	def depth(self)->int:
+		return self._flat.depth(self._row)
+
+	@property
+	def address(self)->List[str]:
+		return self._flat.address(self._row)
+
+	def stringAddress(self)->str:
+		return self._flat.sep.join(self.address)
+
+	@property
+	def branches(self)->List[FlatBranch]:
+		view = self._flat.view
+		return [view(i) for i in self._flat.childRows(self._row)]
+
+	def keys(self)->List[str]:
+		name = self._flat.name
+		return [name(i) for i in self._flat.childRows(self._row)]
+
+	def iterBranches(self):
+		return ((i.name, i) for i in self.branches)
+
+	def __iter__(self):
+		return iter(self.branches)
+
+	def __len__(self):
+		return sum(1 for i in self._flat.childRows(self._row))
+
+	def __contains__(self, item):
+		return isinstance(item, FlatBranch) and item._flat is self._flat \
+			and self._flat.parents[item._row] == self._row
+
+	def _resolve(self, address, create):
+		flat = self._flat
+		row = self._checkRow()
+		for token in TreeBase._parseAddressTokens(address):
+			token = str(token)
+			if token == flat.parentToken:
+				row = flat.parents[row]
+				if row < 0:
+					if not create:
+						return None
+					raise RuntimeError("tree {} has no parent to "
+					                   "look up".format(self))
+				continue
+			child = flat.findChild(row, token)
+			if child == NONE:
+				if not create:
+					return None
+				cls = flat.childClass(row)
+				child = flat._addRow(row, token, None)
+				if cls is not flat.defaultCls():
+					flat.classes[child] = cls
+			row = child
+		return flat.view(row)
+
+	def __call__(self, *address)->FlatBranch:
+		""" look up address, creating missing branches,
+		as TreeBase.__call__() """
+		if not address:
+			return self
+		return self._resolve(address, create=True)
+
+	def getBranch(self, lookup, default=None)->Union[FlatBranch, None]:
+		found = self._resolve((lookup,), create=False)
+		return default if found is None else found
+
+	def __getitem__(self, address):
+		return self(address).value
+
+	def __setitem__(self, address, value):
+		self(address).value = value
+
+	def get(self, lookup, default=None):
+		branch = self.getBranch(lookup)
+		return default if branch is None else branch.value
+
+	def iterAllBranches(self, includeSelf=True)->Iterator[FlatBranch]:
+		""" yield views of all branches below this one in pre-order -
+		use FlatTree.iterRows() to avoid making views """
+		view = self._flat.view
+		return (view(i) for i in self._flat.iterRows(
+			self._checkRow(), includeSelf))
+
+	def allBranches(self, includeSelf=True)->List[FlatBranch]:
+		return list(self.iterAllBranches(includeSelf))
+
+	def addChild(self, branch:Union[TreeBase, FlatBranch])->FlatBranch:
+		""" copy live or flat branch and everything below it
+		in as a new child - as TreeBase.addChild(), a name taken
+		by a sibling is incremented """
+		if isinstance(branch, FlatBranch):
+			branch = branch._flat.toTree(branch._row)
+		flat = self._flat
+		row = self._checkRow()
+		name = branch._name
+		if name is not None and flat.findChild(row, name) != NONE:
+			name = incrementName(name, {flat.name(i) for i in
+			                            flat.childRows(row)})
+		new = FlatTree.fromTree(branch)
+		offset = len(flat)
+		for newRow in new.iterRows():
+			parentRow = new.parents[newRow]
+			added = flat._addRow(row if parentRow == NONE
+			                     else parentRow + offset,
+			                     name if parentRow == NONE
+			                     else new.name(newRow), new.values[newRow])
+			if newRow in new.extras:
+				flat.extras[added] = new.extras[newRow]
+			if newRow in new.classes:
+				flat.classes[added] = new.classes[newRow]
+		return flat.view(offset)
+
+	def remove(self)->FlatBranch:
+		""" remove this branch from its flat tree - views of it
+		and everything below it become unusable """
+		self._flat.removeRow(self._checkRow())
+		return self
+
+	def serialise(self)->dict:
+		return self._flat.serialise(self._checkRow())
+
+	def toTree(self)->TreeBase:
+		""" return new live tree of this branch and all below it """
+		return self._flat.toTree(self._checkRow())
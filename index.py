@@ -0,0 +1,303 @@
+""" indexes over whole trees, kept up to date as the tree changes
+
+indexes are TreeObservers held on the root - see TreeBase.addObserver().
+They are built by one walk of the tree, then updated incrementally
+by each add, remove, rename, value or extras change
+"""
+from __future__ import annotations
+
+from bisect import bisect_left
+from typing import List
+
+from tree.core import TreeBase, TreeObserver, _missing
+
+
+class NameIndex(TreeObserver):
+	""" index of every named branch in a tree, by name
+
+	exact lookups are a single dict access. Distinct names are also
+	kept sorted, so prefix lookups are a bisect, and substring lookups
+	check each distinct name once - never walking branches.
+
+	Most branches have a unique name, so each name maps directly
+	to its branch until a second branch shares it.
+
+	The sorted list is updated lazily - names added since the last
+	query are merged in (or the list re-sorted, if there are many),
+	and names no longer used are skipped until they make up half
+	the list
+	"""
+
+	def __init__(self, root:TreeBase):
+		self.root = root
+		# name : branch, or {id(branch) : branch} for shared names
+		self._branches = {}
+		self._sorted = []
+		self._pending = [] # names added since last sort
+		self._stale = 0 # names in _sorted no longer in index
+		for branch in root.iterAllBranches(includeSelf=True):
+			self._add(branch)
+		self._sorted = sorted(self._branches)
+		self._pending = []
+
+	@classmethod
+	def forTree(cls, tree:TreeBase, create=True)->NameIndex:
+		""" return name index of tree's root, building it if needed """
+		for observer in tree.root._observers or ():
+			if isinstance(observer, cls):
+				return observer
+		if not create:
+			return None
+		return tree.addObserver(cls(tree.root))
+
+	def __len__(self):
+		return len(self._branches)
+
+	def _add(self, branch):
+		name = branch._name
+		if not name:
+			return
+		found = self._branches.get(name)
+		if found is None:
+			self._branches[name] = branch
+			self._pending.append(name)
+		elif isinstance(found, dict):
+			found[id(branch)] = branch
+		elif found is not branch:
+			self._branches[name] = {id(found) : found, id(branch) : branch}
+
+	def _discard(self, branch, name):
+		if not name:
+			return
+		found = self._branches.get(name)
+		if found is branch:
+			del self._branches[name]
+			self._stale += 1
+		elif isinstance(found, dict):
+			found.pop(id(branch), None)
+			if len(found) == 1:
+				self._branches[name] = next(iter(found.values()))
+
+	# observer events
+	def branchAdded(self, branch):
+		for i in branch.iterAllBranches(includeSelf=True):
+			self._add(i)
+
+	def branchRemoved(self, branch, parent):
+		for i in branch.iterAllBranches(includeSelf=True):
+			self._discard(i, i._name)
+
+	def branchRenamed(self, branch, oldName, newName):
+		self._discard(branch, oldName)
+		self._add(branch)
+
+	def detach(self):
+		self.root = None
+
+	# queries
+	def _sortedNames(self)->List[str]:
+		""" return sorted list of distinct names, which may still
+		contain names no longer in the index """
+		if self._stale * 2 > len(self._sorted) or \
+				len(self._pending) * 16 > len(self._sorted):
+			self._sorted = sorted(self._branches)
+			self._stale = 0
+		else:
+			names = self._sorted
+			for name in set(self._pending):
+				if name not in self._branches:
+					continue
+				i = bisect_left(names, name)
+				if i < len(names) and names[i] == name: # was stale
+					self._stale -= 1
+				else:
+					names.insert(i, name)
+		self._pending = []
+		return self._sorted
+
+	def namesWithPrefix(self, prefix)->List[str]:
+		names = self._sortedNames()
+		found = []
+		for i in range(bisect_left(names, prefix), len(names)):
+			name = names[i]
+			if not name.startswith(prefix):
+				break
+			found.append(name)
+		return [i for i in found if i in self._branches]
+
+	def namesContaining(self, part)->List[str]:
+		names = self._sortedNames()
+		return [i for i in names if part in i and i in self._branches]
+
+	def branchesNamed(self, names)->List[TreeBase]:
+		""" return all branches with any of the given names """
+		result = []
+		for name in names:
+			found = self._branches.get(name)
+			if found is None:
+				continue
+			if isinstance(found, dict):
+				result.extend(found.values())
+			else:
+				result.append(found)
+		return result
+
+	def search(self, path, mode="substring")->List[TreeBase]:
+		"""
+		:param mode : "substring", "prefix" or "exact"
+		"""
+		if mode == "exact":
+			names = (path,)
+		elif mode == "prefix":
+			names = self.namesWithPrefix(path)
+		elif mode == "substring":
+			names = self.namesContaining(path)
+		else:
+			raise ValueError("unknown search mode {}".format(mode))
+		return self.branchesNamed(names)
+
+
+class AttributeIndex(TreeObserver):
+	""" index of every branch in a tree by one of its attributes -
+	value, active, readOnly or a key in extras
+
+	branches are grouped by attribute value and its type, as dict keys,
+	so 1, True and 1.0 are found apart - values that cannot be hashed
+	are kept apart, and compared one by one on lookup.
+	Branches without the key in their extras are not indexed.
+	The value index follows extras["default"], which stands in
+	for a value of None
+
+	Values mutated in place, without being set again,
+	are not detected
+	"""
+
+	# attributes that report changes - see TreeObserver
+	attributes = ("value", "active", "readOnly")
+
+	def __init__(self, root:TreeBase, key:str):
+		self.root = root
+		self.key = key
+		self.getValue = self.getterFor(key)
+		if key.startswith("extras."):
+			self.extrasKey = key[len("extras."):]
+		else:
+			self.extrasKey = None
+		# (type(value), value) : {id(branch) : branch}
+		self._byValue = {}
+		# id(branch) : branch, for unhashable values
+		self._unhashable = {}
+		for branch in root.iterAllBranches(includeSelf=True):
+			self._insert(branch, self.getValue(branch))
+
+	@classmethod
+	def getterFor(cls, key:str):
+		""" return function getting key's value from a branch,
+		or _missing """
+		if key.startswith("extras."):
+			extrasKey = key[len("extras."):]
+			return lambda branch: (branch._extras or {}).get(
+				extrasKey, _missing)
+		if key not in cls.attributes:
+			raise KeyError("cannot index by {}, options are {} "
+			               "or extras.<key>".format(key, cls.attributes))
+		return lambda branch: getattr(branch, key)
+
+	@staticmethod
+	def matches(found, value)->bool:
+		""" do indexed value found and queried value match """
+		return type(found) is type(value) and found == value
+
+	@classmethod
+	def forTree(cls, tree:TreeBase, key:str, create=True)->AttributeIndex:
+		""" return tree root's index for key, building it if needed """
+		for observer in tree.root._observers or ():
+			if isinstance(observer, cls) and observer.key == key:
+				return observer
+		if not create:
+			return None
+		return tree.addObserver(cls(tree.root, key))
+
+	def _insert(self, branch, value):
+		if value is _missing:
+			return
+		key = (type(value), value)
+		try:
+			group = self._byValue.get(key)
+		except TypeError:
+			self._unhashable[id(branch)] = branch
+			return
+		if group is None:
+			group = self._byValue[key] = {}
+		group[id(branch)] = branch
+
+	def _discard(self, branch, value):
+		if value is _missing:
+			return
+		key = (type(value), value)
+		try:
+			group = self._byValue.get(key)
+		except TypeError:
+			self._unhashable.pop(id(branch), None)
+			return
+		if group is not None:
+			group.pop(id(branch), None)
+			if not group:
+				del self._byValue[key]
+
+	def _update(self, branch, oldValue, newValue):
+		self._discard(branch, oldValue)
+		self._insert(branch, newValue)
+
+	# observer events
+	def branchAdded(self, branch):
+		for i in branch.iterAllBranches(includeSelf=True):
+			self._insert(i, self.getValue(i))
+
+	def branchRemoved(self, branch, parent):
+		for i in branch.iterAllBranches(includeSelf=True):
+			self._discard(i, self.getValue(i))
+
+	def valueChanged(self, branch, oldValue, newValue):
+		if self.key == "value":
+			self._update(branch, oldValue, newValue)
+
+	valueRetyped = valueChanged
+
+	def extrasChanged(self, branch, key, oldValue, newValue):
+		if key == self.extrasKey:
+			self._update(branch, oldValue, newValue)
+		elif key == "default" and self.key == "value" \
+				and branch._value is None:
+			# default is read as the value of None
+			self._update(branch,
+			             None if oldValue is _missing else oldValue,
+			             None if newValue is _missing else newValue)
+
+	def attributeChanged(self, branch, attr, oldValue, newValue):
+		if attr == self.key:
+			self._update(branch, oldValue, newValue)
+
+	def detach(self):
+		self.root = None
+
+	# queries
+	def find(self, value)->List[TreeBase]:
+		""" return all branches whose value for key equals value,
+		and is of the same type """
+		try:
+			found = list(self._byValue.get((type(value), value), {}).values())
+		except TypeError:
+			found = []
+		if self._unhashable:
+			found.extend(i for i in self._unhashable.values()
+			             if self.matches(self.getValue(i), value))
+		return found
+
+	def values(self)->list:
+		""" return distinct hashable values in the index """
+		return [i[1] for i in self._byValue]
+
+	def __len__(self):
+		return sum(len(i) for i in self._byValue.values()) + \
+		       len(self._unhashable)
@@ -0,0 +1,271 @@
+""" append-only journal of changes to a tree, for crash recovery
+without rewriting the whole tree on every change
+
+a journaled tree is kept as two files:
+	checkpoint - the whole tree, as serialise() json,
+		with the generation number of the journal following it
+	journal - one compact json record per line for each value set,
+		rename, add, remove, reorder and extras change since then
+
+loading reads the checkpoint and replays the journal over it.
+compact() folds the journal into a new checkpoint - each file is
+replaced atomically, and a journal is only replayed over the checkpoint
+of its own generation, so a crash at any point loses at most the last
+partly written record
+
+	journal = TreeJournal(tree, "scene.tree")
+	tree("branch").value = 3 # appended to scene.tree.journal
+	journal.compact()
+	journal = TreeJournal.open("scene.tree")
+	journal.tree("branch").value
+"""
+from __future__ import annotations
+
+import json, os
+
+from tree.core import TreeBase, TreeObserver, _missing
+from tree.lib import saveObjectClass, loadObjectClass
+
+# record kinds - [kind, address, ...]
+(HEADER, VALUE, RENAME, ADD, REMOVE, REORDER,
+ EXTRAS_SET, EXTRAS_DEL) = "gvnarosd"
+
+_encoder = json.JSONEncoder(separators=(",", ":"))
+
+
+def _address(branch:TreeBase)->list:
+	""" names from root to branch, without the root """
+	return list(branch._getLocation()[2])
+
+
+def _branchAt(root:TreeBase, address:list)->TreeBase:
+	""" direct walk of names, never creating branches """
+	branch = root
+	for name in address:
+		branch = branch._readMap()[name]
+	return branch
+
+
+def _writeAtomic(path:str, text:str):
+	tempPath = path + ".tmp"
+	with open(tempPath, "w") as f:
+		f.write(text)
+		f.flush()
+		os.fsync(f.fileno())
+	os.replace(tempPath, path)
+
+
+def _dropTornRecord(path:str):
+	""" cut a last line left partly written by a crash from journal file,
+	so records appended after it start on a line of their own """
+	if not os.path.exists(path):
+		return
+	with open(path, "rb+") as f:
+		data = f.read()
+		end = data.rfind(b"\n") + 1
+		if end < len(data):
+			f.truncate(end)
+			f.flush()
+			os.fsync(f.fileno())
+
+
+def applyRecord(root:TreeBase, record:list):
+	""" apply one journal record to tree """
+	kind, address = record[0], record[1]
+	if kind == ADD:
+		parent = _branchAt(root, address)
+		index, objData, serial = record[2:]
+		cls = loadObjectClass(objData) or type(parent)._defaultCls()
+		parent.addChild(cls.fromDict(serial), index=index, force=True)
+		return
+	branch = _branchAt(root, address)
+	if kind == VALUE:
+		branch.value = record[2]
+	elif kind == RENAME:
+		branch.name = record[2]
+	elif kind == REMOVE:
+		branch.remove()
+	elif kind == REORDER:
+		branch.setIndex(record[2])
+	elif kind == EXTRAS_SET:
+		branch.extras[record[2]] = record[3]
+	elif kind == EXTRAS_DEL:
+		del branch.extras[record[2]]
+	else:
+		raise ValueError("unknown journal record {}".format(record))
+
+
+def readJournal(path:str):
+	""" return (generation, list of records) from journal file -
+	a last line cut short by a crash is dropped """
+	generation, records = None, []
+	if not os.path.exists(path):
+		return generation, records
+	with open(path, "r") as f:
+		lines = f.readlines()
+	for i, line in enumerate(lines):
+		try:
+			record = json.loads(line)
+		except ValueError:
+			if i == len(lines) - 1:
+				break
+			raise
+		if record[0] == HEADER:
+			generation = record[1]
+		else:
+			records.append(record)
+	return generation, records
+
+
+def loadTree(path:str, journalPath=None, cls=None)->TreeBase:
+	""" return tree from checkpoint, with any journal of the
+	same generation replayed over it """
+	return TreeJournal._load(path, journalPath, cls)[0]
+
+
+class TreeJournal(TreeObserver):
+	""" observer appending each change of a tree to a journal file
+
+	values and extras must be json serialisable, as for serialise(),
+	and changes made inside mutable values are not seen - values that
+	are not are refused before they are set
+	branches are saved with their own serialise(), so classes
+	redefining it keep their state
+	:param sync : fsync after every record - otherwise records are
+	flushed to the os, and survive the process but not the machine
+	"""
+
+	def __init__(self, tree:TreeBase, path:str, journalPath=None,
+	             sync=False, _generation=None):
+		self.tree = tree.root
+		self.path = path
+		self.journalPath = journalPath or path + ".journal"
+		self.sync = sync
+		self._file = None
+		self._pending = None
+		if _generation is None:
+			# start from a checkpoint of the tree as it is now
+			self.generation = self._checkpointGeneration() + 1
+			self._writeCheckpoint()
+			self._startJournal()
+		else:
+			self.generation = _generation
+			self._file = open(self.journalPath, "a")
+		self.tree.addObserver(self)
+
+	@classmethod
+	def open(cls, path:str, journalPath=None, sync=False,
+	         treeCls=None)->TreeJournal:
+		""" load tree from checkpoint and journal,
+		and continue journaling its changes """
+		tree, generation, current = cls._load(path, journalPath, treeCls)
+		if current:
+			_dropTornRecord(journalPath or path + ".journal")
+		journal = cls(tree, path, journalPath, sync=sync,
+		              _generation=generation)
+		if not current:
+			# journal predates checkpoint, start its generation afresh
+			journal._startJournal()
+		return journal
+
+	@classmethod
+	def _load(cls, path, journalPath=None, treeCls=None):
+		""" return (tree, generation, journal matches checkpoint) """
+		if treeCls is None:
+			from tree.main import Tree
+			treeCls = Tree
+		with open(path, "r") as f:
+			checkpoint = json.load(f)
+		treeCls = loadObjectClass(checkpoint["objData"]) or treeCls
+		tree = treeCls.fromDict(checkpoint["tree"])
+		generation = checkpoint["generation"]
+		journalGeneration, records = readJournal(
+			journalPath or path + ".journal")
+		if journalGeneration != generation:
+			return tree, generation, False
+		for record in records:
+			applyRecord(tree, record)
+		return tree, generation, True
+
+	def _checkpointGeneration(self)->int:
+		if not os.path.exists(self.path):
+			return 0
+		with open(self.path, "r") as f:
+			return json.load(f)["generation"]
+
+	def _writeCheckpoint(self):
+		_writeAtomic(self.path, _encoder.encode(
+			{"generation" : self.generation,
+			 "objData" : saveObjectClass(self.tree),
+			 "tree" : self.tree.serialise()}))
+
+	def _startJournal(self):
+		if self._file is not None:
+			self._file.close()
+		_writeAtomic(self.journalPath,
+		             _encoder.encode([HEADER, self.generation]) + "\n")
+		self._file = open(self.journalPath, "a")
+
+	def _append(self, record:list):
+		self._write(_encoder.encode(record))
+
+	def _write(self, text:str):
+		self._file.write(text + "\n")
+		self._file.flush()
+		if self.sync:
+			os.fsync(self._file.fileno())
+
+	def compact(self):
+		""" write tree to a new checkpoint and empty the journal """
+		self.generation += 1
+		self._writeCheckpoint()
+		self._startJournal()
+
+	def close(self):
+		""" stop journaling - files are left as they are """
+		self.tree.removeObserver(self)
+		self.detach()
+
+	def detach(self):
+		if self._file is not None:
+			self._file.close()
+			self._file = None
+
+	# observer events
+	def branchAdded(self, branch):
+		parent = branch._parent
+		self._append([ADD, _address(parent), parent.index(branch._name),
+		              saveObjectClass(branch), branch.serialise()])
+
+	def branchRemoved(self, branch, parent):
+		self._append([REMOVE, _address(parent) + [branch._name]])
+
+	def branchRenamed(self, branch, oldName, newName):
+		parent = branch._parent
+		address = _address(parent) + [oldName] if parent is not None else []
+		self._append([RENAME, address, newName])
+
+	def branchReordered(self, branch, oldIndex, newIndex):
+		self._append([REORDER, _address(branch), newIndex])
+
+	def checkValue(self, branch, value):
+		# encoded before the value is set, so one json cannot hold
+		# raises with the branch unchanged
+		self._pending = (branch, value,
+		                 _encoder.encode([VALUE, _address(branch), value]))
+
+	def valueChanged(self, branch, oldValue, newValue):
+		pending, self._pending = self._pending, None
+		if pending is not None and pending[0] is branch \
+				and pending[1] is newValue:
+			self._write(pending[2])
+		else:
+			self._append([VALUE, _address(branch), newValue])
+
+	valueRetyped = valueChanged
+
+	def extrasChanged(self, branch, key, oldValue, newValue):
+		if newValue is _missing:
+			self._append([EXTRAS_DEL, _address(branch), key])
+		else:
+			self._append([EXTRAS_SET, _address(branch), key, newValue])
@@ -222,6 +222,92 @@ def incrementName(name, currentNames=None):
 	return name
 
 
+# exact types only - subclasses may add mutable state
+immutableTypes = {type(None), bool, int, float, complex,
+                  str, bytes, frozenset, range}
+
+def isImmutable(obj):
+	""" check if object can never change, so is safe to share
+	tuples are only immutable if everything in them is """
+	if type(obj) in immutableTypes:
+		return True
+	if type(obj) is tuple:
+		return all(isImmutable(i) for i in obj)
+	return False
+
+
+class InternPool(object):
+	""" single shared instances of equal names and values -
+	see TreeBase.setInternPool()
+
+	values are only pooled if they are numbers, or strings or bytes
+	of at most maxValueLength, keyed by type so 1, 1.0 and True stay
+	distinct. Once maxValues are held, only values already pooled are
+	shared, so a long-lived pool stays bounded. NaN is never pooled,
+	as it equals nothing
+	"""
+
+	internTypes = (str, bytes, int, float)
+	maxValueLength = 64
+	maxValues = 1 << 16
+
+	def __init__(self):
+		self.names = {}
+		self.values = {}
+
+	def __len__(self):
+		return len(self.names) + len(self.values)
+
+	def name(self, name):
+		if name is None:
+			return None
+		return self.names.setdefault(name, name)
+
+	def value(self, value):
+		t = type(value)
+		if t not in self.internTypes:
+			return value
+		if t is float and (value == 0.0 or value != value):
+			return value # keep sign of zero, nan is never equal
+		if (t is str or t is bytes) and len(value) > self.maxValueLength:
+			return value
+		if len(self.values) >= self.maxValues:
+			return self.values.get((t, value), value)
+		return self.values.setdefault((t, value), value)
+
+
+_slottedClasses = {}
+
+def isSlotted(cls):
+	""" check if every class in cls's hierarchy declares __slots__,
+	and none of them a __dict__ slot - so instances have no attributes
+	but their slots """
+	if cls not in _slottedClasses:
+		_slottedClasses[cls] = all(
+			"__slots__" in vars(i) and "__dict__" not in vars(i)["__slots__"]
+			for i in cls.__mro__ if i is not object)
+	return _slottedClasses[cls]
+
+
+# object.__getstate__ reads instance dicts without creating them -
+# python 3.11 and later
+_objectGetState = getattr(object, "__getstate__", None)
+
+def instanceDict(obj):
+	""" return obj's instance attribute dict if it has a non-empty one,
+	else None
+	reading obj.__dict__ would allocate a dict on every instance that
+	has none - this only happens before python 3.11 """
+	if isSlotted(type(obj)):
+		return None
+	if _objectGetState is None:
+		return obj.__dict__ or None
+	state = _objectGetState(obj)
+	if type(state) is tuple: # (dict or None, slots)
+		state = state[0]
+	return state or None
+
+
 def safeLoadModule(modName, force=False, logFunction=None):
 	"""takes string name of module
 	"""
@@ -232,7 +318,7 @@ def safeLoadModule(modName, force=False, logFunction=None):
 		return sys.modules[modName]
 	try:
 		module = importlib.import_module(modName)
-	except ImportError() as e:
+	except ImportError as e:
 		logFunction("ERROR in loading module {}".format(modName))
 		logFunction("error is {}".format(str(e)))
 	return module
@@ -260,15 +346,37 @@ def saveObjectClass(obj, regenFunc="fromDict", relative=True, uniqueKey=True,
 	return data
 
 
+# objData string : class, filled as classes are loaded
+# or by registerClass() - clear if modules are reloaded.
+# classes that failed to load are held as None, so each is only
+# imported and reported once
+classRegistry = {}
+
+def registerClass(cls, objData=None):
+	""" register class for loadObjectClass() to return without importing
+	:param objData : string to register under, by default the one
+	saveObjectClass() writes for instances of cls
+	returns cls, so may be used as a class decorator """
+	if objData is None:
+		objData = uniqueSign.join([cls.__name__, cls.__module__])
+	classRegistry[objData] = cls
+	return cls
+
+
 def loadObjectClass(objData):
 	""" recreates a class object from any known module 
 	:param objData : dict of form {
 		"?MODULE" : module path,
 		"?CLASS" : class name, }
 		OR
-		tuple of (class name, module path) """
+		tuple of (class name, module path)
+	each class is only resolved once, see classRegistry """
 
-	if isinstance(objData, dict):
+	if isinstance(objData, string_types):
+		if objData in classRegistry:
+			return classRegistry[objData]
+		className, path = objData.split(uniqueSign)
+	elif isinstance(objData, dict):
 		for i in ("?MODULE", "?CLASS"):
 			if not objData.get(i):
 				print("objectData {} has no key {}, cannot reload class".format(objData, i))
@@ -281,17 +389,21 @@ def loadObjectClass(objData):
 		# sequence [ class, modulepath, regenFn ]
 		path = objData[1]
 		className = objData[0]
-	elif isinstance(objData, string_types):
-		className, path = objData.split(uniqueSign)
+
+	key = uniqueSign.join([className, path])
+	if key in classRegistry:
+		return classRegistry[key]
 
 	#module = convertRootPath( path, toAbsolute=True)
 	module = path
-	loadedModule = safeLoadModule(module)
+	loadedModule = sys.modules.get(module) or safeLoadModule(module)
 	try:
 		newClass = getattr(loadedModule, className)
-		return newClass
 	except Exception as e:
-		print("ERROR in reloading class {} from module {}")
+		print("ERROR in reloading class {} from module {}".format(
+			className, module))
 		print("has it moved, or module files been shifted?")
 		print( "error is {}".format(str(e)) )
-		return None
\ No newline at end of file
+		newClass = None
+	classRegistry[key] = newClass
+	return newClass
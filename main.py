@@ -4,7 +4,7 @@
 from tree.core import TreeBase
 
 class Tree(TreeBase):
-	pass
+	__slots__ = ()
 
 	@classmethod
 	def _defaultCls(cls):
@@ -0,0 +1,486 @@
+""" serialising trees across processes
+
+json encoding is bound to one core by the GIL - here branches at a
+given depth are encoded in worker processes, while the levels above
+are written in this process, and the encoded subtrees spliced into
+their ?CHILDREN lists.
+
+Workers encode each branch with serialise(), as this process would.
+Given an executor, branches are pickled to it, without signals or
+observers (see TreeBase.__reduce_ex__()). Without one, a pool is made
+for the call, by the platform's default start method unless fork=True
+is given - when its workers are forked they inherit the tree itself,
+and are only sent addresses, so nothing is packed in this process
+
+	text = tree.serialiseParallel()
+	text == json.dumps(tree.serialise())
+
+loading is split the same way - the root's ?CHILDREN entries are found
+by vectorised scans of the saved bytes in workers, each is decoded
+by a worker into a flat list of plain tuples, and the branches built
+here, by the same rules as fromDict(). Loading requires numpy
+
+	tree = Tree.loadParallel("big.json")
+"""
+from __future__ import annotations
+
+import io, json, marshal, mmap, multiprocessing, os
+from concurrent.futures import ProcessPoolExecutor
+
+from tree.core import TreeBase
+from tree.lib import saveObjectClass, loadObjectClass
+from tree.stream import JsonTreeWriter
+
+# subtrees sent to each worker call, per worker
+tasksPerWorker = 4
+
+# tree inherited by forked workers
+_sharedTree = None
+
+# bytes of saved text scanned at once when loading
+scanChunkSize = 1 << 26
+
+
+def _workerCount(workers=None)->int:
+	""" workers, or one per cpu by default, as ProcessPoolExecutor """
+	return workers or os.cpu_count() or 1
+
+
+def _groups(items:list, workers:int)->list:
+	""" split items into consecutive runs, a few for each worker """
+	nGroups = max(1, min(len(items), workers * tasksPerWorker))
+	size, extra = divmod(len(items), nGroups)
+	groups, start = [], 0
+	for i in range(nGroups):
+		end = start + size + (1 if i < extra else 0)
+		groups.append(items[start:end])
+		start = end
+	return groups
+
+
+def _branchSerial(branch:TreeBase, objData=None)->dict:
+	""" return serialise() of branch as a child of its parent -
+	objData is given for branches sent without their parent """
+	serial = branch._serialiseBranchV0()
+	if objData:
+		serial["objData"] = objData
+	return serial
+
+
+def _encodeSubtrees(branches:list, separators)->list:
+	""" worker - return json text of each (branch, objData) """
+	encode = json.JSONEncoder(separators=separators).encode
+	return [encode(_branchSerial(*i)) for i in branches]
+
+
+def _setSharedTree(tree:TreeBase):
+	""" worker initializer - tree is inherited, not pickled, when forked """
+	global _sharedTree
+	_sharedTree = tree
+
+
+def _encodeShared(addresses:list, separators)->list:
+	""" worker - return json text of each branch of shared tree """
+	branches = []
+	for address in addresses:
+		branch = _sharedTree
+		for name in address:
+			branch = branch._readMap()[name]
+		branches.append((branch, None))
+	return _encodeSubtrees(branches, separators)
+
+
+def _sentSubtree(branch:TreeBase)->tuple:
+	""" return (branch, objData) to pickle to a worker -
+	the unpickled branch has no parent to compare its class to """
+	objData = None
+	if branch._parent is not None and \
+			type(branch._parent) is not type(branch):
+		objData = saveObjectClass(branch)
+	return branch, objData
+
+
+class ParallelJsonWriter(JsonTreeWriter):
+	""" writes the same json as JsonTreeWriter, with branches
+	at splitDepth encoded by an executor
+	:param workers : number of processes of executor
+	:param shared : executor's workers hold the tree written,
+	through _setSharedTree() """
+
+	def __init__(self, fp, executor, splitDepth=1,
+	             separators=(", ", ": "), shared=False, workers=None):
+		super(ParallelJsonWriter, self).__init__(fp, separators=separators)
+		self.executor = executor
+		self.workers = _workerCount(workers)
+		self.splitDepth = max(1, splitDepth)
+		self.separators = separators
+		self.shared = shared
+		self._top = None
+
+	def _write(self, *pieces):
+		self._buffer.extend(pieces)
+
+	def _split(self, branches:list)->list:
+		""" return futures of encoded text for groups of branches """
+		futures = []
+		topDepth = self._top._getLocation()[1]
+		for group in _groups(branches, self.workers):
+			if self.shared:
+				addresses = [b._getLocation()[2][topDepth:] for b in group]
+				futures.append(self.executor.submit(
+					_encodeShared, addresses, self.separators))
+			else:
+				futures.append(self.executor.submit(
+					_encodeSubtrees, [_sentSubtree(b) for b in group],
+					self.separators))
+		return futures
+
+	def write(self, tree:TreeBase):
+		""" write tree, leaving a slot in the buffer for each
+		split branch, then fill them from the executor """
+		if type(tree).serialise is not TreeBase.serialise:
+			super(ParallelJsonWriter, self).write(tree)
+			return
+		self._top = tree
+		slots, split = [], []
+		# stack of (branch, branch iterator, first child written, depth)
+		stack = []
+		if self._openBranch(tree):
+			stack.append([tree, iter(tree._readMap().values()), False, 0])
+		else:
+			self._closeBranch(tree, False)
+		while stack:
+			frame = stack[-1]
+			branch = next(frame[1], None)
+			if branch is None:
+				stack.pop()
+				self._closeBranch(frame[0], True)
+				continue
+			if frame[2]:
+				self._write(self.itemSep)
+			frame[2] = True
+			depth = frame[3] + 1
+			if type(branch).serialise is not TreeBase.serialise:
+				self._writeOverridden(branch)
+			elif depth >= self.splitDepth:
+				slots.append(len(self._buffer))
+				split.append(branch)
+				self._write(None)
+			elif self._openBranch(branch):
+				stack.append(
+					[branch, iter(branch._readMap().values()), False, depth])
+			else:
+				self._closeBranch(branch, False)
+
+		slotIter = iter(slots)
+		for future in self._split(split):
+			for text in future.result():
+				self._buffer[next(slotIter)] = text
+		self.flush()
+
+
+def serialiseParallel(tree:TreeBase, executor=None, splitDepth=1,
+                      workers=None, fork=False)->str:
+	""" return json text of tree, identical to json.dumps(tree.serialise())
+	:param executor : concurrent.futures executor - by default
+	a ProcessPoolExecutor is made for this call
+	:param splitDepth : depth below tree of branches encoded separately
+	:param workers : number of processes, of executor or of the pool made -
+	by default one per cpu
+	:param fork : make the pool with the fork start method, rather than
+	the platform's default """
+	buffer = io.StringIO()
+	workers = _workerCount(workers)
+	if executor is None:
+		context = multiprocessing.get_context("fork" if fork else None)
+		shared = context.get_start_method() == "fork"
+		if shared:
+			executor = ProcessPoolExecutor(
+				workers, mp_context=context,
+				initializer=_setSharedTree, initargs=(tree,))
+		else:
+			executor = ProcessPoolExecutor(workers, mp_context=context)
+		with executor:
+			ParallelJsonWriter(buffer, executor, splitDepth,
+			                   shared=shared, workers=workers).write(tree)
+	else:
+		ParallelJsonWriter(buffer, executor, splitDepth,
+		                   workers=workers).write(tree)
+	return buffer.getvalue()
+
+
+def _openMap(path:str)->mmap.mmap:
+	with open(path, "rb") as f:
+		return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _isChildrenKey(data, pos:int)->bool:
+	""" check that list opening at pos is the value of a ?CHILDREN key """
+	key = b'"?CHILDREN"'
+	pos -= 1
+	while pos >= 0 and data[pos] in b" \t\r\n":
+		pos -= 1
+	if pos < 0 or data[pos] != ord(":"):
+		return False
+	pos -= 1
+	while pos >= 0 and data[pos] in b" \t\r\n":
+		pos -= 1
+	return data[pos - len(key) + 1:pos + 1] == key
+
+
+def _scanBrackets(buf, start:int, end:int)->tuple:
+	""" scan buf[start:end] of json text, as if outside any string
+	return (count of quotes, bracket positions, bracket bytes,
+	parity of quotes before each bracket in range)
+
+	quotes escaped by an odd run of backslashes are not counted. utf-8
+	never uses ascii bytes within other characters, so this needs
+	no decoding """
+	import numpy as np
+	chunk = buf[start:end]
+	quotes = np.flatnonzero(chunk == ord('"')) + start
+	escaped = quotes[buf[np.maximum(quotes - 1, 0)] == ord("\\")]
+	if len(escaped):
+		drop = []
+		for pos in escaped.tolist():
+			run = 1
+			while pos - run > 0 and buf[pos - run - 1] == ord("\\"):
+				run += 1
+			if run % 2:
+				drop.append(pos)
+		quotes = np.setdiff1d(quotes, drop, assume_unique=True)
+	# "[" and "]" fold onto "{" and "}", and nothing else does
+	folded = chunk | 0x20
+	brackets = np.flatnonzero((folded == ord("{")) | (folded == ord("}")))
+	brackets += start
+	parity = (np.searchsorted(quotes, brackets) & 1).astype(np.uint8)
+	return len(quotes), brackets, buf[brackets], parity
+
+
+def _scanFile(path:str, start:int, end:int)->list:
+	""" worker - _scanBrackets() of each chunk of file range """
+	import numpy as np
+	data = _openMap(path)
+	try:
+		buf = np.frombuffer(data, dtype=np.uint8)
+		scans = [_scanBrackets(buf, i, min(i + scanChunkSize, end))
+		         for i in range(start, end, scanChunkSize)]
+		del buf
+	finally:
+		data.close()
+	return scans
+
+
+def _topBranches(data, scans:list)->tuple:
+	""" return findTopBranches() result from _scanBrackets() of
+	consecutive ranges covering data """
+	import numpy as np
+	if not scans:
+		return None
+	positions, chars = [], []
+	inString = 0
+	for nQuotes, brackets, bracketChars, parity in scans:
+		outside = parity == inString
+		positions.append(brackets[outside])
+		chars.append(bracketChars[outside])
+		inString = (inString + nQuotes) % 2
+	brackets = np.concatenate(positions)
+	chars = np.concatenate(chars)
+	# opening brackets have bit 0x02 set, "{" and "}" have bit 0x20
+	step = np.where(chars & 0x02, 1, -1)
+	depthAfter = np.cumsum(step)
+	depthBefore = depthAfter - step
+	curly = (chars & 0x20) != 0
+
+	# lists on the root itself - ?CHILDREN and any in root values
+	rootLists = ~curly & ((depthBefore == 1) & (step == 1)
+	                      | (depthAfter == 1) & (step == -1))
+	listStart = listEnd = None
+	for pos, isOpen in zip(brackets[rootLists].tolist(),
+	                       (step[rootLists] == 1).tolist()):
+		if isOpen and listStart is None and _isChildrenKey(data, pos):
+			listStart = pos
+		elif not isOpen and listStart is not None and listEnd is None:
+			listEnd = pos + 1
+	if listStart is None:
+		return None
+	inList = (brackets > listStart) & (brackets < listEnd)
+	starts = brackets[inList & curly & (depthBefore == 2) & (step == 1)]
+	ends = brackets[inList & curly & (depthAfter == 2) & (step == -1)] + 1
+	return listStart, listEnd, list(zip(starts.tolist(), ends.tolist()))
+
+
+def findTopBranches(data)->tuple:
+	""" find the root's ?CHILDREN list in json text of a serialised tree
+	return (list start, list end, [(start, end) of each child]),
+	or None if root has no children
+
+	quotes not escaped toggle strings, brackets outside strings step
+	the depth, and the root's children are the objects opening at
+	depth 2 inside its ?CHILDREN list """
+	import numpy as np
+	buf = np.frombuffer(data, dtype=np.uint8)
+	scans = [_scanBrackets(buf, i, min(i + scanChunkSize, len(buf)))
+	         for i in range(0, len(buf), scanChunkSize)]
+	del buf
+	return _topBranches(data, scans)
+
+
+def _flattenDict(regenDict:dict, flat:list):
+	""" append (name, value, extras, objData, child count) of serialised
+	branch and all below it to flat, in pre-order -
+	branches fromDict() skips are left out, see TreeBase._branchFromDict() """
+	# stack of [dict, index of its entry in flat]
+	stack = [(regenDict, None)]
+	while stack:
+		data, parentIndex = stack.pop()
+		name = data.get("?NAME") or None
+		val = data.get("?VALUE")
+		children = data.get("?CHILDREN") or []
+		if not (val is not None or name or children):
+			continue
+		if parentIndex is not None:
+			entry = flat[parentIndex]
+			flat[parentIndex] = entry[:4] + (entry[4] + 1,)
+		index = len(flat)
+		flat.append((name, val, data.get("?EXTRAS") or None,
+		             data.get("objData") or None, 0))
+		stack.extend((i, index) for i in reversed(children))
+
+
+def _flatDict(flat:list, index:int)->tuple:
+	""" return (serialised dict of branch at index, index after its
+	branches) - for classes overriding fromDict() """
+	name, val, extras, objData, nChildren = flat[index]
+	regenDict = {"?NAME" : name}
+	if val is not None:
+		regenDict["?VALUE"] = val
+	index += 1
+	if nChildren:
+		children = regenDict["?CHILDREN"] = []
+		for i in range(nChildren):
+			child, index = _flatDict(flat, index)
+			children.append(child)
+	if extras:
+		regenDict["?EXTRAS"] = extras
+	if objData:
+		regenDict["objData"] = objData
+	return regenDict, index
+
+
+def _decodeRanges(path:str, ranges:list)->bytes:
+	""" worker - return marshalled flat entries of each json object in
+	file, see _flattenDict() - marshal loads far faster than pickle
+	for plain data, and json only ever gives plain data """
+	data = _openMap(path)
+	flat = []
+	try:
+		for start, end in ranges:
+			_flattenDict(json.loads(data[start:end]), flat)
+	finally:
+		data.close()
+	return marshal.dumps(flat)
+
+
+def _buildBranches(root:TreeBase, flat:list, pool=None):
+	""" create branches from flat entries under root, as
+	TreeBase._fromDictV0() would from their dicts """
+	overrides = {}
+	parents, remaining = [root], [len(flat)]
+	index = 0
+	while index < len(flat):
+		while not remaining[-1]:
+			parents.pop()
+			remaining.pop()
+		parent = parents[-1]
+		remaining[-1] -= 1
+		parentCls = type(parent)
+		if parentCls not in overrides:
+			overrides[parentCls] = parentCls.fromDict.__func__ \
+			                       is not TreeBase.fromDict.__func__
+		if overrides[parentCls]:
+			regenDict, index = _flatDict(flat, index)
+			branch = parentCls.fromDict(regenDict)
+			if branch is not None:
+				parent._writeMap()[branch._name] = branch
+				branch._parent = parent
+			continue
+		name, val, extras, objData, nChildren = flat[index]
+		index += 1
+		cls = parentCls
+		if objData:
+			cls = loadObjectClass(objData) or parentCls._defaultCls()
+		if pool is not None:
+			name, val = pool.name(name), pool.value(val)
+		branch = cls(name=name, val=val)
+		branch._extras = extras
+		# replace existing (default) branches declared in init
+		parent._writeMap()[branch._name] = branch
+		branch._parent = parent
+		if nChildren:
+			parents.append(branch)
+			remaining.append(nChildren)
+
+
+def _loadSequential(path:str, cls, pool=None)->TreeBase:
+	with open(path, "r") as f:
+		return cls.fromDict(json.load(f), pool=pool)
+
+
+def loadParallel(path:str, cls=None, executor=None, pool=None,
+                 workers=None)->TreeBase:
+	""" return tree from json file of serialise() output, identical to
+	cls.fromDict(json.load()), with the root's branches decoded
+	in worker processes
+	:param executor : concurrent.futures executor - by default
+	a ProcessPoolExecutor is made for this call
+	:param pool : InternPool or True, as for fromDict()
+	:param workers : number of processes, of executor or of the pool made -
+	by default one per cpu """
+	if cls is None:
+		from tree.main import Tree
+		cls = Tree
+	if pool is True:
+		from tree.lib import InternPool
+		pool = InternPool()
+	if cls.fromDict.__func__ is not TreeBase.fromDict.__func__:
+		return _loadSequential(path, cls, pool)
+
+	workers = _workerCount(workers)
+	ownExecutor = executor is None
+	if ownExecutor:
+		executor = ProcessPoolExecutor(workers)
+	try:
+		data = _openMap(path)
+		try:
+			pieces = _groups(range(len(data)), workers)
+			futures = [executor.submit(_scanFile, path, i.start, i.stop)
+			           for i in pieces if len(i)]
+			found = _topBranches(
+				data, [scan for future in futures for scan in future.result()])
+			if found is None:
+				return cls.fromDict(json.loads(data[:]), pool=pool)
+			listStart, listEnd, ranges = found
+			rootDict = json.loads(data[:listStart] + b"[]" + data[listEnd:])
+		finally:
+			data.close()
+		if cls.formatManager.getDataVersion(rootDict) != 0:
+			return _loadSequential(path, cls, pool)
+
+		# only the root - its raw child entries decide if it is skipped,
+		# as in fromDict()
+		rootDict["?CHILDREN"] = ranges
+		root = cls._branchFromDict(rootDict, pool)[0]
+		if root is None:
+			return None
+		root._internPool = pool
+
+		futures = [executor.submit(_decodeRanges, path, group)
+		           for group in _groups(ranges, workers)]
+		# build each group as it arrives, in order
+		for future in futures:
+			_buildBranches(root, marshal.loads(future.result()), pool)
+	finally:
+		if ownExecutor:
+			executor.shutdown()
+	return root
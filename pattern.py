@@ -0,0 +1,170 @@
+""" wildcard patterns over tree addresses
+
+patterns are addresses whose tokens may use shell-style wildcards:
+	"assets.*.lod0" - any single branch between assets and lod0
+	"rig.**.ctrl_*" - ctrl_ branches any depth below rig
+	"^.sibling*" - parent tokens work as in normal lookups
+
+each pattern is compiled once into a list of steps, and matching walks
+only branches that can still match - literal tokens are looked up
+directly, wildcard tokens only check children of branches already
+matched. Only "**" has to descend through whole subtrees
+"""
+from __future__ import annotations
+
+import re
+from fnmatch import translate
+from functools import lru_cache
+from typing import Iterator
+
+from six import string_types
+
+
+# characters marking a token as a wildcard
+wildChars = frozenset("*?[")
+
+# step kinds
+LITERAL, WILD, ANY, DEEP, PARENT = range(5)
+
+
+class TreePattern(object):
+	""" compiled address pattern - get through compilePattern() """
+
+	def __init__(self, tokens, parentToken="^"):
+		"""
+		:param tokens : tuple of pattern tokens, already split
+		"""
+		self.tokens = tuple(tokens)
+		self.steps = []
+		for token in self.tokens:
+			if token == parentToken:
+				self.steps.append((PARENT, None))
+			elif token == "**":
+				# runs of ** are the same as one
+				if not self.steps or self.steps[-1][0] != DEEP:
+					self.steps.append((DEEP, None))
+			elif token == "*":
+				self.steps.append((ANY, None))
+			elif wildChars.intersection(token):
+				self.steps.append((WILD, re.compile(translate(token)).match))
+			else:
+				self.steps.append((LITERAL, token))
+		kinds = [i[0] for i in self.steps]
+		# states can only be reached twice through several **,
+		# or by climbing back up
+		self.mayRepeat = kinds.count(DEEP) > 1 or PARENT in kinds
+
+	def __repr__(self):
+		return "<{}({})>".format(self.__class__.__name__, self.tokens)
+
+	def iterMatches(self, branch)->Iterator:
+		""" lazily yield every branch matching this pattern
+		relative to the given branch, each once -
+		without "**", in tree order """
+		steps = self.steps
+		nSteps = len(steps)
+		# stack of (branch, step index), reversed to yield in order
+		stack = [(branch, 0)]
+		visited = set() if self.mayRepeat else None
+		found = set() if self.mayRepeat else None
+		while stack:
+			branch, i = stack.pop()
+			if visited is not None:
+				state = (id(branch), i)
+				if state in visited:
+					continue
+				visited.add(state)
+			if i == nSteps:
+				if found is not None:
+					if id(branch) in found:
+						continue
+					found.add(id(branch))
+				yield branch
+				continue
+			kind, arg = steps[i]
+			if kind == LITERAL:
+				child = branch._readMap().get(arg)
+				if child is not None:
+					stack.append((child, i + 1))
+			elif kind == ANY:
+				stack.extend((child, i + 1) for child in
+				             reversed(list(branch._readMap().values())))
+			elif kind == WILD:
+				stack.extend((child, i + 1) for child in
+				             reversed(list(branch._readMap().values()))
+				             if arg(child._name or ""))
+			elif kind == DEEP:
+				# descend one level further, or stop here
+				stack.extend((child, i) for child in
+				             reversed(list(branch._readMap().values())))
+				stack.append((branch, i + 1))
+			else: # PARENT
+				if branch._parent is None:
+					raise RuntimeError("tree {} has no parent to "
+					                   "look up".format(branch))
+				stack.append((branch._parent, i + 1))
+
+	def matchesTokens(self, names)->bool:
+		""" check if sequence of branch names matches this pattern """
+		if any(kind == PARENT for kind, arg in self.steps):
+			raise ValueError("cannot match addresses against pattern {} "
+			                 "with parent tokens".format(self))
+		states = self._advanceDeep({0})
+		for name in names:
+			nextStates = set()
+			for i in states:
+				if i == len(self.steps):
+					continue
+				kind, arg = self.steps[i]
+				if kind == DEEP:
+					nextStates.add(i)
+				elif kind == ANY or (kind == LITERAL and arg == name) or \
+						(kind == WILD and arg(name)):
+					nextStates.add(i + 1)
+			if not nextStates:
+				return False
+			states = self._advanceDeep(nextStates)
+		return len(self.steps) in states
+
+	def _advanceDeep(self, states)->set:
+		""" add states past each ** matching nothing """
+		result = set(states)
+		for i in states:
+			while i < len(self.steps) and self.steps[i][0] == DEEP:
+				i += 1
+				result.add(i)
+		return result
+
+
+def splitPattern(pattern, sep=".")->tuple:
+	""" flatten pattern string or nested token sequence,
+	as TreeBase._parseAddressTokens() """
+	if isinstance(pattern, string_types):
+		return tuple(pattern.split(sep))
+	result = []
+	for token in pattern:
+		if isinstance(token, string_types):
+			result.extend(token.split(sep))
+		elif isinstance(token, (list, tuple)):
+			result.extend(splitPattern(token, sep))
+	return tuple(result)
+
+
+@lru_cache(maxsize=256)
+def _compile(tokens, parentToken)->TreePattern:
+	return TreePattern(tokens, parentToken)
+
+
+def compilePattern(pattern, sep=".", parentToken="^")->TreePattern:
+	""" return compiled TreePattern, cached for repeated patterns
+	:param pattern : address string, token sequence or TreePattern """
+	if isinstance(pattern, TreePattern):
+		return pattern
+	return _compile(splitPattern(pattern, sep), parentToken)
+
+
+def glob(tree, pattern)->Iterator:
+	""" lazily yield branches below tree matching pattern,
+	using tree's own separator and parent token """
+	return compilePattern(
+		pattern, tree.sep, tree.parentToken).iterMatches(tree)
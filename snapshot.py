@@ -0,0 +1,225 @@
+""" immutable snapshots of trees, sharing structure between versions
+
+each live branch caches the FrozenTree made for it by the last
+snapshot. Changing a branch clears that cache on the branch and its
+parents only (see TreeBase._markDirty()), so the next snapshot rebuilds
+that path and reuses every other frozen branch as it is.
+
+Old snapshots never change - they hold copies of mutable values,
+made when the branch was frozen. Values mutated in place on the live
+tree without being set again are not detected.
+"""
+from __future__ import annotations
+
+from copy import deepcopy
+from types import MappingProxyType
+from typing import List, Union
+
+from tree.core import TreeBase, _emptyMap
+from tree.lib import isImmutable, uniqueSign
+
+
+class FrozenTree(object):
+	""" read-only branch of a snapshot
+
+	supports the lookup and iteration interface of TreeBase,
+	but never creates branches - missing addresses raise KeyError.
+	Frozen branches may be shared by many snapshots, so they know
+	nothing of their parent
+	"""
+
+	__slots__ = ("_name", "_value", "_extras", "_cls", "_branches",
+	             "__weakref__")
+
+	sep = TreeBase.sep
+
+	def __init__(self, name, value, extras, cls, branches):
+		"""
+		:param extras : dict, copied
+		:param cls : class of live branch this was frozen from
+		:param branches : iterable of FrozenTree
+		"""
+		setAttr = object.__setattr__
+		setAttr(self, "_name", name)
+		setAttr(self, "_value", value)
+		setAttr(self, "_extras", MappingProxyType(dict(extras))
+		        if extras else _emptyMap)
+		setAttr(self, "_cls", cls)
+		branches = {i._name : i for i in branches}
+		setAttr(self, "_branches", MappingProxyType(branches)
+		        if branches else _emptyMap)
+
+	@classmethod
+	def fromBranch(cls, branch:TreeBase)->FrozenTree:
+		""" freeze a live branch alone - its branches must already
+		be frozen """
+		value = branch.value
+		if not isImmutable(value):
+			value = deepcopy(value)
+		extras = branch._extras
+		if extras:
+			extras = deepcopy(extras)
+		return cls(branch.name, value, extras, type(branch),
+		           [i._frozen for i in branch._readMap().values()])
+
+	def __setattr__(self, key, value):
+		raise AttributeError("snapshot {} is read-only".format(self))
+
+	def __delattr__(self, key):
+		raise AttributeError("snapshot {} is read-only".format(self))
+
+	def __repr__(self):
+		return "<{} ({}) : {}>".format(self.__class__.__name__,
+		                               self._name, self._value)
+
+	@property
+	def name(self)->str:
+		return self._name
+
+	@property
+	def value(self):
+		return self._value
+
+	@property
+	def extras(self)->MappingProxyType:
+		return self._extras
+
+	@property
+	def branchClass(self)->type:
+		""" class of live branch this was frozen from """
+		return self._cls
+
+	@property
+	def branches(self)->List[FrozenTree]:
+		return list(self._branches.values())
+
+	def keys(self):
+		return self._branches.keys()
+
+	def iterBranches(self):
+		return iter(self._branches.items())
+
+	def __iter__(self):
+		return iter(self._branches.values())
+
+	def __len__(self):
+		return len(self._branches)
+
+	def __call__(self, *address)->FrozenTree:
+		""" look up frozen branch by address, as with TreeBase -
+		raises KeyError for missing addresses """
+		branch = self
+		for token in TreeBase._parseAddressTokens(address):
+			branch = branch._branches[str(token)]
+		return branch
+
+	def getBranch(self, lookup, default=None)->Union[FrozenTree, None]:
+		try:
+			return self(lookup)
+		except KeyError:
+			return default
+
+	def __getitem__(self, address):
+		return self(address).value
+
+	def get(self, lookup, default=None):
+		branch = self.getBranch(lookup)
+		if branch is None:
+			return default
+		return branch.value
+
+	def __eq__(self, other):
+		""" equivalence with other snapshots or live trees,
+		as TreeBase.isEquivalent() """
+		if not isinstance(other, (FrozenTree, TreeBase)):
+			return NotImplemented
+		pairs = [(self, other)]
+		while pairs:
+			a, b = pairs.pop()
+			if a is b:
+				continue
+			if not (a.name == b.name and a.value == b.value
+			        and dict(a._extras or {}) == dict(b._extras or {})):
+				return False
+			pairs.extend(zip(a.branches, b.branches))
+		return True
+
+	def __ne__(self, other):
+		result = self.__eq__(other)
+		return result if result is NotImplemented else not result
+
+	__hash__ = object.__hash__
+
+	def iterAllBranches(self, includeSelf=True):
+		""" yield all frozen branches depth first """
+		if includeSelf:
+			yield self
+		stack = [iter(self._branches.values())]
+		while stack:
+			branch = next(stack[-1], None)
+			if branch is None:
+				stack.pop()
+				continue
+			yield branch
+			if branch._branches:
+				stack.append(iter(branch._branches.values()))
+
+	def allBranches(self, includeSelf=True)->List[FrozenTree]:
+		return list(self.iterAllBranches(includeSelf))
+
+	def serialise(self)->dict:
+		""" serialise as the live tree was when frozen,
+		this branch treated as root """
+		return self._serialise(None)
+
+	def _serialise(self, parentCls)->dict:
+		serial = {"?NAME" : self._name}
+		if self._value is not None:
+			serial["?VALUE"] = self._value
+		if self._branches:
+			serial["?CHILDREN"] = [i._serialise(self._cls)
+			                       for i in self._branches.values()]
+		if self._extras:
+			serial["?EXTRAS"] = dict(self._extras)
+		if parentCls is None:
+			serial["?FORMAT_VERSION"] = 0
+		elif parentCls != self._cls:
+			# as lib.saveObjectClass()
+			serial["objData"] = uniqueSign.join(
+				[self._cls.__name__, self._cls.__module__])
+		return serial
+
+	def thaw(self)->TreeBase:
+		""" return new live tree matching this snapshot """
+		root = self._thawBranch()
+		stack = [(root, iter(self._branches.values()))]
+		while stack:
+			parent, branches = stack[-1]
+			frozen = next(branches, None)
+			if frozen is None:
+				stack.pop()
+				continue
+			branch = frozen._thawBranch()
+			parent._writeMap().append(branch._name, branch)
+			branch._parent = parent
+			if frozen._branches:
+				stack.append((branch, iter(frozen._branches.values())))
+		return root
+
+	def _thawBranch(self)->TreeBase:
+		cls = self._cls
+		new = cls.__new__(cls)
+		TreeBase.__init__(new, self._name, deepcopy(self._value))
+		if self._extras:
+			new._extras = deepcopy(dict(self._extras))
+		return new
+
+
+def freeze(tree:TreeBase)->FrozenTree:
+	""" return snapshot of tree, rebuilding only branches changed since
+	the last snapshot - children are frozen before their parents """
+	for branch in tree.iterAllBranches(
+			topDown=False, prune=lambda x: x._frozen is not None):
+		if branch._frozen is None:
+			branch._frozen = FrozenTree.fromBranch(branch)
+	return tree._frozen
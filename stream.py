@@ -0,0 +1,271 @@
+""" streaming output for trees
+
+writes the same data as TreeBase.serialise(), walking the tree
+and encoding each branch as it goes - the nested dict for the
+whole tree is never built
+
+IncrementalJsonWriter also keeps the text it writes on the branches,
+so repeated saves of a large tree only encode what changed
+"""
+from __future__ import annotations
+
+import json
+
+from tree.codec import encode
+from tree.core import TreeBase
+from tree.lib import saveObjectClass
+
+
+class JsonTreeWriter(object):
+	""" writes a tree to a text file object as json
+
+	output is identical to json.dump(tree.serialise(), fp)
+	with the same separators - only values, extras and root data
+	are passed through the json encoder individually
+	"""
+
+	# number of string pieces to collect before each write
+	bufferSize = 4096
+
+	def __init__(self, fp, encoder=None, separators=(", ", ": ")):
+		"""
+		:param fp : text file object to write to
+		:param encoder : json.JSONEncoder to use for values
+		"""
+		self.fp = fp
+		self.itemSep, self.keySep = separators
+		self.encoder = encoder or json.JSONEncoder(separators=separators)
+		self._buffer = []
+
+	def _write(self, *pieces):
+		self._buffer.extend(pieces)
+		if len(self._buffer) > self.bufferSize:
+			self.flush()
+
+	def flush(self):
+		self.fp.write("".join(self._buffer))
+		self._buffer = []
+
+	def _key(self, key):
+		""" write key after a previous entry """
+		self._write(self.itemSep, self.encoder.encode(key), self.keySep)
+
+	def _openBranch(self, branch):
+		""" write everything up to a branch's children -
+		return True if branch has children to write """
+		encode = self.encoder.encode
+		self._write("{", encode("?NAME"), self.keySep, encode(branch.name))
+		value = branch.value
+		if value is not None:
+			self._key("?VALUE")
+			self._write(encode(value))
+		if branch._readMap():
+			self._key("?CHILDREN")
+			self._write("[")
+			return True
+		return False
+
+	def _closeBranch(self, branch, hasChildren):
+		""" write everything after a branch's children """
+		encode = self.encoder.encode
+		if hasChildren:
+			self._write("]")
+		if branch._extras:
+			self._key("?EXTRAS")
+			self._write(encode(branch._extras))
+		parent = branch.parent
+		if parent:
+			if parent.__class__ != branch.__class__:
+				self._key("objData")
+				self._write(encode(saveObjectClass(branch)))
+		else:
+			rootData = branch.rootData()
+			if rootData:
+				self._key("?ROOT_DATA")
+				self._write(encode(rootData))
+			self._key("?FORMAT_VERSION")
+			self._write("0")
+		self._write("}")
+
+	def _writeOverridden(self, branch):
+		""" branch classes redefining serialise() are encoded
+		whole through their own method """
+		self._write(self.encoder.encode(branch.serialise()))
+
+	def write(self, tree:TreeBase):
+		""" write tree and all its branches, without recursion """
+		if type(tree).serialise is not TreeBase.serialise:
+			self._writeOverridden(tree)
+			self.flush()
+			return
+		# stack of (branch, branch iterator, first child written)
+		stack = []
+		if self._openBranch(tree):
+			stack.append([tree, iter(tree._readMap().values()), False])
+		else:
+			self._closeBranch(tree, False)
+		while stack:
+			frame = stack[-1]
+			branch = next(frame[1], None)
+			if branch is None:
+				stack.pop()
+				self._closeBranch(frame[0], True)
+				continue
+			if frame[2]:
+				self._write(self.itemSep)
+			frame[2] = True
+			if type(branch).serialise is not TreeBase.serialise:
+				self._writeOverridden(branch)
+			elif self._openBranch(branch):
+				stack.append([branch, iter(branch._readMap().values()), False])
+			else:
+				self._closeBranch(branch, False)
+		self.flush()
+
+
+# marks branches whose text is held by a parent's saved text
+inChunk = object()
+
+
+class IncrementalJsonWriter(JsonTreeWriter):
+	""" writes the same json as JsonTreeWriter, reusing text saved
+	on branches by the last incremental write
+
+	a branch whose text is shorter than chunkSize is saved whole,
+	under a parent longer than that - longer branches save the list of
+	chunks their text is made of, so no text is held twice.
+	branches within a saved chunk are marked with inChunk.
+	changing a branch's value, name, extras or branches clears the
+	saved text of it and its parents, see TreeBase._markDirty(),
+	so each save encodes only changed branches and their parents,
+	and joins the rest from saved chunks
+
+	branch classes redefining serialise() are always encoded again
+	"""
+
+	chunkSize = 65536
+
+	def __init__(self, fp, chunkSize=None):
+		""" separators and encoder are fixed, as saved text
+		must match between writes
+		:param chunkSize : length of text saved whole, by default
+		the class's chunkSize """
+		super(IncrementalJsonWriter, self).__init__(fp)
+		if chunkSize is not None:
+			self.chunkSize = chunkSize
+		self._pieces = None
+
+	def _write(self, *pieces):
+		self._pieces.extend(pieces)
+
+	def _writeOverridden(self, branch):
+		super(IncrementalJsonWriter, self)._writeOverridden(branch)
+		# changes below it must still reach the parents' saved text
+		for i in branch.iterAllBranches():
+			i._encoded = inChunk
+
+	def _openFrame(self, branch):
+		""" return new stack frame of [branch, branch iterator,
+		text chunks, (child, chunks, length) of finished children,
+		has children, any child written] """
+		frame = [branch, iter(branch._readMap().values()), [], [],
+		         False, False]
+		self._pieces = frame[2]
+		frame[4] = self._openBranch(branch)
+		return frame
+
+	def _closeFrame(self, frame, isTop=False):
+		""" close branch of frame, and decide where text is saved -
+		return (chunks, length) of branch text """
+		branch, _, chunks, children, hasChildren, _ = frame
+		self._pieces = chunks
+		self._closeBranch(branch, hasChildren)
+		length = sum(map(len, chunks))
+		if length < self.chunkSize and not isTop:
+			chunks = ["".join(chunks)]
+			for child, childChunks, childLength in children:
+				child._encoded = inChunk
+		else:
+			for child, childChunks, childLength in children:
+				if childLength < self.chunkSize:
+					child._encoded = "".join(childChunks)
+			if not isTop:
+				branch._encoded = (chunks, length)
+		return chunks, length
+
+	def write(self, tree:TreeBase):
+		""" write tree, encoding only branches changed since last write """
+		if type(tree).serialise is not TreeBase.serialise:
+			super(IncrementalJsonWriter, self).write(tree)
+			return
+		top = self._openFrame(tree)
+		stack = [top]
+		while True:
+			frame = stack[-1]
+			branch = next(frame[1], None)
+			if branch is None:
+				stack.pop()
+				if not stack:
+					break
+				chunks, length = self._closeFrame(frame)
+				stack[-1][3].append((frame[0], chunks, length))
+				stack[-1][2].extend(chunks)
+				continue
+			chunks = frame[2]
+			if frame[5]:
+				chunks.append(self.itemSep)
+			frame[5] = True
+			encoded = branch._encoded
+			if type(encoded) is str:
+				frame[3].append((branch, [encoded], len(encoded)))
+				chunks.append(encoded)
+			elif type(encoded) is tuple:
+				frame[3].append((branch,) + encoded)
+				chunks.extend(encoded[0])
+			elif type(branch).serialise is not TreeBase.serialise:
+				self._pieces = chunks
+				self._writeOverridden(branch)
+			else:
+				stack.append(self._openFrame(branch))
+		chunks, length = self._closeFrame(top, isTop=True)
+		self.fp.writelines(chunks)
+
+
+class BinaryTreeWriter(object):
+	""" writes a tree to a binary file object, see tree.codec """
+
+	def __init__(self, fp):
+		self.fp = fp
+
+	def write(self, tree:TreeBase):
+		self.fp.write(encode(tree))
+
+
+# format name : writer class
+writers = {
+	"json" : JsonTreeWriter,
+	"binary" : BinaryTreeWriter,
+}
+
+
+def dump(tree:TreeBase, fp, format="json", incremental=False,
+         chunkSize=None, **kwargs):
+	""" stream tree to file object in given format
+	:param incremental : reuse json text saved on branches
+	unchanged since the last incremental dump
+	:param chunkSize : see IncrementalJsonWriter, only for incremental
+	dumps - other kwargs are passed to the format's writer """
+	if format not in writers:
+		raise ValueError("unknown tree format {}, options are {}".format(
+			format, list(writers.keys())))
+	if incremental:
+		if format != "json":
+			raise ValueError("only json trees can be saved incrementally")
+		if kwargs:
+			raise TypeError("incremental dumps have a fixed encoder and "
+			                "separators, cannot take {}".format(list(kwargs)))
+		IncrementalJsonWriter(fp, chunkSize).write(tree)
+		return
+	if chunkSize is not None:
+		raise TypeError("chunkSize is only used by incremental dumps")
+	writers[format](fp, **kwargs).write(tree)
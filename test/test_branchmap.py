@@ -0,0 +1,89 @@
+
+from __future__ import print_function
+import unittest
+
+from tree import Tree
+from tree.branchmap import BranchMap
+
+
+class SmallBlockMap(BranchMap):
+	""" tiny blocks, to exercise splitting and merging """
+	blockSize = 2
+
+
+class TestBranchMap(unittest.TestCase):
+	""" test ordered branch map against a plain list of keys """
+
+	def setUp(self):
+		self.map = SmallBlockMap()
+		self.keys = []
+		for i in range(20):
+			self.map["k{}".format(i)] = i
+			self.keys.append("k{}".format(i))
+
+	def checkOrder(self):
+		self.assertEqual(list(self.map), self.keys)
+		for i, key in enumerate(self.keys):
+			self.assertEqual(self.map.index(key), i)
+			self.assertEqual(self.map.keyAt(i), key)
+
+	def test_mapInsert(self):
+		for index in (0, 5, 13, -1, 100):
+			key = "new{}".format(index)
+			self.map.insert(index, key, None)
+			if index < 0:
+				index = len(self.keys) + index
+			self.keys.insert(index, key)
+		self.checkOrder()
+
+	def test_mapRemove(self):
+		for key in ("k0", "k7", "k8", "k9", "k19"):
+			self.map.pop(key)
+			self.keys.remove(key)
+		self.checkOrder()
+		self.assertNotIn("k7", self.map)
+
+	def test_mapRenameMove(self):
+		self.map.rename("k4", "renamed")
+		self.keys[4] = "renamed"
+		self.assertEqual(self.map["renamed"], 4)
+		self.map.move("k15", 1)
+		self.keys.remove("k15")
+		self.keys.insert(1, "k15")
+		self.checkOrder()
+
+
+class TestTreeFanOut(unittest.TestCase):
+	""" test tree ordering operations backed by branch map """
+
+	def setUp(self):
+		self.tree = Tree("root")
+		for i in range(10):
+			self.tree("branch{}".format(i))
+
+	def test_treeIndexInsert(self):
+		newBranch = self.tree.addChild(Tree("inserted"), index=3)
+		self.assertEqual(newBranch.index(), 3)
+		self.assertEqual(self.tree.index("branch3"), 4)
+		self.assertIs(self.tree.branches[3], newBranch)
+
+	def test_treeRenameKeepsOrder(self):
+		self.tree("branch5").name = "renamed"
+		self.assertEqual(self.tree.index("renamed"), 5)
+		self.assertEqual(self.tree("renamed").index(), 5)
+
+	def test_treeSetIndex(self):
+		branch = self.tree("branch0")
+		branch.setIndex(-1)
+		self.assertIs(self.tree.branches[-1], branch)
+		branch.setIndex(2)
+		self.assertEqual(branch.index(), 2)
+
+	def test_treeContains(self):
+		branch = self.tree("branch4")
+		self.assertIn(branch, self.tree)
+		self.assertNotIn(Tree("branch4"), self.tree)
+
+
+if __name__ == '__main__':
+	unittest.main()
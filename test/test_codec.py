@@ -0,0 +1,58 @@
+from __future__ import print_function
+import io, unittest
+
+from tree import Tree
+from tree.codec import encode, decode
+
+
+class CustomTreeType(Tree):
+	branchesInherit = True
+
+
+class TestCodec(unittest.TestCase):
+	""" test compact binary encoding round trips """
+
+	def setUp(self):
+		self.tree = Tree(name="testRoot", val="tree root")
+		self.tree("branchA").value = ["first branch", {"key" : 1},
+		                              (1.5, -300, 2 ** 70), None]
+		self.tree("branchA")("leafA").value = "first leaf"
+		self.tree("branchB").value = {1 : b"bytes", "unicode" : u"é"}
+		self.tree("branchB.leafB").extras["readOnly"] = True
+		self.tree("branchB.leafC").value = False
+		self.tree.addChild(CustomTreeType("custom", val=3))
+		self.tree("custom.inherited")
+		self.tree("custom").addChild(Tree("plain"))
+
+	def test_roundTrip(self):
+		data = encode(self.tree)
+		self.assertIsInstance(data, bytes)
+		newTree = decode(data)
+		self.assertEqual(newTree, self.tree)
+		self.assertEqual(newTree("branchA").value[2], (1.5, -300, 2 ** 70))
+		self.assertIs(newTree("branchB.leafC").value, False)
+		self.assertIs(type(newTree("custom")), CustomTreeType)
+		self.assertIs(type(newTree("custom.inherited")), CustomTreeType)
+		self.assertIs(type(newTree("custom.plain")), Tree)
+		self.assertIs(newTree("custom.plain").root, newTree)
+
+		custom = decode(encode(self.tree("custom")))
+		self.assertIs(type(custom), CustomTreeType)
+
+	def test_compact(self):
+		""" names are stored once """
+		for i in range(50):
+			self.tree("branch{}".format(i), "translate").value = i
+		data = encode(self.tree)
+		self.assertEqual(data.count(b"translate"), 1)
+
+	def test_dumpBinary(self):
+		f = io.BytesIO()
+		self.tree.dump(f, format="binary")
+		self.assertEqual(decode(f.getvalue()), self.tree)
+		with self.assertRaises(TypeError):
+			encode(Tree("root", val=object()))
+
+
+if __name__ == '__main__':
+	unittest.main()
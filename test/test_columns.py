@@ -0,0 +1,74 @@
+from __future__ import print_function
+import unittest
+
+import numpy as np
+
+from tree import Tree
+from tree.columns import subtreeSizes
+
+
+class CustomTreeType(Tree):
+	branchesInherit = True
+
+
+class TestColumns(unittest.TestCase):
+	""" test columnar export and rebuilding of trees """
+
+	def setUp(self):
+		self.tree = Tree(name="testRoot", val="tree root")
+		self.tree("branchA").value = ["first branch", {"key" : 1}]
+		self.tree("branchA")("leafA").value = "first leaf"
+		self.tree("branchB").value = 2
+		self.tree("branchB.leafB").extras["readOnly"] = True
+		self.tree.addChild(CustomTreeType("custom", val=3))
+
+	def test_toColumns(self):
+		cols = self.tree.toColumns()
+		self.assertEqual(cols["parent"].tolist(), [-1, 0, 1, 0, 3, 0])
+		self.assertEqual(cols["depth"].tolist(), [0, 1, 2, 1, 2, 1])
+		self.assertEqual([cols["names"][i] for i in cols["name"]],
+		                 ["testRoot", "branchA", "leafA", "branchB",
+		                  "leafB", "custom"])
+		self.assertEqual(cols["value"][1], ["first branch", {"key" : 1}])
+		self.assertEqual(cols["extras"][4], {"readOnly" : True})
+		self.assertIs(cols["classes"][cols["cls"][5]], CustomTreeType)
+		self.assertEqual(subtreeSizes(cols).tolist(), [6, 2, 1, 2, 1, 1])
+		self.assertEqual(np.bincount(cols["depth"]).tolist(), [1, 3, 2])
+
+		numeric = Tree("root", 0)
+		for i in range(5):
+			numeric("branch{}".format(i)).value = i
+		self.assertEqual(numeric.toColumns()["value"].dtype, np.int64)
+
+		# None values are masked in a native column
+		numeric("branch2").value = None
+		numeric("branch3").value = 2 ** 40
+		values = numeric.toColumns()["value"]
+		self.assertEqual(values.dtype, np.int64)
+		self.assertEqual(values.mask.tolist(),
+		                 [False, False, False, True, False, False])
+		self.assertEqual(values.sum(), 0 + 1 + 2 ** 40 + 4)
+		restored = Tree.fromColumns(numeric.toColumns())
+		self.assertEqual(restored.serialise(), numeric.serialise())
+		self.assertIsNone(restored("branch2").value)
+		numeric.value = None
+		for i in range(5):
+			numeric("branch{}".format(i)).value = float(i)
+		numeric("branch1").value = float("nan")
+		numeric("branch2").value = None
+		values = numeric.toColumns()["value"]
+		self.assertEqual(values.dtype, np.float64)
+		self.assertEqual(values.mask.tolist(),
+		                 [True, False, False, True, False, False])
+		self.assertTrue(np.isnan(values[2]))
+
+	def test_fromColumns(self):
+		newTree = Tree.fromColumns(self.tree.toColumns())
+		self.assertEqual(newTree, self.tree)
+		self.assertEqual(newTree.serialise(), self.tree.serialise())
+		self.assertIs(type(newTree("custom")), CustomTreeType)
+		self.assertIs(newTree("branchB.leafB").root, newTree)
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,130 @@
+from __future__ import print_function
+import gc, unittest
+
+from tree import Tree
+from tree.flat import FlatTree, FlatBranch
+
+
+class CustomTreeType(Tree):
+	branchesInherit = True
+
+
+class TestFlatTree(unittest.TestCase):
+	""" test array-backed trees against live ones """
+
+	def setUp(self):
+		self.tree = Tree(name="testRoot", val="tree root")
+		self.tree("branchA").value = "first branch"
+		self.tree("branchA")("leafA").value = "first leaf"
+		self.tree("branchB").value = 2
+		self.tree("branchB.leafB").extras["readOnly"] = True
+		self.tree.addChild(CustomTreeType("custom", val=3))
+		self.tree("custom.inherited")
+		self.flat = FlatTree.fromDict(self.tree.serialise())
+
+	def test_flatReading(self):
+		root = self.flat.root
+		self.assertEqual(root.name, "testRoot")
+		self.assertEqual(root["branchA.leafA"], "first leaf")
+		self.assertEqual(root("branchA", "leafA").address,
+		                 ["branchA", "leafA"])
+		self.assertIsNone(root.getBranch("branchA.missing"))
+		self.assertIsNone(root.getBranch("^"))
+		self.assertEqual(root("branchA.leafA")("^").name, "branchA")
+		self.assertEqual([i.name for i in root.iterAllBranches()],
+		                 [i.name for i in self.tree.iterAllBranches()])
+		self.assertEqual(root("branchB.leafB").extras, {"readOnly" : True})
+		self.assertEqual(root.keys(), list(self.tree.keys()))
+
+	def test_flatViews(self):
+		""" views are made on access, and shared while alive """
+		self.assertEqual(len(self.flat._views), 0)
+		leaf = self.flat.root("branchA.leafA")
+		self.assertIs(self.flat.root("branchA.leafA"), leaf)
+		self.assertIsInstance(leaf, FlatBranch)
+		del leaf
+		gc.collect()
+		self.assertNotIn(2, self.flat._views)
+
+	def test_flatSerialisation(self):
+		self.assertEqual(self.flat.serialise(), self.tree.serialise())
+		self.assertEqual(FlatTree.fromTree(self.tree).serialise(),
+		                 self.tree.serialise())
+		self.assertEqual(self.flat.root("branchB").serialise(),
+		                 self.tree("branchB").serialise())
+		newTree = self.flat.root.toTree()
+		self.assertEqual(newTree, self.tree)
+		self.assertIs(type(newTree("custom.inherited")), CustomTreeType)
+
+	def test_flatEditing(self):
+		root = self.flat.root
+		root("branchA.leafA").value = "changed"
+		self.tree("branchA.leafA").value = "changed"
+		root("branchC.leafC").value = 4
+		self.tree("branchC.leafC").value = 4
+		root("branchB.leafB").name = "renamed"
+		self.tree("branchB.leafB").name = "renamed"
+		# same name is a no-op, sibling names are incremented
+		root("branchB.renamed").name = "renamed"
+		root("branchB.clash").value = 1
+		self.tree("branchB.clash").value = 1
+		root("branchB.clash").name = "renamed"
+		self.tree("branchB.clash").name = "renamed"
+		self.assertEqual(root("branchB").keys(),
+		                 list(self.tree("branchB").keys()))
+		removed = root("branchA")
+		removed.remove()
+		self.tree("branchA").remove()
+		with self.assertRaises(RuntimeError):
+			removed.value
+		added = root.addChild(Tree("added", val=[1]))
+		self.tree.addChild(Tree("added", val=[1]))
+		self.assertEqual(added.address, ["added"])
+		self.assertEqual(self.flat.serialise(), self.tree.serialise())
+
+		# clashing names are incremented, as on live trees
+		added = root.addChild(Tree("added", val=[2]))
+		self.tree.addChild(Tree("added", val=[2]))
+		self.assertEqual(added.name, self.tree.branches[-1].name)
+		self.assertNotEqual(added.name, "added")
+		# created branches take classes as on live trees
+		self.assertIs(type(root("custom.created.deep").toTree()),
+		              CustomTreeType)
+		self.tree("custom.created.deep")
+		self.assertIs(type(root("branchB.created").toTree()), Tree)
+		self.tree("branchB.created")
+		self.assertEqual(self.flat.serialise(), self.tree.serialise())
+
+	def test_flatEquality(self):
+		""" views equal the live trees they stand in for """
+		root = self.flat.root
+		self.assertEqual(root, self.tree)
+		self.assertEqual(self.tree, root)
+		self.assertEqual(root("branchA"), self.tree("branchA"))
+		self.assertNotEqual(root("branchA"), self.tree("branchB"))
+		self.assertEqual(root, FlatTree.fromTree(self.tree).root)
+		self.tree("branchA.leafA").extras["key"] = 1
+		self.assertNotEqual(root, self.tree)
+		self.assertIn(root("branchA"), root)
+		self.assertNotIn(root("branchA.leafA"), root)
+
+		# root class
+		flat = FlatTree.fromDict(self.tree.serialise(), cls=CustomTreeType)
+		self.assertIs(type(flat.toTree()), CustomTreeType)
+		self.assertIs(type(flat.toTree()("branchA")), CustomTreeType)
+
+	def test_flatWideBranch(self):
+		""" wide branches index their children """
+		root = self.flat.root
+		for i in range(200):
+			root("wide")("child{}".format(i)).value = i
+		self.assertEqual(root["wide.child150"], 150)
+		self.assertIn(root("wide")._row, self.flat._childIndex)
+		root("wide.child150").remove()
+		self.assertIsNone(root.getBranch("wide.child150"))
+		root("wide.child10").name = "moved"
+		self.assertEqual(root["wide.moved"], 10)
+
+
+if __name__ == '__main__':
+	unittest.main()
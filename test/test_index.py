@@ -0,0 +1,111 @@
+from __future__ import print_function
+import copy, pickle, unittest
+
+from tree import Tree
+from tree.core import TreeExtras
+
+
+class TestAttributeIndex(unittest.TestCase):
+	""" test secondary indexes stay in sync with tree edits """
+
+	def setUp(self):
+		self.tree = Tree(name="testRoot", val="tree root")
+		self.tree("branchA").value = "first branch"
+		self.tree("branchA")("leafA").value = 2
+		self.tree("branchB").value = 2
+		self.tree("branchB.leafB").extras["readOnly"] = True
+
+	def names(self, branches):
+		return sorted(i.name for i in branches)
+
+	def test_valueIndex(self):
+		index = self.tree.createIndex("value")
+		self.assertIs(self.tree.createIndex("value"), index)
+		self.assertEqual(self.names(self.tree.branchesWhere("value", 2)),
+		                 ["branchB", "leafA"])
+		self.tree("branchA.leafA").value = 3
+		self.tree("branchC").value = 2
+		self.tree("branchC.leafC").value = ["unhashable"]
+		self.assertEqual(self.names(index.find(2)), ["branchB", "branchC"])
+		self.assertEqual(self.names(index.find(["unhashable"])), ["leafC"])
+		self.assertEqual(self.names(self.tree("branchC").branchesWhere(
+			"value", 2)), ["branchC"])
+
+		self.tree("branchC").remove()
+		self.assertEqual(self.names(index.find(2)), ["branchB"])
+		self.assertEqual(index.find(["unhashable"]), [])
+		self.tree.dropIndex("value")
+		self.assertIsNone(self.tree.getIndex("value"))
+		self.assertEqual(self.names(self.tree.branchesWhere("value", 2)),
+		                 ["branchB"])
+
+	def test_valueIndexTypes(self):
+		""" equal values of other types are indexed apart, and retyped
+		values and defaults standing in for values are followed """
+		index = self.tree.createIndex("value")
+		self.tree("branchB").value = True
+		self.tree("branchC").value = 1.0
+		self.tree("branchD").value = [1]
+		for found in (index.find(1), self.tree.branchesWhere("value", 1)):
+			self.assertEqual(found, [])
+		self.assertEqual(self.names(index.find(True)), ["branchB"])
+		self.assertEqual(self.names(index.find(1.0)), ["branchC"])
+		self.assertEqual(index.find((1,)), [])
+		self.tree("branchB").value = 1
+		self.assertEqual(self.names(index.find(1)), ["branchB"])
+		self.assertEqual(index.find(True), [])
+
+		self.tree("branchE").extras["default"] = "fallback"
+		self.assertEqual(self.names(index.find("fallback")), ["branchE"])
+		self.tree("branchE").default = "changed"
+		self.assertEqual(index.find("fallback"), [])
+		self.assertEqual(self.names(index.find("changed")), ["branchE"])
+		self.assertEqual(self.tree("branchE").value, "changed")
+		self.tree.dropIndex("value")
+		self.assertEqual(self.names(self.tree.branchesWhere("value", 1)),
+		                 ["branchB"])
+		self.assertEqual(self.tree.branchesWhere("value", True), [])
+
+	def test_extrasIndex(self):
+		index = self.tree.createIndex("extras.readOnly")
+		self.assertEqual(self.names(index.find(True)), ["leafB"])
+		self.tree("branchA").extras["readOnly"] = True
+		self.tree("branchB.leafB").extras.pop("readOnly")
+		self.assertEqual(self.names(index.find(True)), ["branchA"])
+		self.tree("branchA").extras = {"other" : 1}
+		self.assertEqual(index.find(True), [])
+
+		# loaded extras are plain dicts until accessed
+		loaded = Tree.fromDict(self.tree.serialise())
+		loaded("branchA").extras["readOnly"] = False
+		index = loaded.createIndex("extras.readOnly")
+		self.assertEqual(self.names(index.find(False)), ["branchA"])
+		loaded("branchA").extras.update(readOnly=True)
+		self.assertEqual(self.names(index.find(True)), ["branchA"])
+
+	def test_attributeIndex(self):
+		index = self.tree.createIndex("active")
+		self.assertEqual(index.find(False), [])
+		self.tree("branchA").active = False
+		self.assertEqual(self.names(self.tree.branchesWhere("active", False)),
+		                 ["branchA"])
+		self.tree("branchA").active = True
+		self.assertEqual(index.find(False), [])
+		with self.assertRaises(KeyError):
+			self.tree.createIndex("uuid")
+
+	def test_extrasCopies(self):
+		""" extras copy and pickle as plain dicts """
+		extras = self.tree("branchB.leafB").extras
+		self.assertIsInstance(extras, TreeExtras)
+		self.assertIs(type(copy.deepcopy(extras)), dict)
+		self.assertIs(type(pickle.loads(pickle.dumps(extras))), dict)
+		self.assertEqual(copy.copy(extras), {"readOnly" : True})
+
+		snap = self.tree.snapshot()
+		extras["readOnly"] = False
+		self.assertIsNot(self.tree.snapshot(), snap)
+
+
+if __name__ == '__main__':
+	unittest.main()
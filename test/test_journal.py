@@ -0,0 +1,151 @@
+from __future__ import print_function
+import os, shutil, tempfile, unittest
+
+from tree import Tree
+from tree.journal import TreeJournal, loadTree, readJournal
+
+
+class CustomTreeType(Tree):
+	branchesInherit = True
+
+
+class SettingTreeType(Tree):
+	""" saves a setting of its own through serialise() and fromDict() """
+	setting = None
+
+	def serialise(self, includeAddress=False, version=0):
+		serial = super(SettingTreeType, self).serialise(
+			includeAddress, version)
+		serial["setting"] = self.setting
+		return serial
+
+	@classmethod
+	def fromDict(cls, regenDict, pool=None):
+		branch = super(SettingTreeType, cls).fromDict(regenDict, pool)
+		branch.setting = regenDict.get("setting")
+		return branch
+
+
+class TestJournal(unittest.TestCase):
+	""" test journaling changes and restoring from checkpoint and journal """
+
+	def setUp(self):
+		self.tree = Tree(name="testRoot", val="tree root")
+		self.tree("branchA").value = "first branch"
+		self.tree("branchA")("leafA").value = "first leaf"
+		self.tree("branchB").value = 2
+		self.dir = tempfile.mkdtemp()
+		self.path = os.path.join(self.dir, "test.tree")
+
+	def tearDown(self):
+		shutil.rmtree(self.dir)
+
+	def edit(self, tree):
+		tree("branchA.leafA").value = ["changed", 3]
+		tree("branchB").name = "renamed"
+		tree("branchC.new.deep").value = 4
+		tree.addChild(CustomTreeType("custom", val=5))
+		tree("custom.inherited").extras["key"] = {"a" : 1}
+		tree("branchA").setIndex(-1)
+		tree("branchC.new").remove()
+		tree("branchA.leafA").addChild(tree("renamed"))
+		del tree("custom.inherited").extras["key"]
+		tree("custom").extras["default"] = 1
+
+	def test_journalReplay(self):
+		journal = TreeJournal(self.tree, self.path)
+		self.edit(self.tree)
+		generation, records = readJournal(journal.journalPath)
+		self.assertEqual(generation, 1)
+		self.assertEqual(len(records), 15)
+
+		restored = loadTree(self.path)
+		self.assertEqual(restored, self.tree)
+		self.assertEqual(restored.serialise(), self.tree.serialise())
+		self.assertIs(type(restored("custom.inherited")), CustomTreeType)
+
+		# a record cut short by a crash is dropped
+		with open(journal.journalPath, "a") as f:
+			f.write('["v",["bran')
+		self.assertEqual(loadTree(self.path), self.tree)
+
+		# reopening after a torn record appends on a fresh line
+		journal.close()
+		reopened = TreeJournal.open(self.path)
+		self.assertEqual(reopened.tree, self.tree)
+		reopened.tree("branchA").value = "after crash"
+		reopened.tree("branchA").value = "written again"
+		reopened.close()
+		restored = loadTree(self.path)
+		self.assertEqual(restored("branchA").value, "written again")
+		self.assertEqual(restored, reopened.tree)
+
+	def test_journalTypeChanges(self):
+		""" equal values of another type are journaled """
+		journal = TreeJournal(self.tree, self.path)
+		for value in (0, False, 0.0, False):
+			self.tree("branchB").value = value
+		journal.close()
+		restored = loadTree(self.path)
+		self.assertIs(restored("branchB").value, False)
+		self.assertEqual(restored.serialise(), self.tree.serialise())
+
+	def test_journalCustomSerialise(self):
+		""" branches keep state saved by their own serialise() """
+		custom = SettingTreeType("custom")
+		custom.setting = "in checkpoint"
+		self.tree.addChild(custom)
+		journal = TreeJournal(self.tree, self.path)
+		added = SettingTreeType("added")
+		added.setting = "in journal"
+		self.tree.addChild(added)
+		journal.close()
+		restored = loadTree(self.path)
+		self.assertEqual(restored("custom").setting, "in checkpoint")
+		self.assertEqual(restored("added").setting, "in journal")
+		self.assertIs(type(restored("added")), SettingTreeType)
+
+	def test_journalRefusedValue(self):
+		""" values json cannot hold are refused before they are set """
+		journal = TreeJournal(self.tree, self.path)
+		events = []
+		def onValueChanged(branch, oldValue=None, newValue=None):
+			events.append(newValue)
+		self.tree.valueChanged.connect(onValueChanged)
+		with self.assertRaises(TypeError):
+			self.tree("branchB").value = object()
+		self.assertEqual(self.tree("branchB").value, 2)
+		self.assertEqual(events, [])
+		self.tree("branchB").value = 3
+		self.assertEqual(len(events), 1)
+		journal.close()
+		self.assertEqual(loadTree(self.path), self.tree)
+
+	def test_journalCompaction(self):
+		journal = TreeJournal(self.tree, self.path)
+		self.edit(self.tree)
+		journal.compact()
+		self.assertEqual(readJournal(journal.journalPath), (2, []))
+		self.assertEqual(loadTree(self.path), self.tree)
+
+		self.tree("branchD").value = "after"
+		journal.close()
+		self.tree("branchE").value = "not journaled"
+
+		reopened = TreeJournal.open(self.path)
+		self.assertEqual(reopened.tree("branchD").value, "after")
+		self.assertIsNone(reopened.tree.getBranch("branchE"))
+		reopened.tree("branchD").value = "reopened"
+		reopened.close()
+		self.assertEqual(loadTree(self.path)("branchD").value, "reopened")
+
+		# journal older than checkpoint is not replayed
+		stale = self.path + ".journal.old"
+		shutil.copy(journal.journalPath, stale)
+		TreeJournal.open(self.path).compact()
+		shutil.copy(stale, journal.journalPath)
+		self.assertEqual(loadTree(self.path)("branchD").value, "reopened")
+
+
+if __name__ == '__main__':
+	unittest.main()
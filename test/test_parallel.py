@@ -0,0 +1,96 @@
+from __future__ import print_function
+import json, multiprocessing, os, shutil, tempfile, unittest
+from concurrent.futures import ProcessPoolExecutor
+
+from tree import Tree, parallel
+
+
+class CustomTreeType(Tree):
+	branchesInherit = True
+
+
+class TestParallel(unittest.TestCase):
+	""" test serialising across processes matches serialise() """
+
+	def setUp(self):
+		self.tree = Tree(name="testRoot", val="tree root")
+		self.tree("branchA").value = "first branch"
+		self.tree("branchA")("leafA").value = ["first leaf", 2.5, None]
+		self.tree("branchB").value = {"key" : True}
+		self.tree("branchB").extras["readOnly"] = True
+		self.tree("empty")
+		self.tree.addChild(CustomTreeType("customBranch", val=3))
+		self.tree("customBranch.inherited.deep").value = 4
+		for i in range(20):
+			self.tree("many.branch{}".format(i)).value = i
+
+	def test_serialiseParallel(self):
+		expected = json.dumps(self.tree.serialise())
+		with ProcessPoolExecutor(2) as executor:
+			for splitDepth in (1, 2, 3, 10):
+				self.assertEqual(
+					self.tree.serialiseParallel(executor, splitDepth,
+					                            workers=2),
+					expected)
+			branch = self.tree("customBranch")
+			self.assertEqual(branch.serialiseParallel(executor),
+			                 json.dumps(branch.serialise()))
+		# pool made by the default start method, or forked with the tree
+		self.assertEqual(self.tree.serialiseParallel(splitDepth=2), expected)
+		if "fork" in multiprocessing.get_all_start_methods():
+			self.assertEqual(self.tree.serialiseParallel(
+				splitDepth=2, workers=2, fork=True), expected)
+		branch = self.tree("customBranch")
+		self.assertEqual(branch.serialiseParallel(),
+		                 json.dumps(branch.serialise()))
+		self.assertEqual(Tree("leaf", 1).serialiseParallel(),
+		                 json.dumps(Tree("leaf", 1).serialise()))
+
+	def test_loadParallel(self):
+		""" loading matches sequential fromDict, including text
+		that looks like structure inside strings and root values """
+		self.tree.value = {"?CHILDREN" : [1, {"x" : "]}"}], "a" : "\\"}
+		self.tree.extras["list"] = [[], {}]
+		self.tree("branchA").value = 'a "quoted" [ { \\" string \\'
+		self.tree("ünïcode").value = "ü ] \"["
+		folder = tempfile.mkdtemp()
+		try:
+			path = os.path.join(folder, "test.json")
+			for separators in ((", ", ": "), (",", ":")):
+				with open(path, "w") as f:
+					json.dump(self.tree.serialise(), f, separators=separators)
+				with open(path) as f:
+					expected = Tree.fromDict(json.load(f))
+				with ProcessPoolExecutor(2) as executor:
+					loaded = Tree.loadParallel(path, executor, workers=2)
+				self.assertEqual(loaded.serialise(), expected.serialise())
+				self.assertIs(type(loaded("customBranch.inherited")),
+				              CustomTreeType)
+				self.assertIs(loaded("branchB").root, loaded)
+
+				# chunk edges inside strings and escapes scan the same
+				with open(path, "rb") as f:
+					text = f.read()
+				expectedRanges = parallel.findTopBranches(text)
+				defaultSize = parallel.scanChunkSize
+				for chunkSize in (1, 2, 3, 7):
+					parallel.scanChunkSize = chunkSize
+					try:
+						self.assertEqual(parallel.findTopBranches(text),
+						                 expectedRanges)
+					finally:
+						parallel.scanChunkSize = defaultSize
+
+			# version 1 and leaves load sequentially
+			with open(path, "w") as f:
+				json.dump(self.tree.serialise(version=1), f)
+			self.assertEqual(Tree.loadParallel(path), self.tree)
+			with open(path, "w") as f:
+				json.dump(Tree("leaf", 1).serialise(), f)
+			self.assertEqual(Tree.loadParallel(path), Tree("leaf", 1))
+		finally:
+			shutil.rmtree(folder)
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,68 @@
+from __future__ import print_function
+import types, unittest
+
+from tree import Tree
+from tree.pattern import compilePattern
+
+
+class TestPattern(unittest.TestCase):
+	""" test wildcard address patterns """
+
+	def setUp(self):
+		self.tree = Tree(name="testRoot")
+		for asset in ("chair", "table", "lamp"):
+			self.tree("assets", asset, "lod0")
+			self.tree("assets", asset, "lod1")
+		self.tree("rig.arm.ctrl_elbow")
+		self.tree("rig.arm.hand.ctrl_wrist")
+		self.tree("rig.ctrl_root")
+		self.tree("rig.spine.joint")
+
+	def addresses(self, branches):
+		return [i.stringAddress() for i in branches]
+
+	def test_glob(self):
+		found = self.tree.glob("assets.*.lod0")
+		self.assertIsInstance(found, types.GeneratorType)
+		self.assertEqual(self.addresses(found),
+		                 ["assets.chair.lod0", "assets.table.lod0",
+		                  "assets.lamp.lod0"])
+		self.assertEqual(
+			sorted(self.addresses(self.tree.glob("rig.**.ctrl_*"))),
+			["rig.arm.ctrl_elbow", "rig.arm.hand.ctrl_wrist", "rig.ctrl_root"])
+		self.assertEqual(self.addresses(self.tree.glob("assets.[ct]*")),
+		                 ["assets.chair", "assets.table"])
+		self.assertEqual(self.addresses(self.tree.glob("**.**.joint")),
+		                 ["rig.spine.joint"])
+		self.assertEqual(self.addresses(self.tree.glob("assets.chair.lod?")),
+		                 ["assets.chair.lod0", "assets.chair.lod1"])
+		self.assertEqual(list(self.tree.glob("missing.*")), [])
+
+	def test_globParent(self):
+		arm = self.tree("rig.arm")
+		self.assertEqual(self.addresses(arm.glob("^.ctrl_*")),
+		                 ["rig.ctrl_root"])
+		self.assertEqual(sorted(self.addresses(arm.glob(["**", "^"]))),
+		                 ["rig", "rig.arm", "rig.arm.hand"])
+		with self.assertRaises(RuntimeError):
+			list(self.tree.glob("^.*"))
+
+	def test_customSep(self):
+		self.tree.sep = "/"
+		self.assertEqual(len(list(self.tree.glob("assets/*/lod1"))), 3)
+
+	def test_match(self):
+		wrist = self.tree("rig.arm.hand.ctrl_wrist")
+		self.assertTrue(wrist.match("rig.**.ctrl_*"))
+		self.assertTrue(wrist.match("**"))
+		self.assertFalse(wrist.match("rig.*.ctrl_*"))
+		self.assertTrue(wrist.match("hand.ctrl_*",
+		                            relativeTo=self.tree("rig.arm")))
+		self.assertFalse(wrist.match("*", relativeTo=self.tree("assets")))
+		self.assertIs(compilePattern("a.*.b"), compilePattern("a.*.b"))
+		with self.assertRaises(ValueError):
+			wrist.match("^.ctrl_*")
+
+
+if __name__ == '__main__':
+	unittest.main()
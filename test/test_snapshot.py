@@ -0,0 +1,79 @@
+
+from __future__ import print_function
+import unittest
+
+from tree import Tree
+from tree.snapshot import FrozenTree
+
+
+class CustomTreeType(Tree):
+	branchesInherit = True
+
+
+class TestSnapshot(unittest.TestCase):
+	""" test immutable snapshots and sharing between them """
+
+	def setUp(self):
+		self.tree = Tree(name="testRoot", val="tree root")
+		self.tree("branchA").value = ["first branch"]
+		self.tree("branchA")("leafA").value = "first leaf"
+		self.tree("branchB").value = 2
+		self.tree("branchB.leafB").extras["readOnly"] = True
+
+	def test_snapshotMatchesTree(self):
+		snap = self.tree.snapshot()
+		self.assertIsInstance(snap, FrozenTree)
+		self.assertEqual(snap, self.tree)
+		self.assertEqual(snap.serialise(), self.tree.serialise())
+		self.assertEqual(snap["branchA.leafA"], "first leaf")
+		self.assertTrue(snap("branchB.leafB").extras["readOnly"])
+		with self.assertRaises(KeyError):
+			snap("missing")
+		with self.assertRaises(AttributeError):
+			snap.value = 3
+
+	def test_snapshotUnchangedByEdits(self):
+		snap = self.tree.snapshot()
+		self.tree("branchA").value.append("mutated in place")
+		self.tree("branchA.leafA").value = "changed"
+		self.tree("branchB.leafB").remove()
+		self.tree("branchA").name = "renamed"
+		self.assertEqual(snap["branchA"], ["first branch"])
+		self.assertEqual(snap["branchA.leafA"], "first leaf")
+		self.assertIsNotNone(snap.getBranch("branchB.leafB"))
+
+		newSnap = self.tree.snapshot()
+		self.assertEqual(newSnap, self.tree)
+		self.assertIsNone(newSnap.getBranch("branchB.leafB"))
+
+	def test_snapshotSharing(self):
+		""" only the changed path is rebuilt """
+		snap = self.tree.snapshot()
+		self.assertIs(self.tree.snapshot(), snap)
+		self.tree("branchA.leafA").value = "changed"
+		newSnap = self.tree.snapshot()
+		self.assertIsNot(newSnap, snap)
+		self.assertIsNot(newSnap("branchA"), snap("branchA"))
+		self.assertIs(newSnap("branchB"), snap("branchB"))
+
+	def test_snapshotTypeChange(self):
+		""" equal values of another type still rebuild the snapshot """
+		self.tree("branchB").value = 1
+		snap = self.tree.snapshot()
+		for value in (True, 1.0, 1):
+			self.tree("branchB").value = value
+			newSnap = self.tree.snapshot()
+			self.assertIsNot(newSnap, snap)
+			self.assertIs(type(newSnap["branchB"]), type(value))
+			snap = newSnap
+
+	def test_snapshotThaw(self):
+		self.tree.addChild(CustomTreeType("customBranch", val=3))
+		restored = self.tree.snapshot().thaw()
+		self.assertEqual(restored, self.tree)
+		self.assertIs(type(restored("customBranch")), CustomTreeType)
+		self.assertEqual(restored.serialise(), self.tree.serialise())
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,105 @@
+
+from __future__ import print_function
+import io, json
+import unittest
+
+from tree import Tree
+from tree.stream import IncrementalJsonWriter, inChunk
+
+
+class CustomTreeType(Tree):
+	branchesInherit = True
+
+
+class TestStream(unittest.TestCase):
+	""" test streamed output against serialise() """
+
+	def setUp(self):
+		self.tree = Tree(name="testRoot", val="tree root")
+		self.tree("branchA").value = "first branch"
+		self.tree("branchA")("leafA").value = ["first leaf", 2.5, None]
+		self.tree("branchB").value = {"key" : True}
+		self.tree("branchB").extras["readOnly"] = True
+		self.tree("empty")
+		self.tree.addChild(CustomTreeType("customBranch", val=3))
+
+	def test_streamMatchesSerialise(self):
+		buffer = io.StringIO()
+		self.tree.dump(buffer)
+		self.assertEqual(buffer.getvalue(), json.dumps(self.tree.serialise()))
+
+	def test_streamBranch(self):
+		""" streaming a branch matches serialising it """
+		branch = self.tree("customBranch")
+		buffer = io.StringIO()
+		branch.dump(buffer)
+		self.assertEqual(json.loads(buffer.getvalue()), branch.serialise())
+
+	def test_streamRegeneration(self):
+		buffer = io.StringIO()
+		self.tree.dump(buffer)
+		buffer.seek(0)
+		restored = Tree.fromDict(json.load(buffer))
+		self.assertEqual(restored, self.tree)
+		self.assertIs(type(restored("customBranch")), CustomTreeType)
+
+	def test_streamIncremental(self):
+		""" incremental saves match full ones through changes,
+		and reuse text of unchanged branches """
+		def save(chunkSize):
+			buffer = io.StringIO()
+			IncrementalJsonWriter(buffer, chunkSize).write(self.tree)
+			self.assertEqual(buffer.getvalue(),
+			                 json.dumps(self.tree.serialise()))
+
+		for i in range(20):
+			self.tree("branchC.sub{}".format(i)).value = list(range(i))
+		for chunkSize in (1, 100, 65536):
+			save(chunkSize)
+			save(chunkSize)
+			self.assertIsNotNone(self.tree("branchA")._encoded)
+
+			self.tree("branchA.leafA").value = "changed {}".format(chunkSize)
+			self.assertIsNone(self.tree("branchA")._encoded)
+			save(chunkSize)
+			self.tree("branchC.sub3").extras["key"] = 4
+			save(chunkSize)
+			self.tree("branchC.sub4").name = "renamed"
+			save(chunkSize)
+			self.tree("branchA").addChild(self.tree("branchC.sub5"))
+			save(chunkSize)
+			self.tree("branchC.sub6").remove()
+			save(chunkSize)
+			self.tree("customBranch.deep.leaf").value = chunkSize
+			save(chunkSize)
+			# equal values of another type
+			self.tree("branchB").value = 1
+			save(chunkSize)
+			self.tree("branchB").value = True
+			save(chunkSize)
+			self.tree("branchB").value = 1.0
+			save(chunkSize)
+
+		# small branches are held whole by their parent's text
+		self.tree("branchA").value = "first branch"
+		self.tree("branchC").value = "second branch"
+		save(200)
+		self.assertIsInstance(self.tree("branchC")._encoded, tuple)
+		self.assertIsInstance(self.tree("branchA")._encoded, str)
+		self.assertIsInstance(self.tree("branchC.sub3")._encoded, str)
+		self.assertIs(self.tree("branchA.leafA")._encoded, inChunk)
+		buffer = io.StringIO()
+		self.tree.dump(buffer, incremental=True)
+		self.assertEqual(buffer.getvalue(), json.dumps(self.tree.serialise()))
+		self.tree("branchA").value = "changed"
+		buffer = io.StringIO()
+		self.tree.dump(buffer, incremental=True, chunkSize=100)
+		self.assertEqual(buffer.getvalue(), json.dumps(self.tree.serialise()))
+		with self.assertRaises(TypeError):
+			self.tree.dump(buffer, incremental=True, separators=(",", ":"))
+		with self.assertRaises(TypeError):
+			self.tree.dump(buffer, chunkSize=100)
+
+
+if __name__ == '__main__':
+	unittest.main()
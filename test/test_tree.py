@@ -11,9 +11,12 @@ else:
 	pyTwo = False
 	import unittest
 
-import pprint
+import json, io
+from contextlib import redirect_stdout
 
-from tree import Tree, Signal
+from tree import Tree
+from tree.lib import loadObjectClass, registerClass, classRegistry, \
+	InternPool
 
 tempTree = Tree(name="testRoot", val="tree root")
 tempTree("branchA").value = "first branch"
@@ -31,6 +34,23 @@ class CustomTreeType(Tree):
 	branchesInherit = True
 	pass
 
+class SettingTreeType(Tree):
+	""" saves a setting of its own through serialise() and fromDict() """
+	branchesInherit = True
+	setting = None
+
+	def serialise(self, includeAddress=False, version=0):
+		serial = super(SettingTreeType, self).serialise(
+			includeAddress, version)
+		serial["setting"] = self.setting
+		return serial
+
+	@classmethod
+	def fromDict(cls, regenDict, pool=None):
+		branch = super(SettingTreeType, cls).fromDict(regenDict, pool)
+		branch.setting = regenDict.get("setting")
+		return branch
+
 
 class TestMainTree(unittest.TestCase):
 	""" test for main tree interface methods """
@@ -146,6 +166,439 @@ class TestMainTree(unittest.TestCase):
 		self.assertIs(type(restoreTree("customBranch")), CustomTreeType,
 		                 msg="restored custom type not equal to its source")
 
+	def test_treeLazyMembers(self):
+		""" test that leaves allocate no map, extras or signals
+		until they are used """
+		leaf = self.tree("branchA", "leafA")
+		self.assertIsNone(leaf._childMap)
+		self.assertIsNone(leaf._extras)
+		self.assertIsNone(leaf._valueChanged)
+		self.assertEqual(leaf.branches, [])
+		self.assertIsNone(leaf._childMap,
+		                  msg="reading branches allocated a map")
+		leaf.extras["readOnly"] = True
+		self.assertEqual(leaf._extras, {"readOnly" : True})
+
+	def test_treeSignals(self):
+		""" test that branch signals reach the root """
+		events = []
+		def onValueChanged(branch, oldValue=None, newValue=None):
+			events.append((branch, oldValue, newValue))
+		self.tree.valueChanged.connect(onValueChanged)
+		leaf = self.tree("branchA", "leafA")
+		leaf.value = "new leaf"
+		self.assertEqual(len(events), 1)
+		self.assertIs(events[0][0], leaf)
+		self.assertEqual(events[0][2], "new leaf")
+
+		self.tree.muteSignals()
+		leaf.value = "muted"
+		self.assertEqual(len(events), 1)
+		self.tree.activateSignals()
+
+		# equal values, of the same type or not, are no change
+		leaf.value = [1, 2]
+		self.assertEqual(len(events), 2)
+		leaf.value = [1, 2]
+		leaf.value = 2
+		self.assertEqual(len(events), 3)
+		leaf.value = 2.0
+		leaf.value = True * 2
+		self.assertEqual(len(events), 3)
+
+
+	def test_treeCachedAddress(self):
+		""" test that cached addresses follow renames and reparenting """
+		leaf = self.tree("branchA", "leafA")
+		self.assertEqual(leaf.address, ["branchA", "leafA"])
+		self.assertEqual(leaf.depth, 2)
+		self.tree("branchA").name = "renamed"
+		self.assertEqual(leaf.address, ["renamed", "leafA"])
+
+		leaf.remove()
+		self.assertIs(leaf.root, leaf)
+		self.assertEqual(leaf.address, [])
+		self.tree("branchB").addChild(leaf)
+		self.assertEqual(leaf.address, ["branchB", "leafA"])
+		self.assertIs(leaf.root, self.tree)
+
+	def test_treeDeepRoot(self):
+		""" test root lookup on trees deeper than the recursion limit """
+		branch = self.tree
+		for i in range(3000):
+			branch = branch("deep")
+		self.assertIs(branch.root, self.tree)
+		self.assertEqual(branch.depth, 3000)
+
+
+	def test_treeLookupCache(self):
+		""" test that cached lookups are dropped on structural changes """
+		leaf = self.tree("branchA.leafA")
+		self.assertIs(self.tree("branchA.leafA"), leaf)
+		self.assertIs(self.tree.getBranch("branchA.leafA"), leaf)
+		self.assertIs(self.tree("branchA")("^.branchA.leafA"), leaf)
+
+		leaf.name = "renamed"
+		self.assertIsNone(self.tree.getBranch("branchA.leafA"))
+		self.assertIs(self.tree.getBranch(["branchA", "renamed"]), leaf)
+
+		leaf.remove()
+		self.assertIsNone(self.tree.getBranch("branchA.renamed"))
+		# no parent above a root
+		self.assertIsNone(self.tree.getBranch("^"))
+		self.assertIs(self.tree.getBranch("^.branchA", leaf), leaf)
+		self.assertIs(self.tree("branchA").getBranch("^"), self.tree)
+		with self.assertRaises(RuntimeError):
+			self.tree("^")
+		self.assertIsNot(self.tree("branchA.renamed"), leaf)
+
+
+	def test_treeIteration(self):
+		""" test traversal orders and pruning """
+		self.tree("branchA.leafB")
+		names = lambda branches: [i.name for i in branches]
+		self.assertEqual(names(self.tree.iterAllBranches()),
+		                 ["testRoot", "branchA", "leafA", "leafB", "branchB"])
+		self.assertEqual(names(self.tree.iterAllBranches(depthFirst=False)),
+		                 ["testRoot", "branchA", "branchB", "leafA", "leafB"])
+		self.assertEqual(names(self.tree.iterAllBranches(topDown=False)),
+		                 ["leafA", "leafB", "branchA", "branchB", "testRoot"])
+		self.assertEqual(names(self.tree.iterAllBranches(
+			includeSelf=False, maxDepth=1)), ["branchA", "branchB"])
+		self.assertEqual(names(self.tree.iterAllBranches(
+			prune=lambda x: x.name == "branchA")),
+			["testRoot", "branchA", "branchB"])
+		self.assertEqual(names(self.tree.leaves),
+		                 ["leafA", "leafB", "branchB"])
+		self.assertEqual(names(self.tree.search("leaf")), ["leafA", "leafB"])
+
+		branch = self.tree
+		for i in range(3000):
+			branch = branch("deep")
+		self.assertEqual(len(self.tree.allBranches()), 3005)
+
+
+	def test_treeBatch(self):
+		""" test that batched edits fire each signal once """
+		valueEvents, structureEvents = [], []
+		def onValueChanged(branches, oldValue=None, newValue=None):
+			valueEvents.append((branches, oldValue, newValue))
+		def onStructureChanged(branches, parents, events):
+			structureEvents.append(branches)
+		self.tree.valueChanged.connect(onValueChanged)
+		self.tree.structureChanged.connect(onStructureChanged)
+
+		leaf = self.tree("branchA", "leafA")
+		with self.tree.batch():
+			leaf.value = "changed"
+			with leaf.batch(): # nested blocks join the outer batch
+				leaf.value = "changed again"
+				self.tree("branchB").value = 3
+			self.tree("newBranch")
+			self.tree("otherBranch")
+			self.assertEqual(valueEvents, [])
+
+		self.assertEqual(len(valueEvents), 1)
+		branches, oldValues, newValues = valueEvents[0]
+		self.assertEqual(branches, [leaf, self.tree("branchB")])
+		self.assertEqual(oldValues, ["first leaf", 2])
+		self.assertEqual(newValues, ["changed again", 3])
+		self.assertEqual(len(structureEvents), 1)
+		self.assertEqual([i.name for i in structureEvents[0]],
+		                 ["newBranch", "otherBranch"])
+
+
+	def test_treeDeepCopy(self):
+		""" test direct deep copy of tree structure and values """
+		import copy
+		shared = ["shared"]
+		self.tree("branchA").value = shared
+		self.tree("branchB").value = shared
+		self.tree("branchA").addChild(Tree()) # no name, value or children
+		self.tree.addChild(CustomTreeType("customBranch", val=3))
+		self.tree("customBranch").note = "instance attribute"
+
+		newTree = copy.deepcopy(self.tree)
+		self.assertEqual(newTree, self.tree)
+		self.assertEqual(len(newTree.allBranches()),
+		                 len(self.tree.allBranches()))
+		self.assertIsNot(newTree("branchA").value, shared)
+		self.assertIs(newTree("branchA").value, newTree("branchB").value)
+		self.assertIs(type(newTree("customBranch")), CustomTreeType)
+		self.assertEqual(newTree("customBranch").note, "instance attribute")
+		self.assertIs(newTree("branchA", "leafA").root, newTree)
+
+		# attributes on plain trees, which keep a __dict__ slot
+		self.tree("branchB").note = "plain attribute"
+		newTree = self.tree.clone()
+		self.assertEqual(newTree("branchB").note, "plain attribute")
+
+		newTree = self.tree.clone(shareImmutable=True)
+		self.assertIs(newTree("branchA", "leafA").value,
+		              self.tree("branchA", "leafA").value)
+		self.assertIsNot(newTree("branchA").value, shared)
+
+	def test_treePickle(self):
+		""" test pickles of deep trees with signals, classes and buffers """
+		import pickle
+		self.tree.valueChanged.connect(lambda *args : None)
+		self.tree("branchA").extras["key"] = "extra"
+		self.tree("branchB").readOnly = True
+		self.tree.addChild(CustomTreeType("customBranch", val=3))
+		self.tree("customBranch").note = "instance attribute"
+		self.tree("customBranch", "inherited").value = 4
+		self.tree("branchA").note = "plain attribute"
+		self.tree("data").value = bytes(range(256)) * 1024
+
+		for protocol in range(2, pickle.HIGHEST_PROTOCOL + 1):
+			newTree = pickle.loads(pickle.dumps(self.tree, protocol))
+			self.assertEqual(newTree, self.tree)
+			self.assertEqual(newTree.serialise(), self.tree.serialise())
+			self.assertIs(type(newTree("customBranch", "inherited")),
+			              CustomTreeType)
+			self.assertEqual(newTree("customBranch").note,
+			                 "instance attribute")
+			self.assertEqual(newTree("branchA").note, "plain attribute")
+			self.assertTrue(newTree("branchB").readOnly)
+			self.assertIs(type(newTree("data").value), bytes)
+
+		# deeper than the recursion limit
+		deepTree = Tree("deep")
+		branch = deepTree
+		for i in range(2000):
+			branch = branch("branch{}".format(i))
+		branch.value = "last"
+		branch = pickle.loads(pickle.dumps(deepTree))
+		depth = 0
+		while branch.branches:
+			branch = branch.branches[0]
+			depth += 1
+		self.assertEqual(depth, 2000)
+		self.assertEqual(branch.value, "last")
+
+		# large values out of band
+		if pickle.HIGHEST_PROTOCOL >= 5:
+			self.tree("data").value = bytearray(self.tree("data").value)
+			buffers = []
+			data = pickle.dumps(self.tree, 5, buffer_callback=buffers.append)
+			self.assertEqual(len(buffers), 1)
+			self.assertLess(len(data), len(self.tree("data").value))
+			newTree = pickle.loads(data, buffers=buffers)
+			self.assertIs(type(newTree("data").value), bytearray)
+			self.assertEqual(newTree("data").value, self.tree("data").value)
+
+		# branches pickle as new roots
+		branch = pickle.loads(pickle.dumps(self.tree("branchA")))
+		self.assertIsNone(branch.parent)
+		self.assertEqual(branch("leafA").value, "first leaf")
+
+
+	def test_treeNameIndex(self):
+		""" test indexed search stays in sync with tree edits """
+		names = lambda branches: sorted(i.name for i in branches)
+		self.tree("branchB.leafB")
+		self.assertEqual(names(self.tree.search("leaf")), ["leafA", "leafB"])
+		self.assertEqual(names(self.tree.search("branch", mode="prefix")),
+		                 ["branchA", "branchB"])
+		self.assertEqual(names(self.tree.search("leafA", mode="exact")),
+		                 ["leafA"])
+		self.assertEqual(names(self.tree("branchA").search("leaf")), ["leafA"])
+
+		self.tree("branchA.leafA").name = "renamed"
+		self.tree("branchC.leafC.leafD")
+		removed = self.tree("branchB").remove()
+		self.assertEqual(names(self.tree.search("leaf")), ["leafC", "leafD"])
+		self.assertEqual(names(self.tree.search("renamed")), ["renamed"])
+		self.assertEqual(names(removed.search("leaf")), ["leafB"])
+
+		# moving branch between trees
+		self.tree("branchC").addChild(removed)
+		self.assertEqual(names(self.tree.search("leafB")), ["leafB"])
+		self.assertEqual(names(self.tree.search("leaf")),
+		                 names(i for i in self.tree.allBranches()
+		                       if "leaf" in i.name))
+
+		# forced addition replaces existing branch of same name
+		self.tree.addChild(Tree("branchC"), force=True)
+		self.assertEqual(names(self.tree.search("leaf")), [])
+
+		# hits keep tree order, as the walking search gives
+		ordered = Tree("ordered")
+		for name, leaf in zip("zam", "201"):
+			ordered("{}.leaf{}".format(name, leaf))
+		self.assertEqual([i.address for i in ordered.search("leaf")],
+		                 [["z", "leaf2"], ["a", "leaf0"], ["m", "leaf1"]])
+		ordered.indexSearch = False
+		self.assertEqual([i.address for i in ordered.search("leaf")],
+		                 [["z", "leaf2"], ["a", "leaf0"], ["m", "leaf1"]])
+
+
+	def test_treeInterning(self):
+		""" test names and loaded values are shared through pool """
+		pool = self.tree.setInternPool()
+		self.assertIs(self.tree("branchA").internPool, pool)
+		first = self.tree("branchA.ctrl")
+		second = self.tree("branchB.ctrl")
+		self.assertIs(first.name, second.name)
+		second.name = "".join(["leaf", "A"])
+		self.assertIs(second.name, pool.name("leafA"))
+
+		self.tree("branchB").value = "first leaf"
+		serial = json.loads(json.dumps(self.tree.serialise()))
+		loaded = Tree.fromDict(serial, pool=True)
+		self.assertIsNot(loaded.internPool, pool)
+		self.assertIs(loaded("branchA.ctrl").name, loaded("branchB.ctrl").name)
+		self.assertIs(loaded("branchB").value, loaded("branchA.leafA").value)
+		self.assertEqual(loaded, self.tree)
+		self.assertIsNone(Tree.fromDict(serial).internPool)
+
+		# long values, nan and values past the limit are not held
+		pool = InternPool()
+		pool.maxValues = 3
+		first = "".join(["a", "b"])
+		for value in ("x" * 100, float("nan"), float("nan"), first, 2, 3):
+			pool.value(value)
+		self.assertEqual(len(pool.values), 3)
+		self.assertIs(pool.value("".join(["a", "b"])), first)
+		late = "".join(["c", "d"])
+		self.assertIs(pool.value(late), late)
+		self.assertEqual(len(pool.values), 3)
+
+	def test_treeFormatVersions(self):
+		""" test compact version 1 format round trips, and that
+		loading picks the format by its recorded version """
+		self.tree.addChild(
+			CustomTreeType("customBranch", val=34535))
+		self.tree("customBranch.leafC").extras["key"] = [1, 2]
+		serial = self.tree.serialise(version=1)
+		self.assertEqual(serial["?FORMAT_VERSION"], 1)
+		self.assertEqual(serial["?TREE"][2][1], ["branchB", 2])
+		serial = json.loads(json.dumps(serial))
+		restoreTree = Tree.fromDict(serial)
+		self.assertEqual(restoreTree, self.tree)
+		self.assertEqual(restoreTree.serialise(), self.tree.serialise())
+		self.assertIs(type(restoreTree("customBranch.leafC")),
+		              CustomTreeType)
+		self.assertEqual(restoreTree("customBranch.leafC").extras,
+		                 {"key" : [1, 2]})
+
+		# version 0 still loads, with or without a version key
+		self.assertEqual(Tree.fromDict(self.tree.serialise()), self.tree)
+		self.assertEqual(Tree.fromDict(self.tree("branchA").serialise()),
+		                 self.tree("branchA"))
+		with self.assertRaises(ValueError):
+			Tree.fromDict(dict(serial, **{"?FORMAT_VERSION" : 99}))
+		with self.assertRaises(ValueError):
+			self.tree.serialise(version=99)
+
+	def test_treeFromDict(self):
+		""" test bulk loading keeps falsy values, falls back from classes
+		that cannot be loaded, and restores nested classes """
+		for i, value in enumerate((0, False, "", [], {}, 0.0)):
+			self.tree("falsy.branch{}".format(i)).value = value
+		self.tree.addChild(CustomTreeType("custom"))
+		self.tree("custom").addChild(Tree("plain"))
+		self.tree("custom.plain").addChild(CustomTreeType("inner"))
+		self.tree("custom.plain.inner.deep").value = 0
+		self.tree("custom.inherited").value = False
+		serial = json.loads(json.dumps(self.tree.serialise()))
+		restoreTree = Tree.fromDict(serial)
+		self.assertEqual(restoreTree.serialise(), self.tree.serialise())
+		for i, value in enumerate((0, False, "", [], {}, 0.0)):
+			restored = restoreTree("falsy.branch{}".format(i)).value
+			self.assertEqual(restored, value)
+			self.assertIs(type(restored), type(value))
+		for address, cls in (("custom", CustomTreeType),
+		                     ("custom.plain", Tree),
+		                     ("custom.plain.inner", CustomTreeType),
+		                     ("custom.plain.inner.deep", CustomTreeType),
+		                     ("custom.inherited", CustomTreeType)):
+			self.assertIs(type(restoreTree(address)), cls)
+		self.assertIs(restoreTree("custom.plain.inner.deep").root,
+		              restoreTree)
+
+		# classes that cannot be loaded fall back to the parent's default,
+		# and branches below follow them
+		missing = "MissingTreeType|@|tree.test.noSuchModule"
+		custom = serial["?CHILDREN"][-1]
+		custom["objData"] = missing
+		try:
+			with redirect_stdout(io.StringIO()):
+				restoreTree = Tree.fromDict(serial)
+		finally:
+			classRegistry.pop(missing, None)
+		self.assertIs(type(restoreTree("custom")), Tree)
+		self.assertIs(type(restoreTree("custom.inherited")), Tree)
+		self.assertIs(restoreTree("custom.inherited").value, False)
+		self.assertIs(type(restoreTree("custom.plain.inner")), CustomTreeType)
+		self.assertEqual(restoreTree("custom.plain.inner.deep").value, 0)
+
+	def test_treeFormatOverrides(self):
+		""" test branches of classes redefining serialise() and fromDict()
+		save and load through them in every format """
+		custom = self.tree("branchA").addChild(
+			SettingTreeType("custom", val=3))
+		custom.setting = {"mode" : 2}
+		custom("inner").setting = [1]
+		root = SettingTreeType("root")
+		root.setting = "root setting"
+		root.addChild(self.tree.__deepcopy__())
+		for version in (0, 1):
+			serial = json.loads(json.dumps(root.serialise(version=version)))
+			self.assertEqual(serial["?FORMAT_VERSION"], version)
+			restoreTree = SettingTreeType.fromDict(serial)
+			self.assertEqual(restoreTree, root)
+			self.assertEqual(restoreTree.setting, "root setting")
+			restored = restoreTree("testRoot", "branchA", "custom")
+			self.assertIs(type(restored), SettingTreeType)
+			self.assertEqual(restored.setting, {"mode" : 2})
+			self.assertEqual(restored("inner").setting, [1])
+			self.assertIs(type(restored("inner")), SettingTreeType)
+
+	def test_treeClassRegistry(self):
+		""" test saved classes resolve through the registry,
+		quietly after the first time """
+		self.tree.addChild(
+			CustomTreeType("customBranch", val=34535))
+		serial = self.tree.serialise()
+		objData = serial["?CHILDREN"][-1]["objData"]
+		self.assertIs(loadObjectClass(objData), CustomTreeType)
+		self.assertIs(classRegistry[objData], CustomTreeType)
+		out = io.StringIO()
+		with redirect_stdout(out):
+			Tree.fromDict(serial)
+		self.assertEqual(out.getvalue(), "")
+
+		# registered ahead of time, under an old module path
+		class MovedTreeType(Tree):
+			pass
+		registerClass(MovedTreeType, "MovedTreeType|@|old.module")
+		try:
+			serial["?CHILDREN"][-1]["objData"] = "MovedTreeType|@|old.module"
+			restoreTree = Tree.fromDict(serial)
+			self.assertIs(type(restoreTree("customBranch")), MovedTreeType)
+		finally:
+			del classRegistry["MovedTreeType|@|old.module"]
+
+		# classes that cannot be loaded are reported once, then skipped
+		missing = "MissingTreeType|@|tree.test.noSuchModule"
+		for child in serial["?CHILDREN"]:
+			child["objData"] = missing
+		try:
+			out = io.StringIO()
+			with redirect_stdout(out):
+				Tree.fromDict(serial)
+			self.assertEqual(out.getvalue().count("ERROR in reloading class"), 1)
+			out = io.StringIO()
+			with redirect_stdout(out):
+				restoreTree = Tree.fromDict(serial)
+			self.assertEqual(out.getvalue(), "")
+			self.assertIsNone(classRegistry[missing])
+			self.assertEqual(
+				[type(i) for i in restoreTree.branches],
+				[Tree] * len(self.tree.branches))
+		finally:
+			del classRegistry[missing]
 
 
 if __name__ == '__main__':
@@ -0,0 +1,75 @@
+from __future__ import print_function
+import os, pickle, shutil, tempfile, unittest
+
+from tree import Tree
+from tree.dev.reftree import RefTree
+from tree.treefile import writeTreeFile, openTree, TreeFile
+
+
+class CustomTreeType(Tree):
+	branchesInherit = True
+
+
+class TestTreeFile(unittest.TestCase):
+	""" test binary tree files and lazy reading """
+
+	def setUp(self):
+		self.tree = Tree(name="testRoot", val="tree root")
+		self.tree("branchA").value = ["first branch", {"key" : 1}]
+		self.tree("branchA")("leafA").value = "first leaf"
+		self.tree("branchB").value = 2
+		self.tree("branchB.leafB").extras["readOnly"] = True
+		self.tree.addChild(CustomTreeType("custom", val=3))
+		self.tree("custom.inherited.deep")
+		self.dir = tempfile.mkdtemp()
+		self.path = os.path.join(self.dir, "test.tree")
+		writeTreeFile(self.tree, self.path)
+
+	def tearDown(self):
+		shutil.rmtree(self.dir)
+
+	def test_lazyReading(self):
+		ref = openTree(self.path)
+		self.assertIsInstance(ref, RefTree)
+		self.assertEqual(ref._refLoaded, 0)
+		self.assertEqual(ref.name, "testRoot")
+		leaf = ref("branchA.leafA")
+		self.assertEqual(leaf.value, "first leaf")
+		self.assertEqual(leaf.address, ["branchA", "leafA"])
+		# untouched branches are never read
+		self.assertFalse(ref("branchB")._refLoaded)
+		self.assertEqual(ref("branchB.leafB").extras, {"readOnly" : True})
+		self.assertEqual(ref, self.tree)
+		self.assertEqual(ref("branchA").serialise(),
+		                 self.tree("branchA").serialise())
+		with self.assertRaises(RuntimeError): # lookups never create
+			ref("branchA.missing")
+		ref.close()
+		self.assertTrue(ref._refFile._map.closed)
+
+	def test_serialise(self):
+		""" saved classes are kept, though branches are RefTrees """
+		with openTree(self.path) as ref:
+			self.assertEqual(ref.serialise(), self.tree.serialise())
+			self.assertIs(type(ref("custom.inherited")), RefTree)
+			for version in (0, 1):
+				restored = Tree.fromDict(ref.serialise(version=version))
+				self.assertEqual(restored.serialise(), self.tree.serialise())
+				self.assertIs(type(restored("custom.inherited.deep")),
+				              CustomTreeType)
+		self.assertTrue(ref._refFile._file.closed)
+
+	def test_toTree(self):
+		with TreeFile(self.path) as treeFile:
+			newTree = RefTree.fromFile(treeFile).toTree()
+			pickled = pickle.loads(pickle.dumps(RefTree.fromFile(treeFile)))
+		self.assertEqual(newTree, self.tree)
+		self.assertIs(type(pickled), Tree)
+		self.assertEqual(pickled.serialise(), self.tree.serialise())
+		self.assertIs(type(newTree), Tree)
+		self.assertIs(type(newTree("custom.inherited.deep")), CustomTreeType)
+		self.assertEqual(newTree.serialise(), self.tree.serialise())
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,209 @@
+""" binary tree files, opened by memory map and read on demand
+
+layout, all little-endian:
+	header - magic, format version, node count and section offsets
+	data - json-encoded values and extras, one after another
+	nodes - one fixed-size record per branch, in breadth-first order,
+		so each branch's children are one contiguous run of records
+	strings - offset table, then utf-8 bytes of each distinct name
+	meta - json dict of branch class names and root data
+
+opening a file only reads the header and meta, and reading a branch
+only touches the records of it and its ancestors' children,
+their names, and its own value -
+see dev.reftree.RefTree for the lazy tree built on a TreeFile
+
+	writeTreeFile(tree, "big.tree")
+	tree = openTree("big.tree")
+	tree("deep.branch").value
+"""
+from __future__ import annotations
+
+import json, mmap, struct
+from collections import deque
+
+from tree.core import TreeBase
+from tree.lib import loadObjectClass, uniqueSign
+
+magic = b"TREEFILE"
+formatVersion = 1
+
+# magic, version, nodes, nodes offset, strings offset,
+# string count, meta offset, meta length
+headerStruct = struct.Struct("<8sIQQQQQQ")
+# name id, first child, child count, value offset, value length,
+# extras offset, extras length, class id
+nodeStruct = struct.Struct("<IQIQIQIi")
+offsetStruct = struct.Struct("<Q")
+
+# name id of branches without a name
+noName = 0xFFFFFFFF
+
+
+def writeTreeFile(tree:TreeBase, path:str, encoder=None):
+	""" write tree to binary file at path
+	:param encoder : json.JSONEncoder for values and extras """
+	encode = (encoder or json.JSONEncoder(separators=(",", ":"))).encode
+	names, classes = {}, {}
+	nodes = bytearray()
+	with open(path, "wb") as f:
+		f.write(b"\0" * headerStruct.size)
+		offset = headerStruct.size
+		# breadth-first - children of each branch get consecutive ids
+		queue = deque([tree])
+		nextId = 1
+		while queue:
+			branch = queue.popleft()
+			name = branch._name
+			if name is None:
+				nameId = noName
+			else:
+				nameId = names.setdefault(name, len(names))
+			value = branch.value
+			if value is None:
+				valueOffset, valueLength = 0, 0
+			else:
+				data = encode(value).encode("utf-8")
+				f.write(data)
+				valueOffset, valueLength = offset, len(data)
+				offset += valueLength
+			if branch._extras:
+				data = encode(dict(branch._extras)).encode("utf-8")
+				f.write(data)
+				extrasOffset, extrasLength = offset, len(data)
+				offset += extrasLength
+			else:
+				extrasOffset, extrasLength = 0, 0
+			cls = type(branch)
+			classId = classes.setdefault(
+				uniqueSign.join([cls.__name__, cls.__module__]), len(classes))
+			children = branch._readMap()
+			nodes += nodeStruct.pack(
+				nameId, nextId, len(children), valueOffset, valueLength,
+				extrasOffset, extrasLength, classId)
+			nextId += len(children)
+			queue.extend(children.values())
+
+		nodesOffset = offset
+		f.write(nodes)
+		offset += len(nodes)
+
+		stringsOffset = offset
+		encoded = [i.encode("utf-8") for i in names]
+		position = 0
+		offsets = bytearray()
+		for data in encoded:
+			offsets += offsetStruct.pack(position)
+			position += len(data)
+		offsets += offsetStruct.pack(position)
+		f.write(offsets)
+		for data in encoded:
+			f.write(data)
+		offset += len(offsets) + position
+
+		meta = json.dumps({"classes" : list(classes),
+		                   "rootData" : tree.rootData()}).encode("utf-8")
+		f.write(meta)
+		f.seek(0)
+		f.write(headerStruct.pack(
+			magic, formatVersion, len(nodes) // nodeStruct.size,
+			nodesOffset, stringsOffset, len(names), offset, len(meta)))
+
+
+class TreeFile(object):
+	""" read access to a binary tree file through a memory map -
+	nodes are identified by their breadth-first index, root is 0 """
+
+	def __init__(self, path:str):
+		self.path = path
+		self._file = open(path, "rb")
+		self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+		(fileMagic, version, self.nNodes, self.nodesOffset,
+		 self.stringsOffset, self.nStrings, metaOffset, metaLength
+		 ) = headerStruct.unpack_from(self._map, 0)
+		if fileMagic != magic:
+			raise ValueError("{} is not a tree file".format(path))
+		if version > formatVersion:
+			raise ValueError("tree file {} has format version {}, "
+			                 "newer than supported {}".format(
+				path, version, formatVersion))
+		meta = json.loads(self._map[metaOffset:metaOffset + metaLength])
+		self.classNames = meta["classes"]
+		self.rootData = meta["rootData"]
+		self._classes = {}
+		self._names = {} # name id : decoded name
+		self._stringData = self.stringsOffset + \
+		                   (self.nStrings + 1) * offsetStruct.size
+
+	def close(self):
+		self._map.close()
+		self._file.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *args):
+		self.close()
+
+	def node(self, index)->tuple:
+		""" return (name, first child, child count, value offset,
+		value length, extras offset, extras length, class id) """
+		if not 0 <= index < self.nNodes:
+			raise IndexError("no node {} in {}".format(index, self.path))
+		record = nodeStruct.unpack_from(
+			self._map, self.nodesOffset + index * nodeStruct.size)
+		return (self.name(record[0]),) + record[1:]
+
+	def children(self, index)->list:
+		""" return (node index, name) for each child of node,
+		reading their records in one run """
+		record = nodeStruct.unpack_from(
+			self._map, self.nodesOffset + index * nodeStruct.size)
+		first, count = record[1], record[2]
+		if not count:
+			return []
+		start = self.nodesOffset + first * nodeStruct.size
+		view = memoryview(self._map)[start:start + count * nodeStruct.size]
+		try:
+			return [(first + i, self.name(child[0])) for i, child in
+			        enumerate(nodeStruct.iter_unpack(view))]
+		finally:
+			view.release()
+
+	def name(self, nameId)->str:
+		if nameId == noName:
+			return None
+		name = self._names.get(nameId)
+		if name is None:
+			start, end = struct.unpack_from(
+				"<QQ", self._map, self.stringsOffset + nameId * offsetStruct.size)
+			name = self._names[nameId] = self._map[
+				self._stringData + start:self._stringData + end].decode("utf-8")
+		return name
+
+	def _decode(self, offset, length):
+		if not length:
+			return None
+		return json.loads(self._map[offset:offset + length])
+
+	def value(self, index):
+		record = self.node(index)
+		return self._decode(record[3], record[4])
+
+	def extras(self, index)->dict:
+		record = self.node(index)
+		return self._decode(record[5], record[6])
+
+	def nodeClass(self, index)->type:
+		""" class the branch was saved from, loaded on first use """
+		classId = self.node(index)[7]
+		if classId not in self._classes:
+			self._classes[classId] = loadObjectClass(self.classNames[classId])
+		return self._classes[classId]
+
+
+def openTree(path:str):
+	""" return lazy RefTree root of binary tree file -
+	close() it, or use it in a with block, to close the file """
+	from tree.dev.reftree import RefTree
+	return RefTree.fromFile(TreeFile(path))